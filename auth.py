@@ -1,12 +1,102 @@
 
+import time
+import threading
+from collections import defaultdict, deque
 import streamlit as st
-from config import init_supabase
+from config import create_supabase_client, MAX_RETRIES, RETRY_DELAY
+
+# Refresh the cached session this many seconds before it expires
+SESSION_REFRESH_MARGIN = 60
+
+# Local throttle for failed sign in / sign up attempts (per email, process-wide)
+MAX_AUTH_ATTEMPTS = 5
+AUTH_ATTEMPT_WINDOW = 900  # seconds
+
+_ATTEMPTS = defaultdict(deque)
+_ATTEMPTS_LOCK = threading.Lock()
+
+
+def _attempt_key(email):
+    return (email or "").strip().lower()
+
+
+def _allow_attempt(email):
+    """False if email has reached the failed-attempt limit for the current window."""
+    now = time.monotonic()
+    key = _attempt_key(email)
+    with _ATTEMPTS_LOCK:
+        attempts = _ATTEMPTS.get(key)
+        if attempts is None:
+            return True
+        while attempts and now - attempts[0] > AUTH_ATTEMPT_WINDOW:
+            attempts.popleft()
+        if not attempts:
+            del _ATTEMPTS[key]  # drained; don't keep one entry per email ever tried
+            return True
+        return len(attempts) < MAX_AUTH_ATTEMPTS
+
+
+def _record_failed_attempt(email):
+    """Count a failed sign in / sign up for email (successful ones don't use up attempts)."""
+    with _ATTEMPTS_LOCK:
+        _ATTEMPTS[_attempt_key(email)].append(time.monotonic())
+
+
+# Longest single wait between auth retries, in seconds
+MAX_RETRY_WAIT = 30
+
+
+def _http_status(exc):
+    """Best-effort HTTP status code of a Supabase/httpx exception (None if unknown)."""
+    for attr in ("status", "status_code"):
+        status = getattr(exc, attr, None)
+        if isinstance(status, int):
+            return status
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after(exc):
+    """Seconds requested by a Retry-After header on the exception's response, if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _with_backoff(fn, *args, retries=MAX_RETRIES, base=RETRY_DELAY, **kwargs):
+    """
+    Call fn, retrying on 429 and 5xx responses with exponential backoff.
+    Honours Retry-After when present; other errors are raised immediately.
+    """
+    for attempt in range(retries):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            status = _http_status(e)
+            retryable = status == 429 or (status is not None and status >= 500)
+            if not retryable or attempt == retries - 1:
+                raise
+            wait = _retry_after(e)
+            if wait is None:
+                wait = base * 2 ** attempt
+            time.sleep(min(wait, MAX_RETRY_WAIT))
+
 
 class AuthManager:
     """Manages User Authentication using Supabase."""
 
-    def __init__(self):
-        self.supabase = init_supabase()
+    @property
+    def supabase(self):
+        """
+        This browser session's own Supabase client, created on first use.
+        Signing in stores the user's session on the client, so it must never be shared between sessions.
+        """
+        if "sb_client" not in st.session_state:
+            st.session_state["sb_client"] = create_supabase_client()
+        return st.session_state["sb_client"]
 
     def is_configured(self):
         """Check if Supabase is configured."""
@@ -16,11 +106,14 @@ class AuthManager:
         """Sign up a new user."""
         if not self.is_configured():
             return {"error": "Authentication service not unavailable."}
+
+        if not _allow_attempt(email):
+            return {"error": "Too many attempts, please wait 15 minutes and try again."}
         
         try:
             print(f"Attempting sign up for {email}")
             # Supabase Auth Sign Up
-            response = self.supabase.auth.sign_up({
+            response = _with_backoff(self.supabase.auth.sign_up, {
                 "email": email, 
                 "password": password,
                 "options": {
@@ -39,6 +132,7 @@ class AuthManager:
 
         except Exception as e:
             print(f"Sign up error: {e}")
+            _record_failed_attempt(email)
             return {"error": str(e)}
 
     def sign_in(self, email, password):
@@ -46,22 +140,30 @@ class AuthManager:
         if not self.is_configured():
              return {"error": "Authentication service not unavailable."}
 
+        if not _allow_attempt(email):
+            return {"error": "Too many attempts, please wait 15 minutes and try again."}
+
         try:
-            response = self.supabase.auth.sign_in_with_password({
+            response = _with_backoff(self.supabase.auth.sign_in_with_password, {
                 "email": email, 
                 "password": password
             })
             
             if response.session:
+                self._remember_session(response.session)
                 return {"success": True, "session": response.session, "user": response.user}
             else:
+                _record_failed_attempt(email)
                 return {"error": "Login failed. Check your credentials."}
 
         except Exception as e:
+            _record_failed_attempt(email)
             return {"error": str(e)}
 
     def sign_out(self):
         """Sign out the current user."""
+        for key in ("sb_user", "sb_expires_at", "sb_refresh_token"):
+            st.session_state.pop(key, None)
         if not self.is_configured():
             return
         try:
@@ -69,21 +171,33 @@ class AuthManager:
         except:
             pass
 
+    def _remember_session(self, session):
+        """Store the user, token expiry and refresh token in this browser session's state."""
+        st.session_state["sb_user"] = session.user
+        st.session_state["sb_expires_at"] = session.expires_at
+        st.session_state["sb_refresh_token"] = session.refresh_token
+
     def get_current_user(self):
         """Get the currently logged in user from local session state."""
-        # Note: In Streamlit, we manage session manually. 
-        # Supabase client might persist session in local storage if in browser, 
-        # but in Python Streamlit (server-side), we need to check Strealit's session_state.
-        # This method might just be a helper to check supabase client state if needed,
-        # but primarily we rely on what we stored in st.session_state after login.
-        if not self.is_configured():
+        # Session state is per-user; reuse it while the token is still valid
+        # to avoid a token-refreshing round-trip on every rerun.
+        user = st.session_state.get("sb_user")
+        expires_at = st.session_state.get("sb_expires_at")
+        if user is not None and expires_at and expires_at - time.time() > SESSION_REFRESH_MARGIN:
+            return user
+
+        # Only this session's own refresh token is used; nothing signed in here means no user
+        refresh_token = st.session_state.get("sb_refresh_token")
+        if not refresh_token or not self.is_configured():
             return None
-        
+
         try:
-            # Check if there's an active session in the supabase client
-            session = self.supabase.auth.get_session()
-            if session:
-                return session.user
-        except:
-            pass
+            response = self.supabase.auth.refresh_session(refresh_token)
+            if response.session:
+                self._remember_session(response.session)
+                return response.session.user
+        except Exception as e:
+            print(f"Session refresh failed: {e}")
+        for key in ("sb_user", "sb_expires_at", "sb_refresh_token"):
+            st.session_state.pop(key, None)
         return None
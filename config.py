@@ -1,12 +1,36 @@
 # config.py - Enhanced Configuration with Security and Validation
 
 import os
-from typing import Dict, Any
+import sys
+import functools
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+try:
+    from supabase import create_client
+except ImportError:
+    create_client = None
+
+# Load environment variables from .env file (once; child processes inherit the result)
+if not os.getenv("WEATHER_SYNC_ENV_LOADED"):
+    load_dotenv()
+    os.environ["WEATHER_SYNC_ENV_LOADED"] = "1"
+
+
+def _streamlit_runtime():
+    """The streamlit module when running inside a Streamlit app, else None.
+
+    Never imports streamlit itself, so CLI tools (the data collector) don't pay for it.
+    """
+    st = sys.modules.get("streamlit")
+    if st is None:
+        return None
+    try:
+        return st if st.runtime.exists() else None
+    except AttributeError:
+        return None
 
 
 def get_secret(key, default=None):
@@ -17,19 +41,53 @@ def get_secret(key, default=None):
         return val
     
     # 2. Try Streamlit Secrets (Streamlit Cloud)
+    st = _streamlit_runtime()
+    if st is None:
+        return default
     try:
-        import streamlit as st
         # secrets behaves like a dict but might raise if not configured or file missing
-        if hasattr(st, "secrets") and key in st.secrets:
+        if key in st.secrets:
             return st.secrets[key]
     except Exception:
         pass
         
     return default
 
-# --- Security: Load API Key from Environment Variable ---
-# This prevents hardcoding sensitive credentials in source code
-API_KEY = get_secret("OPENWEATHER_API_KEY", "411a686a21f617a1d849b7ab15c352d9")
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Credentials and service endpoints, resolved once at import time."""
+    api_key: str
+    supabase_url: Optional[str]
+    supabase_key: Optional[str]
+    termii_api_key: Optional[str]
+    termii_sender_id: str
+    termii_base_url: str
+    smtp_server: str
+    smtp_port: int
+    smtp_email: Optional[str]
+    smtp_password: Optional[str]
+
+
+CFG = Settings(
+    # --- Security: Load API Key from Environment Variable ---
+    # This prevents hardcoding sensitive credentials in source code
+    api_key=get_secret("OPENWEATHER_API_KEY", "411a686a21f617a1d849b7ab15c352d9"),
+    # --- Supabase Configuration ---
+    supabase_url=get_secret("SUPABASE_URL"),
+    supabase_key=get_secret("SUPABASE_KEY"),
+    # --- SMS Configuration (Termii) ---
+    termii_api_key=get_secret("TERMII_API_KEY"),
+    termii_sender_id=get_secret("TERMII_SENDER_ID", "N-Alert"),  # Default or requested Sender ID
+    termii_base_url="https://api.ng.termii.com/api",
+    # --- Email Configuration (SMTP) ---
+    smtp_server=get_secret("SMTP_SERVER", "smtp.office365.com"),
+    smtp_port=int(get_secret("SMTP_PORT", "587")),
+    smtp_email=get_secret("SMTP_EMAIL"),
+    smtp_password=get_secret("SMTP_PASSWORD"),
+)
+
+# Module-level names kept for existing `from config import ...` callers
+API_KEY = CFG.api_key
 
 if not API_KEY:
     raise ValueError(
@@ -37,18 +95,23 @@ if not API_KEY:
         "Please set it using: export OPENWEATHER_API_KEY='your_key_here'"
     )
 
-# --- Supabase Configuration ---
-SUPABASE_URL = get_secret("SUPABASE_URL")
-SUPABASE_KEY = get_secret("SUPABASE_KEY")
+SUPABASE_URL = CFG.supabase_url
+SUPABASE_KEY = CFG.supabase_key
 
 if not SUPABASE_URL or not SUPABASE_KEY:
     # Warning instead of Error for now, to allow partial functionality
     print("⚠️ Supabase credentials not found. Falling back to local CSV storage.")
 
-def init_supabase():
-    """Initialize and return the Supabase client."""
-    from supabase import create_client, Client
-    if not SUPABASE_URL or not SUPABASE_KEY:
+def _cache_resource(func):
+    """Cache a factory once per process (st.cache_resource inside a Streamlit app, lru_cache otherwise)."""
+    st = _streamlit_runtime()
+    if st is not None:
+        return st.cache_resource(show_spinner=False)(func)
+    return functools.lru_cache(maxsize=1)(func)
+
+def create_supabase_client():
+    """Create a new Supabase client (uncached; None if Supabase is not configured)."""
+    if not SUPABASE_URL or not SUPABASE_KEY or create_client is None:
         return None
     try:
         return create_client(SUPABASE_URL, SUPABASE_KEY)
@@ -56,18 +119,22 @@ def init_supabase():
         print(f"Failed to initialize Supabase: {e}")
         return None
 
-# --- SMS Configuration (Termii) ---
-TERMII_API_KEY = get_secret("TERMII_API_KEY")
-TERMII_SENDER_ID = get_secret("TERMII_SENDER_ID", "N-Alert") # Default or requested Sender ID
-TERMII_BASE_URL = "https://api.ng.termii.com/api"
-TERMII_BASE_URL = "https://api.ng.termii.com/api"
+@_cache_resource
+def init_supabase():
+    """
+    Shared Supabase client for anonymous data reads (created once per process).
+    Never sign in on it: the client would send that user's JWT for every session.
+    """
+    return create_supabase_client()
+
+TERMII_API_KEY = CFG.termii_api_key
+TERMII_SENDER_ID = CFG.termii_sender_id
+TERMII_BASE_URL = CFG.termii_base_url
 
-# --- Email Configuration (SMTP) ---
-# --- Email Configuration (SMTP) ---
-SMTP_SERVER = get_secret("SMTP_SERVER", "smtp.office365.com")
-SMTP_PORT = int(get_secret("SMTP_PORT", "587"))
-SMTP_EMAIL = get_secret("SMTP_EMAIL")
-SMTP_PASSWORD = get_secret("SMTP_PASSWORD")
+SMTP_SERVER = CFG.smtp_server
+SMTP_PORT = CFG.smtp_port
+SMTP_EMAIL = CFG.smtp_email
+SMTP_PASSWORD = CFG.smtp_password
 
 # --- Agricultural Zones Configuration ---
 # Coordinates are crucial for API calls
@@ -91,6 +158,10 @@ DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)  # Create data directory if it doesn't exist
 
 DATA_ARCHIVE_FILE = DATA_DIR / "abia_weather_archive.csv"
+# Columnar mirror of the CSV archive, rebuilt by the dashboard whenever the CSV is newer
+DATA_ARCHIVE_PARQUET = DATA_DIR / "abia_weather_archive.parquet"
+# Generate synthetic demo data when no archive is available (set WEATHER_SYNC_SAMPLE_DATA=0 in production)
+SAMPLE_DATA_ENABLED = os.getenv("WEATHER_SYNC_SAMPLE_DATA", "1") == "1"
 BACKUP_DIR = DATA_DIR / "backups"
 BACKUP_DIR.mkdir(exist_ok=True)
 
@@ -168,12 +239,19 @@ def validate_coordinates(lat: float, lon: float) -> bool:
     """Validate latitude and longitude values."""
     return -90 <= lat <= 90 and -180 <= lon <= 180
 
+_VALIDATED = False
+
 def validate_zones() -> bool:
-    """Validate all configured zones."""
+    """Validate all configured zones (only checked once per process)."""
+    global _VALIDATED
+    if _VALIDATED:
+        return True
     for zone, coords in AGRICULTURAL_ZONES.items():
         if not validate_coordinates(coords["lat"], coords["lon"]):
             raise ValueError(f"Invalid coordinates for zone {zone}")
+    _VALIDATED = True
     return True
 
-# Run validation on import
-validate_zones()
+# Run validation on import (set WEATHER_SYNC_STRICT=0 to skip)
+if os.getenv("WEATHER_SYNC_STRICT", "1") == "1":
+    validate_zones()
@@ -10,7 +10,217 @@ from datetime import datetime, timedelta
 from seasonal_crops import SEASONAL_CROPS, get_current_season, is_planting_season
 
 
-def calculate_crop_score(crop_name, crop_data, current_month, historical_data, current_conditions=None):
+_ALL_MONTHS_MASK = (1 << 12) - 1
+
+
+def months_to_mask(months):
+    """Pack month numbers (1-12) into a 12-bit mask (bit 0 = January)"""
+    mask = 0
+    for month in months:
+        mask |= 1 << (month - 1)
+    return mask
+
+
+def season_mask(start_month, span):
+    """Mask of span consecutive months starting at start_month, wrapping after December"""
+    if span >= 12:
+        return _ALL_MONTHS_MASK
+    run = (1 << span) - 1
+    shift = start_month - 1
+    return ((run << shift) | (run >> (12 - shift))) & _ALL_MONTHS_MASK
+
+
+def derive_crop_constants(crop_data):
+    """
+    Precompute the scoring thresholds that depend only on the crop profile
+    
+    Args:
+        crop_data: Crop information from SEASONAL_CROPS
+    
+    Returns:
+        dict: Temperature bands, season-adjusted rainfall limits and water flags
+    """
+    min_temp, max_temp = crop_data['optimal_temp_range']
+    min_rain, max_rain = crop_data['rainfall_annual_mm']
+    growing_days = crop_data['growing_season_days']
+    
+    return {
+        't_min': min_temp,
+        't_max': max_temp,
+        't_min_soft': min_temp - 3,
+        't_max_soft': max_temp + 3,
+        # Number of calendar months spanned by the growing period
+        'season_span': growing_days // 30 + 1,
+        # Annual rainfall limits adjusted for growing season length
+        'season_min': (min_rain / 365) * growing_days,
+        'season_max': (max_rain / 365) * growing_days,
+        'drought_tolerant': crop_data['water_requirement'] == "Low",
+        'water_loving': crop_data['water_requirement'] in ["High", "Very High"],
+        # Planting calendar as month bit masks
+        'plant_mask': months_to_mask(crop_data['planting_months']),
+        'optimal_mask': months_to_mask(crop_data['optimal_planting']),
+    }
+
+
+# Derived constants for every crop, built once at import time
+_CROP_DERIVED = {name: derive_crop_constants(crop) for name, crop in SEASONAL_CROPS.items()}
+
+_MONTH_NAMES = ("", "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def format_optimal_planting(crop_data):
+    """Format a crop's optimal planting months, e.g. "Mar, Apr" """
+    return ", ".join(_MONTH_NAMES[m] for m in crop_data.get('optimal_planting', [])) or "See Calendar"
+
+
+# Optimal planting months as display text for every crop
+_OPT_TEXT = {name: format_optimal_planting(crop) for name, crop in SEASONAL_CROPS.items()}
+
+
+# Hourly column -> (daily column, reduction) used to build daily aggregates
+_DAILY_AGGREGATES = {
+    'T_current': ('T_avg', 'mean'),
+    'T_max': ('T_max', 'max'),
+    'T_min': ('T_min', 'min'),
+    'Humidity': ('Humidity', 'mean'),
+    'Precipitation_1h': ('Daily_Precipitation', 'sum'),
+}
+
+
+def aggregate_daily(historical_data, aggregates=None):
+    """
+    Collapse hourly observations into daily aggregates
+    
+    Equivalent to resample('D') with mean/max/min/sum reducers, but done as one
+    grouped NumPy pass per column. Days without observations are kept (NaN,
+    zero precipitation) so the calendar stays continuous.
+    
+    Args:
+        historical_data: DataFrame of hourly weather (DatetimeIndex)
+        aggregates: Optional mapping of source column -> (daily column, 'mean'|'max'|'min'|'sum'),
+            defaults to _DAILY_AGGREGATES
+    
+    Returns:
+        DataFrame: Daily aggregates (T_avg, T_max, T_min, Humidity and Daily_Precipitation by default)
+    """
+    codes, days = pd.factorize(historical_data.index.normalize(), sort=True)
+    valid = codes >= 0  # Drop rows with a missing timestamp
+    codes = codes[valid]
+    n_days = len(days)
+    
+    # Group boundaries for the ordered reductions (max/min)
+    order = np.argsort(codes, kind='stable')
+    starts = np.flatnonzero(np.diff(codes[order], prepend=-1))
+    
+    columns = {}
+    for source, (target, how) in (aggregates or _DAILY_AGGREGATES).items():
+        if source not in historical_data.columns:
+            continue
+        values = historical_data[source].to_numpy(dtype=float, na_value=np.nan)[valid]
+        present = ~np.isnan(values)
+        
+        if how in ('sum', 'mean'):
+            total = np.bincount(codes, weights=np.where(present, values, 0.0), minlength=n_days)
+            if how == 'sum':
+                columns[target] = total
+            else:
+                count = np.bincount(codes, weights=present.astype(float), minlength=n_days)
+                columns[target] = np.divide(total, count, out=np.full(n_days, np.nan), where=count > 0)
+        else:
+            reducer = np.fmax if how == 'max' else np.fmin
+            columns[target] = reducer.reduceat(values[order], starts) if n_days else values[:0]
+    
+    daily = pd.DataFrame(columns, index=days)
+    if n_days:
+        # Re-insert empty days the way resample('D') would
+        daily = daily.reindex(pd.date_range(days[0], days[-1], freq='D', name=historical_data.index.name))
+        if 'Daily_Precipitation' in daily.columns:
+            daily['Daily_Precipitation'] = daily['Daily_Precipitation'].fillna(0.0)
+    return daily
+
+
+def build_monthly_tables(daily, months, years):
+    """
+    Aggregate daily weather into the month-level tables used for crop scoring
+    
+    Args:
+        daily: DataFrame of daily weather (DatetimeIndex)
+        months: Month number of each row of daily
+        years: Year of each row of daily
+    
+    Returns:
+        tuple: (by_m, by_ym) - stats per month and per (year, month),
+        or (None, None) if there is no data
+    """
+    if daily.empty:
+        return None, None
+    
+    aggs = {}
+    if 'T_avg' in daily.columns:
+        aggs['T_avg'] = ('T_avg', 'mean')
+    if 'Daily_Precipitation' in daily.columns:
+        aggs['Precip'] = ('Daily_Precipitation', 'sum')
+    
+    months = pd.Index(months, name='month')
+    years = pd.Index(years, name='year')
+    if not aggs:
+        # No weather columns to summarise; keep the row counts so the index is still available
+        aggs['Days'] = (daily.columns[0], 'size')
+    
+    by_m = daily.groupby(months).agg(**aggs)
+    by_ym = daily.groupby([years, months]).agg(**aggs)
+    return by_m, by_ym
+
+
+# Reason messages shown with each recommendation
+_REASONS = {
+    'plant_optimal': "✅ **Optimal planting window** - Peak season for {crop}",
+    'plant_acceptable': "⚠️ **Acceptable planting period** - Can plant but not peak season",
+    'plant_wrong': "❌ **Wrong season** - {reason}",
+    'temp_ideal': "✅ **Temperature ideal** ({avg:.1f}°C suits {lo}-{hi}°C range)",
+    'temp_acceptable': "⚠️ **Temperature acceptable** ({avg:.1f}°C near {lo}-{hi}°C range)",
+    'temp_suboptimal': "❌ **Temperature suboptimal** ({avg:.1f}°C outside {lo}-{hi}°C range)",
+    'temp_unavailable': "ℹ️ Temperature data unavailable for analysis",
+    'rain_adequate': "✅ **Adequate rainfall expected** ({rain:.0f}mm for growing season)",
+    'rain_low_tolerant': "⚠️ **Below optimal rain** but crop is drought-tolerant",
+    'rain_insufficient': "❌ **Insufficient rainfall** ({deficit:.0f}mm below minimum, irrigation needed)",
+    'rain_high_suits': "✅ **High rainfall suits water-loving crop**",
+    'rain_heavy': "⚠️ **Heavy rainfall expected** - ensure good drainage",
+    'rain_unavailable': "ℹ️ Rainfall data unavailable for analysis",
+    'history_success': "📊 **Historical success:** {rate:.0f}% of years had suitable conditions",
+    'history_unavailable': "ℹ️ Insufficient historical data for success rate",
+}
+
+
+# Bit of each month (index 0 = January), used to expand a month mask into a boolean array
+_MONTH_BITS = 1 << np.arange(12)
+
+
+def monthly_precip_table(by_m):
+    """
+    Flatten the monthly precipitation totals into month-indexed arrays
+    
+    Args:
+        by_m: Monthly stats from build_monthly_tables
+    
+    Returns:
+        tuple: (precip, present) arrays of length 12 (index 0 = January),
+        or None if no precipitation data is available
+    """
+    if by_m is None or 'Precip' not in by_m.columns:
+        return None
+    
+    month_idx = by_m.index.to_numpy() - 1
+    precip = np.zeros(12)
+    precip[month_idx] = by_m['Precip'].to_numpy()
+    present = np.zeros(12, dtype=bool)
+    present[month_idx] = True
+    return precip, present
+
+
+def calculate_crop_score(crop_name, crop_data, current_month, by_m, total_years=0, year_temps=None,
+                         month_precip=None, current_conditions=None):
     """
     Calculate suitability score for a crop based on multiple factors
     
@@ -18,7 +228,10 @@ def calculate_crop_score(crop_name, crop_data, current_month, historical_data, c
         crop_name: Name of the crop
         crop_data: Crop information from SEASONAL_CROPS
         current_month: Current month (1-12)
-        historical_data: DataFrame with historical weather data
+        by_m: Monthly stats from build_monthly_tables (None if no history)
+        total_years: Number of distinct years in the history
+        year_temps: Mean T_avg of current_month for each year (None if unavailable)
+        month_precip: Output of monthly_precip_table (derived from by_m if omitted)
         current_conditions: Optional dict with current weather conditions
     
     Returns:
@@ -26,116 +239,98 @@ def calculate_crop_score(crop_name, crop_data, current_month, historical_data, c
     """
     score = 0
     reasons = []
+    derived = _CROP_DERIVED.get(crop_name) or derive_crop_constants(crop_data)
+    if month_precip is None:
+        month_precip = monthly_precip_table(by_m)
     
     # 1. PLANTING WINDOW ANALYSIS (40% weight)
-    is_plantable, is_optimal, planting_reason = is_planting_season(crop_name, current_month)
+    month_bit = 1 << (current_month - 1)
+    is_plantable = bool(derived['plant_mask'] & month_bit)
+    is_optimal = bool(derived['optimal_mask'] & month_bit)
     
     if is_optimal:
         score += 40
-        reasons.append(f"✅ **Optimal planting window** - Peak season for {crop_name}")
+        reasons.append(_REASONS['plant_optimal'].format(crop=crop_name))
     elif is_plantable:
         score += 25
-        reasons.append(f"⚠️ **Acceptable planting period** - Can plant but not peak season")
+        reasons.append(_REASONS['plant_acceptable'])
     else:
         score += 0
-        reasons.append(f"❌ **Wrong season** - {planting_reason}")
+        _, _, planting_reason = is_planting_season(crop_name, current_month)
+        reasons.append(_REASONS['plant_wrong'].format(reason=planting_reason))
     
     # 2. TEMPERATURE MATCH (30% weight)
-    if not historical_data.empty:
+    if by_m is not None:
         # Get average temperature for this month from historical data
-        historical_data['month'] = historical_data.index.month
-        monthly_temps = historical_data[historical_data['month'] == current_month]
-        
-        if not monthly_temps.empty and 'T_avg' in monthly_temps.columns:
-            avg_temp = monthly_temps['T_avg'].mean()
-            min_temp_req, max_temp_req = crop_data['optimal_temp_range']
+        if current_month in by_m.index and 'T_avg' in by_m.columns:
+            avg_temp = by_m.at[current_month, 'T_avg']
+            min_temp_req, max_temp_req = derived['t_min'], derived['t_max']
             
             if min_temp_req <= avg_temp <= max_temp_req:
                 score += 30
-                reasons.append(f"✅ **Temperature ideal** ({avg_temp:.1f}°C suits {min_temp_req}-{max_temp_req}°C range)")
-            elif min_temp_req - 3 <= avg_temp <= max_temp_req + 3:
+                reasons.append(_REASONS['temp_ideal'].format(avg=avg_temp, lo=min_temp_req, hi=max_temp_req))
+            elif derived['t_min_soft'] <= avg_temp <= derived['t_max_soft']:
                 score += 20
-                reasons.append(f"⚠️ **Temperature acceptable** ({avg_temp:.1f}°C near {min_temp_req}-{max_temp_req}°C range)")
+                reasons.append(_REASONS['temp_acceptable'].format(avg=avg_temp, lo=min_temp_req, hi=max_temp_req))
             else:
                 score += 5
-                reasons.append(f"❌ **Temperature suboptimal** ({avg_temp:.1f}°C outside {min_temp_req}-{max_temp_req}°C range)")
+                reasons.append(_REASONS['temp_suboptimal'].format(avg=avg_temp, lo=min_temp_req, hi=max_temp_req))
         else:
             score += 15  # Neutral score if no data
-            reasons.append("ℹ️ Temperature data unavailable for analysis")
+            reasons.append(_REASONS['temp_unavailable'])
     
     # 3. RAINFALL ADEQUACY (20% weight)
-    if not historical_data.empty:
-        # Get expected rainfall for the growing season
-        planting_months = crop_data['planting_months']
-        growing_days = crop_data['growing_season_days']
-        
-        # Estimate harvest month
-        harvest_month = (current_month + (growing_days // 30)) % 12
-        if harvest_month == 0:
-            harvest_month = 12
-        
+    if by_m is not None:
         # Get rainfall for growing period
-        season_months = []
-        for i in range(growing_days // 30 + 1):
-            month = (current_month + i - 1) % 12 + 1
-            season_months.append(month)
-        
-        seasonal_rain = historical_data[historical_data['month'].isin(season_months)]
+        months_mask = season_mask(current_month, derived['season_span'])
+        n_months = 0
+        if month_precip is not None:
+            precip, present = month_precip
+            selected = present & ((months_mask & _MONTH_BITS) != 0)
+            n_months = int(selected.sum())
         
-        if not seasonal_rain.empty and 'Daily_Precipitation' in seasonal_rain.columns:
-            expected_rainfall = seasonal_rain['Daily_Precipitation'].sum() / len(seasonal_rain['month'].unique())
-            min_rain, max_rain = crop_data['rainfall_annual_mm']
-            
-            # Adjust for growing season length
-            season_min = (min_rain / 365) * growing_days
-            season_max = (max_rain / 365) * growing_days
+        if n_months:
+            expected_rainfall = precip[selected].sum() / n_months
+            season_min = derived['season_min']
+            season_max = derived['season_max']
             
             if season_min <= expected_rainfall <= season_max:
                 score += 20
-                reasons.append(f"✅ **Adequate rainfall expected** ({expected_rainfall:.0f}mm for growing season)")
+                reasons.append(_REASONS['rain_adequate'].format(rain=expected_rainfall))
             elif expected_rainfall < season_min:
                 deficit = season_min - expected_rainfall
-                if crop_data['water_requirement'] == "Low":
+                if derived['drought_tolerant']:
                     score += 15
-                    reasons.append(f"⚠️ **Below optimal rain** but crop is drought-tolerant")
+                    reasons.append(_REASONS['rain_low_tolerant'])
                 else:
                     score += 5
-                    reasons.append(f"❌ **Insufficient rainfall** ({deficit:.0f}mm below minimum, irrigation needed)")
+                    reasons.append(_REASONS['rain_insufficient'].format(deficit=deficit))
             else:  # Too much rain
-                if crop_data['water_requirement'] in ["High", "Very High"]:
+                if derived['water_loving']:
                     score += 18
-                    reasons.append(f"✅ **High rainfall suits water-loving crop**")
+                    reasons.append(_REASONS['rain_high_suits'])
                 else:
                     score += 10
-                    reasons.append(f"⚠️ **Heavy rainfall expected** - ensure good drainage")
+                    reasons.append(_REASONS['rain_heavy'])
         else:
             score += 10  # Neutral score
-            reasons.append("ℹ️ Rainfall data unavailable for analysis")
+            reasons.append(_REASONS['rain_unavailable'])
     
     # 4. HISTORICAL SUCCESS RATE (10% weight)
     # Based on how many years had successful conditions
-    if not historical_data.empty:
+    if by_m is not None:
         success_years = 0
-        total_years = len(historical_data.index.year.unique())
         
-        for year in historical_data.index.year.unique():
-            year_data = historical_data[historical_data.index.year == year]
-            year_data_month = year_data[year_data['month'] == current_month]
-            
-            if not year_data_month.empty and 'T_avg' in year_data_month.columns:
-                year_temp = year_data_month['T_avg'].mean()
-                min_temp, max_temp = crop_data['optimal_temp_range']
-                
-                if min_temp <= year_temp <= max_temp:
-                    success_years += 1
+        if year_temps is not None:
+            success_years = int(year_temps.between(derived['t_min'], derived['t_max']).sum())
         
         if total_years > 0:
             success_rate = (success_years / total_years) * 100
             score += (success_rate / 100) * 10
-            reasons.append(f"📊 **Historical success:** {success_rate:.0f}% of years had suitable conditions")
+            reasons.append(_REASONS['history_success'].format(rate=success_rate))
         else:
             score += 5
-            reasons.append("ℹ️ Insufficient historical data for success rate")
+            reasons.append(_REASONS['history_unavailable'])
     
     # Determine category based on final score
     if score >= 85:
@@ -154,35 +349,68 @@ def calculate_crop_score(crop_name, crop_data, current_month, historical_data, c
     return score, reasons, category, priority
 
 
-def estimate_gdd_harvest(t_base, gdd_target, climatology, start_date):
+def estimate_gdd_days(t_base, gdd_target, clim_arr, start_doy):
+    """
+    Days needed to accumulate the target GDD from a planting day, for one or many crops
+    
+    Args:
+        t_base: Base temperature(s), scalar or array of K crops
+        gdd_target: GDD required to reach maturity, same shape as t_base
+        clim_arr: Array of 365 average temperatures indexed by day of year - 1
+        start_doy: Day of year of planting (1-366)
+    
+    Returns:
+        ndarray: Days to maturity per crop (capped at 365; 0 when the target is <= 0)
+    """
+    t_base = np.atleast_1d(np.asarray(t_base, dtype=float))
+    gdd_target = np.atleast_1d(np.asarray(gdd_target, dtype=float))
+    
+    # Roll the climatology so index 0 is the planting day (wraps around the year)
+    rolled = np.roll(clim_arr, -(start_doy - 1))
+    # (K, 365) running GDD, one row per crop
+    cumulative_gdd = np.fmax(rolled[np.newaxis, :] - t_base[:, np.newaxis], 0).cumsum(axis=1)
+    
+    # First day the target is reached (rows are non-decreasing, so counting the
+    # days still below target is a row-wise searchsorted); capped at 365 days
+    days_passed = np.minimum((cumulative_gdd < gdd_target[:, np.newaxis]).sum(axis=1) + 1, 365)
+    return np.where(gdd_target <= 0, 0, days_passed)
+
+
+def estimate_gdd_harvest(t_base, gdd_target, clim_arr, start_date):
     """
     Estimate harvest date using GDD accumulation based on historical climatology
+    
+    Args:
+        t_base: Base temperature of the crop
+        gdd_target: GDD required to reach maturity
+        clim_arr: Array of 365 average temperatures indexed by day of year - 1
+        start_date: Planting date
+    
+    Returns:
+        tuple: (harvest_date, days_to_harvest)
     """
-    current_gdd = 0
-    days_passed = 0
     start_doy = start_date.timetuple().tm_yday
-    
-    # Limit simulation to 365 days to prevent infinite loops
-    while current_gdd < gdd_target and days_passed < 365:
-        # Get avg temp for this DOY
-        # Handle leap years and wrap-around (1-366)
-        doy_lookup = ((start_doy + days_passed - 1) % 365) + 1
-        
-        if doy_lookup in climatology.index:
-            t_avg = climatology[doy_lookup]
-            daily_gdd = max(0, t_avg - t_base)
-            current_gdd += daily_gdd
-        else:
-            # Fallback if specific day missing: assume generic warm day (25C)
-            daily_gdd = max(0, 25 - t_base)
-            current_gdd += daily_gdd
-            
-        days_passed += 1
-        
+    days_passed = int(estimate_gdd_days(t_base, gdd_target, clim_arr, start_doy)[0])
     harvest_date = start_date + timedelta(days=days_passed)
     return harvest_date, days_passed
 
 
+# GDD parameters of every crop that has them, stacked for estimate_gdd_days
+_GDD_CROPS = tuple(
+    name for name, crop in SEASONAL_CROPS.items() if 'T_base' in crop and 'GDD_to_Maturity' in crop
+)
+_GDD_T_BASE = np.array([SEASONAL_CROPS[name]['T_base'] for name in _GDD_CROPS], dtype=float)
+_GDD_TARGET = np.array([SEASONAL_CROPS[name]['GDD_to_Maturity'] for name in _GDD_CROPS], dtype=float)
+
+
+# Columns of the DataFrame returned by get_crop_recommendations
+RECOMMENDATION_COLUMNS = [
+    'crop', 'score', 'category', 'priority', 'reasons', 'water_requirement', 'soil_type',
+    'growing_days', 'expected_harvest', 'season', 'description', 'optimal_planting',
+    'optimal_planting_text',
+]
+
+
 def get_crop_recommendations(historical_data, current_month=None, zone_name=""):
     """
     Get ranked crop recommendations for current month
@@ -193,67 +421,75 @@ def get_crop_recommendations(historical_data, current_month=None, zone_name=""):
         zone_name: Name of the agricultural zone
     
     Returns:
-        list: List of dicts with crop recommendations, sorted by score
+        DataFrame: One row per crop (see RECOMMENDATION_COLUMNS), best priority first
+        and highest score first within a priority
     """
     if current_month is None:
         current_month = datetime.now().month
-
-    month_names = ["", "Jan", "Feb", "Mar", "Apr", "May", "Jun", 
-                  "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
     
     # Calculate daily aggregates if needed
     if 'T_avg' not in historical_data.columns and 'T_current' in historical_data.columns:
-        daily = historical_data.resample('D').agg({
-            'T_current': 'mean',
-            'T_max': 'max',
-            'T_min': 'min',
-            'Humidity': 'mean',
-            'Precipitation_1h': 'sum'
-        }).rename(columns={
-            'T_current': 'T_avg',
-            'Precipitation_1h': 'Daily_Precipitation'
-        })
+        daily = aggregate_daily(historical_data)
     else:
         daily = historical_data
     
-    # Create climatology for GDD projection (Avg Temp per Day of Year)
-    climatology = None
+    # Calendar fields computed once and shared by the monthly tables and climatology
+    months = daily.index.month
+    years = daily.index.year
+
+    # Create climatology for GDD projection (Avg Temp per Day of Year, as a 365-day array)
+    # Fallback if specific day missing: assume generic warm day (25C)
+    clim_arr = None
     if 'T_avg' in daily.columns:
-        # Create a copy to minimize warnings
-        daily_clim = daily.copy()
-        daily_clim['doy'] = daily_clim.index.dayofyear
-        climatology = daily_clim.groupby('doy')['T_avg'].mean()
+        clim_arr = (
+            daily['T_avg'].groupby(daily.index.dayofyear).mean()
+            .reindex(range(1, 366), fill_value=25)
+            .to_numpy(dtype=float)
+        )
 
-    recommendations = []
+    # Month-level tables shared by every crop
+    by_m, by_ym = build_monthly_tables(daily, months, years)
+    
+    total_years = len(np.unique(years))
+    
+    # Mean temperature of the analysed month in each year, shared by every crop
+    year_temps = None
+    if by_m is not None and current_month in by_m.index and 'T_avg' in by_ym.columns:
+        year_temps = by_ym.xs(current_month, level='month')['T_avg']
+    month_precip = monthly_precip_table(by_m)
+
+    # Accumulate column-wise; the DataFrame is built once at the end
+    recommendations = {column: [] for column in RECOMMENDATION_COLUMNS}
     
     current_date = datetime.now()
 
+    # Days to maturity for every GDD-profiled crop in one broadcast pass
+    gdd_days = {}
+    if clim_arr is not None and _GDD_CROPS:
+        days = estimate_gdd_days(_GDD_T_BASE, _GDD_TARGET, clim_arr, current_date.timetuple().tm_yday)
+        gdd_days = dict(zip(_GDD_CROPS, days.tolist()))
+
     for crop_name, crop_data in SEASONAL_CROPS.items():
         score, reasons, category, priority = calculate_crop_score(
-            crop_name, crop_data, current_month, daily
+            crop_name, crop_data, current_month, by_m, total_years, year_temps, month_precip
         )
         
         # Calculate expected harvest date using GDD if available
-        if climatology is not None and 'T_base' in crop_data and 'GDD_to_Maturity' in crop_data:
-            harvest_date, days_to_harvest = estimate_gdd_harvest(
-                crop_data['T_base'], 
-                crop_data['GDD_to_Maturity'], 
-                climatology, 
-                current_date
-            )
+        if crop_name in gdd_days:
+            days_to_harvest = gdd_days[crop_name]
+            harvest_date = current_date + timedelta(days=days_to_harvest)
             # Format: "Nov 15 (95 days)"
             expected_harvest = f"{harvest_date.strftime('%b %d')} ({days_to_harvest} days)"
         else:
             # Fallback to simple month calculation
             growing_days = crop_data['growing_season_days']
             harvest_month = (current_month + (growing_days // 30)) % 12
-            expected_harvest = f"{month_names[harvest_month]} (~{growing_days} days)"
+            expected_harvest = f"{_MONTH_NAMES[harvest_month]} (~{growing_days} days)"
         
         # Format optimal planting months
-        opt_months = [month_names[m] for m in crop_data.get('optimal_planting', [])]
-        opt_text = ", ".join(opt_months) if opt_months else "See Calendar"
+        opt_text = _OPT_TEXT.get(crop_name) or format_optimal_planting(crop_data)
 
-        recommendations.append({
+        row = {
             'crop': crop_name,
             'score': score,
             'category': category,
@@ -267,12 +503,14 @@ def get_crop_recommendations(historical_data, current_month=None, zone_name=""):
             'description': crop_data['description'],
             'optimal_planting': crop_data.get('optimal_planting', []),
             'optimal_planting_text': opt_text
-        })
-    
-    # Sort by score (descending)
-    recommendations.sort(key=lambda x: (-x['priority'], -x['score']))
+        }
+        for column in RECOMMENDATION_COLUMNS:
+            recommendations[column].append(row[column])
     
-    return recommendations
+    # Sort by priority (best first), then score (descending)
+    return pd.DataFrame(recommendations, columns=RECOMMENDATION_COLUMNS).sort_values(
+        ['priority', 'score'], ascending=[True, False], ignore_index=True
+    )
 
 
 def get_planting_calendar(crop_name=None):
@@ -1,7 +1,13 @@
 # dashboard.py - Enhanced with Weather Forecast Feature
 
+import io
 import os
+import tempfile
+import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
 
 import streamlit as st
@@ -11,14 +17,16 @@ import plotly.express as px
 import plotly.graph_objects as go
 
 try:
-    from supabase import create_client, Client
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
 except ImportError:
-    Client = None
-    create_client = None
+    pa = None
+    pa_csv = None
 
 # --- Local Modules ---
 from config import (
     DATA_ARCHIVE_FILE,
+    DATA_ARCHIVE_PARQUET,
     DROUGHT_THRESHOLD,
     WET_THRESHOLD,
     EXTREME_TEMP_HIGH,
@@ -27,12 +35,12 @@ from config import (
     AGRICULTURAL_ZONES,
     API_TIMEOUT,
     FORECAST_API_URL,
-    SUPABASE_URL,
-    SUPABASE_KEY,
+    SAMPLE_DATA_ENABLED,
+    init_supabase,
 )
 from seasonal_crops import SEASONAL_CROPS, get_current_season, get_crops_for_month, get_optimal_crops_for_month
-from crop_recommender import get_crop_recommendations, get_planting_calendar, format_recommendation_display
-from tts_utils import text_to_audio, autoplay_audio
+from crop_recommender import get_crop_recommendations, get_planting_calendar, format_recommendation_display, aggregate_daily
+from tts_utils import text_to_audio, autoplay_audio, prerender_audio
 from summary_generator import (
     generate_overview_summary,
     generate_temp_trend_summary,
@@ -55,139 +63,105 @@ st.set_page_config(
 )
 
 # Premium Modern UI Styling (Dark Mode)
-st.markdown(
-    """
-    <style>
-        /* Import Google Fonts */
-        @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
-
-        /* Main Container */
-        .stApp {
-            background-color: #0e1117;
-            color: #fafafa;
-            font-family: 'Inter', sans-serif;
-        }
+STYLES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "styles.css")
 
-        /* Sidebar */
-        [data-testid="stSidebar"] {
-            background-color: #161b22;
-            border-right: 1px solid #30363d;
-        }
 
-        /* Titles */
-        h1, h2, h3 {
-            color: #e6edf3 !important;
-            font-weight: 700;
-        }
-        
-        .main-header {
-            font-size: 2.2rem;
-            background: linear-gradient(90deg, #4CAF50 0%, #81C784 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            text-align: center;
-            margin-bottom: 0.5rem;
-            padding-bottom: 1rem;
-        }
+@st.cache_data(show_spinner=False)
+def load_css(path=STYLES_FILE):
+    """Read the dashboard stylesheet once per process."""
+    with open(path, encoding="utf-8") as f:
+        return f.read()
 
-        /* Cards / Metrics */
-        div[data-testid="stMetricValue"] {
-            font-size: 1.8rem;
-            color: #66bb6a;
-        }
-        
-        div[data-testid="metric-container"] {
-            background-color: #1f242d;
-            border: 1px solid #30363d;
-            padding: 1rem;
-            border-radius: 12px;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.2);
-            transition: transform 0.2s;
-        }
-        
-        div[data-testid="metric-container"]:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 6px 12px rgba(0,0,0,0.4);
-            border-color: #66bb6a;
-        }
-        
-        div[data-testid="stMetricLabel"] {
-            color: #b0b8c4;
-        }
 
-        /* Custom Cards */
-        .forecast-card {
-            background: #1f242d;
-            padding: 1.25rem;
-            border-radius: 12px;
-            border: 1px solid #30363d;
-            margin-bottom: 0.75rem;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            color: #e6edf3;
-            transition: all 0.2s ease;
-        }
-        .forecast-card:hover {
-            border-color: #66bb6a;
-            transform: translateX(4px);
-        }
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
 
-        /* Tabs */
-        .stTabs [data-baseweb="tab-list"] {
-            gap: 8px;
-            background-color: transparent;
-        }
-        
-        .stTabs [data-baseweb="tab"] {
-            height: 50px;
-            white-space: pre-wrap;
-            background-color: #1f242d;
-            border-radius: 8px 8px 0px 0px;
-            gap: 1px;
-            padding-top: 10px;
-            padding-bottom: 10px;
-            border: 1px solid #30363d;
-            border-bottom: none;
-            color: #b0b8c4;
-        }
-        
-        .stTabs [aria-selected="true"] {
-            background-color: #2E7D32;
-            color: white;
-            border: none;
-        }
 
-        /* Hourly Table */
-        .hourly-table-container {
-            display: grid;
-            grid-template-columns: repeat(8, 1fr);
-            text-align: center;
-            background: #1f242d;
-            padding: 1rem 0;
-            border-radius: 8px;
-            margin-top: 0.5rem;
-            border: 1px solid #30363d;
-        }
-        .hourly-table-cell {
-            padding: 0.25rem;
-            font-size: 0.85rem;
-            color: #e6edf3;
-            font-weight: 500;
-        }
-        
-        /* Remove default Streamlit chrome but keep header for sidebar toggle if needed */
-        #MainMenu {visibility: hidden;}
-        footer {visibility: hidden;}
-        /* header {visibility: hidden;}  <-- Commented out to allow sidebar toggle access if needed, 
-           but we are moving controls to main page anyway. */
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+# --- Utility Functions ---
 
+@st.cache_resource(show_spinner=False)
+def get_http_session():
+    """Shared keep-alive HTTP session for OpenWeatherMap calls (one per server process)."""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return session
+
+
+@st.cache_resource(show_spinner=False)
+def get_fetch_pool():
+    """Small worker pool for overlapping OpenWeatherMap requests (one per server process)."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="owm-fetch")
+
+
+@st.cache_resource(show_spinner=False)
+def get_notify_pool():
+    """Worker pool for SMS/email sends, so provider round-trips never block a rerun (one per server process)."""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="notify")
+
+
+@st.cache_resource(show_spinner=False)
+def get_sms_service():
+    """Shared Termii SMS client."""
+    return SMSService()
 
-# --- Utility Functions ---
 
-@st.cache_data(ttl=600)  # Cache current weather for 10 minutes to avoid hitting rate limits too hard
+@st.cache_resource(show_spinner=False)
+def get_email_service():
+    """Shared SMTP email client."""
+    return EmailService()
+
+
+# Seconds between checks on queued SMS/email sends
+NOTIFY_POLL_SECONDS = 2
+
+
+def queue_notification(label, send, *args):
+    """Submit a send_alert call to the notify pool and track it for this session."""
+    future = get_notify_pool().submit(send, *args)
+    st.session_state.setdefault("notify_jobs", []).append((label, future))
+    st.toast(f"📨 {label} queued")
+
+
+def render_notification_status():
+    """Report finished SMS/email sends as toasts; keep the rest pending.
+
+    When the last pending send finishes, rerun the app so the fragment's poll timer is dropped;
+    the toasts are carried over in session_state and shown on that run.
+    """
+    jobs = st.session_state.get("notify_jobs", [])
+    messages = st.session_state.pop("notify_toasts", [])
+    pending = []
+    for label, future in jobs:
+        if not future.done():
+            pending.append((label, future))
+            continue
+        try:
+            res = future.result()
+        except Exception as e:
+            res = {"error": str(e)}
+        if res.get("success"):
+            messages.append(f"✅ {label} sent!")
+        else:
+            messages.append(f"❌ {label} failed: {res.get('error')}")
+    st.session_state["notify_jobs"] = pending
+
+    if jobs and not pending:
+        st.session_state["notify_toasts"] = messages
+        st.rerun(scope="app")
+    for message in messages:
+        st.toast(message)
+
+
+def prefetch_zone_weather(zone_name):
+    """Start the live and forecast requests for a zone in the background.
+
+    Both fetchers are cached (st.cache_data / the forecast SWR cache), so the later calls from
+    the tabs pick up the in-flight or finished result instead of waiting on the network one after another.
+    """
+    pool = get_fetch_pool()
+    return [pool.submit(fetch_current_weather, zone_name), pool.submit(_fetch_forecast_raw, zone_name)]
+
+
+@st.cache_data(ttl=600, show_spinner=False)  # Cache current weather for 10 minutes to avoid hitting rate limits too hard
 def fetch_current_weather(zone_name):
     """Fetch real-time current weather from OpenWeatherMap API."""
     try:
@@ -210,7 +184,7 @@ def fetch_current_weather(zone_name):
             "units": "metric",
         }
         
-        response = requests.get(base_url, params=params, timeout=API_TIMEOUT)
+        response = get_http_session().get(base_url, params=params, timeout=API_TIMEOUT)
         response.raise_for_status()
         data = response.json()
         
@@ -232,205 +206,502 @@ def fetch_current_weather(zone_name):
         return None
 
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
+# Forecasts refresh hourly; also bounds how long Tab 2's copy in session_state is reused
+FORECAST_TTL = timedelta(hours=1)
+# After FORECAST_TTL a forecast is still served for this long while a background refresh runs
+FORECAST_STALE_FOR = timedelta(hours=2)
+
+
+class StaleWhileRevalidateCache:
+    """Process-wide keyed cache that serves stale entries while refreshing them in the background.
+
+    Entries younger than max_age are returned as is; entries up to max_age + stale_for old are
+    returned immediately and refreshed on the worker pool; anything older (or missing) is fetched
+    inline. A per-key lock keeps concurrent sessions from stampeding the API for the same key.
+    """
+
+    def __init__(self, fetch, max_age, stale_for, pool):
+        self._fetch = fetch
+        self._max_age = max_age.total_seconds()
+        self._stale_for = stale_for.total_seconds()
+        self._pool = pool
+        self._entries = {}  # key -> (value, fetched_at epoch seconds)
+        self._key_locks = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _refresh(self, key):
+        entry = (self._fetch(key), time.time())
+        self._entries[key] = entry
+        return entry
+
+    def _refresh_in_background(self, key):
+        try:
+            with self._key_lock(key):
+                self._refresh(key)
+        except Exception as e:
+            print(f"Background refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key):
+        """Return (value, fetched_at) for key."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.time() - entry[1]
+            if age < self._max_age:
+                return entry
+            if age < self._max_age + self._stale_for:
+                with self._lock:
+                    start = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start:
+                    self._pool.submit(self._refresh_in_background, key)
+                return entry
+
+        with self._key_lock(key):
+            # Another session may have fetched it while we waited for the lock
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[1] < self._max_age:
+                return entry
+            return self._refresh(key)
+
+
+def _request_forecast(zone_name):
+    """Fetch the raw 5-day/3-hour forecast payload from OpenWeatherMap."""
+    coords = AGRICULTURAL_ZONES[zone_name]
+    params = {
+        "lat": coords["lat"],
+        "lon": coords["lon"],
+        "appid": API_KEY,
+        "units": "metric",
+    }
+    response = get_http_session().get(FORECAST_API_URL, params=params, timeout=API_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+@st.cache_resource(show_spinner=False)
+def get_forecast_cache():
+    """Forecast payloads shared by every session (stale-while-revalidate, one per server process)."""
+    return StaleWhileRevalidateCache(_request_forecast, FORECAST_TTL, FORECAST_STALE_FOR, get_fetch_pool())
+
+
+def _fetch_forecast_raw(zone_name):
+    """Return (payload, fetched_at) for the forecast shared by the hourly and daily views."""
+    return get_forecast_cache().get(zone_name)
+
+
+# json_normalize column -> hourly forecast column
+HOURLY_FORECAST_FIELDS = {
+    "dt": "dt",
+    "weather": "weather",
+    "main.temp": "temp",
+    "main.feels_like": "feels_like",
+    "main.humidity": "humidity",
+    "main.pressure": "pressure",
+    "clouds.all": "clouds",
+    "wind.speed": "wind_speed",
+    "rain.3h": "rain_3h",
+    "pop": "pop",
+}
+
+
 def fetch_hourly_forecast(zone_name):
     """Fetch 3-hourly forecast for next 5 days (120 hours) but return relevant slice."""
     try:
-        coords = AGRICULTURAL_ZONES[zone_name]
-        url = FORECAST_API_URL # Use the URL from config.py
-        
-        params = {
-            "lat": coords["lat"],
-            "lon": coords["lon"],
-            "appid": API_KEY,
-            "units": "metric",
-        }
-        
-        response = requests.get(url, params=params, timeout=API_TIMEOUT)
-        response.raise_for_status()
-        data = response.json()
-        
-        forecast_list = []
+        data, fetched_at = _fetch_forecast_raw(zone_name)
+    except Exception as e:
+        st.error(f"Error fetching hourly forecast: {e}")
+        return pd.DataFrame()
+    return _build_hourly_forecast(zone_name, fetched_at, data)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _build_hourly_forecast(zone_name, fetched_at, _data):
+    """Hourly forecast frame for one fetched payload (keyed by zone and fetch time)."""
+    try:
+        data = _data
+
         # Logic: OpenWeatherMap 5-day/3-hour forecast returns 40 items.
         # We want the next 48 hours for the chart. 48 hours / 3 hours = 16 items.
-        
+        items = data["list"][:16]
+        raw = pd.json_normalize(items).reindex(columns=list(HOURLY_FORECAST_FIELDS))
+        hourly = raw.rename(columns=HOURLY_FORECAST_FIELDS)
+
         # TIMEZONE CORRECTION: Adjust UTC timestamps to WAT (UTC+1) for display
         # Simplified handling without external pytz dependency
-        offset = timedelta(hours=1) 
-
-        for item in data["list"][:16]:  
-            dt_utc = datetime.fromtimestamp(item["dt"])
-            dt_local = dt_utc + offset
-
-            forecast_list.append({
-                "datetime": dt_local,
-                "temp": item["main"]["temp"],
-                "feels_like": item["main"]["feels_like"],
-                "humidity": item["main"]["humidity"],
-                "pressure": item["main"]["pressure"],
-                "weather": item["weather"][0]["main"],
-                "description": item["weather"][0]["description"],
-                "icon": item["weather"][0]["icon"],
-                "clouds": item["clouds"]["all"],
-                "wind_speed": item["wind"]["speed"],
-                "rain_3h": item.get("rain", {}).get("3h", 0.0),
-                "pop": item.get("pop", 0) * 100,  # Probability of precipitation
-            })
-        
-        return pd.DataFrame(forecast_list)
+        hourly["datetime"] = pd.to_datetime(raw["dt"], unit="s") + timedelta(hours=1)
+        conditions = raw["weather"].str[0]
+        hourly["weather"] = conditions.str.get("main")
+        hourly["description"] = conditions.str.get("description")
+        hourly["icon"] = conditions.str.get("icon")
+        hourly["rain_3h"] = hourly["rain_3h"].fillna(0.0)
+        hourly["pop"] = hourly["pop"].fillna(0) * 100  # Probability of precipitation
+
+        return hourly[
+            ["datetime", "temp", "feels_like", "humidity", "pressure", "weather", "description",
+             "icon", "clouds", "wind_speed", "rain_3h", "pop"]
+        ]
     
     except Exception as e:
         st.error(f"Error fetching hourly forecast: {e}")
         return pd.DataFrame()
 
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
 def fetch_daily_forecast(zone_name):
     """Fetch 5-day daily forecast aggregated from the 3-hour forecast API."""
+    return fetch_daily_forecast_stamped(zone_name)[0]
+
+
+def fetch_daily_forecast_stamped(zone_name):
+    """(daily forecast frame, datetime its payload was fetched); the time is None if the fetch failed."""
     try:
-        coords = AGRICULTURAL_ZONES[zone_name]
-        url = FORECAST_API_URL # Use the URL from config.py
-        
-        params = {
-            "lat": coords["lat"],
-            "lon": coords["lon"],
-            "appid": API_KEY,
-            "units": "metric",
-        }
-        
-        response = requests.get(url, params=params, timeout=API_TIMEOUT)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Aggregate by day
-        daily_data = {}
-        
+        data, fetched_at = _fetch_forecast_raw(zone_name)
+    except Exception as e:
+        st.error(f"Error fetching daily forecast: {e}")
+        return pd.DataFrame(), None
+    return _build_daily_forecast(zone_name, fetched_at, data), datetime.fromtimestamp(fetched_at)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _build_daily_forecast(zone_name, fetched_at, _data):
+    """Daily forecast frame for one fetched payload (keyed by zone and fetch time)."""
+    try:
+        data = _data
+
+        items = data["list"]
+        raw = pd.json_normalize(items).reindex(
+            columns=["dt", "main.temp", "main.humidity", "wind.speed", "clouds.all", "rain.3h", "pop"]
+        )
+
         # TIMEZONE CORRECTION: Adjust UTC timestamps to WAT (UTC+1) for accurate daily bins
-        offset = timedelta(hours=1)
-        
-        for item in data["list"]:
-            dt_utc = datetime.fromtimestamp(item["dt"])
-            dt_local = dt_utc + offset
-            date_key = dt_local.date()
-            
-            if date_key not in daily_data:
-                daily_data[date_key] = {
-                    "temps": [],
-                    "humidity": [],
-                    "weather": [],
-                    "rain": 0,
-                    "wind_speed": [],
-                    "clouds": [],
-                    "pops": [], # NEW: Probability of precipitation
-                }
-            
-            daily_data[date_key]["temps"].append(item["main"]["temp"])
-            daily_data[date_key]["humidity"].append(item["main"]["humidity"])
-            daily_data[date_key]["weather"].append(item["weather"][0]["main"])
-            daily_data[date_key]["rain"] += item.get("rain", {}).get("3h", 0.0)
-            daily_data[date_key]["wind_speed"].append(item["wind"]["speed"])
-            daily_data[date_key]["clouds"].append(item["clouds"]["all"])
-            daily_data[date_key]["pops"].append(item.get("pop", 0) * 100) # NEW
-        
-        # Create daily forecast dataframe
-        forecast_list = []
-        for date_key, values in sorted(daily_data.items()):
-            # Find the most frequent weather condition for the day
-            most_frequent_weather = max(set(values["weather"]), key=values["weather"].count)
-            total_rain = values["rain"]
-            max_pop = max(values["pops"]) if values["pops"] else 0
-            
-            # --- LOGIC CORRECTION: Reduce False Positive Rain ---
-            # If labelled "Rain" but total volume is negligible (< 0.5mm), downgrade it.
-            if most_frequent_weather == "Rain":
-                if total_rain < 0.2: 
-                     # Very dry, likely just passing clouds or high probability but low volume
-                     most_frequent_weather = "Clouds" 
-                elif total_rain < 0.5:
-                     # Minimal rain, call it Drizzle
-                     most_frequent_weather = "Drizzle"
-            
-            # Conversely, if "Clouds" but High Rain Volume, upgrade it (rare case but possible)
-            if most_frequent_weather == "Clouds" and total_rain > 2.0:
-                most_frequent_weather = "Rain"
-            
-            forecast_list.append({
-                "date": date_key,
-                "temp_max": max(values["temps"]),
-                "temp_min": min(values["temps"]),
-                "humidity": np.mean(values["humidity"]),
-                "weather": most_frequent_weather,
-                "total_rain": total_rain,
-                "wind_speed": np.mean(values["wind_speed"]),
-                "clouds": np.mean(values["clouds"]),
-                "max_pop": max_pop,
-            })
-        
-        return pd.DataFrame(forecast_list)
+        raw["date"] = (pd.to_datetime(raw["dt"], unit="s") + timedelta(hours=1)).dt.date
+        raw["weather"] = [item["weather"][0]["main"] for item in items]
+        raw["rain"] = raw["rain.3h"].fillna(0.0)
+        raw["pop"] = raw["pop"].fillna(0) * 100  # Probability of precipitation
+
+        # Aggregate by day
+        by_day = raw.groupby("date", sort=True)
+        daily = by_day.agg(
+            temp_max=("main.temp", "max"),
+            temp_min=("main.temp", "min"),
+            humidity=("main.humidity", "mean"),
+            total_rain=("rain", "sum"),
+            wind_speed=("wind.speed", "mean"),
+            clouds=("clouds.all", "mean"),
+            max_pop=("pop", "max"),
+        )
+        # Most frequent weather condition for the day (ties go to the earliest slot):
+        # count each (date, condition) pair once, then keep the top pair per date
+        slots = raw.assign(slot=np.arange(len(raw))).groupby(["date", "weather"], sort=False)["slot"]
+        tally = pd.DataFrame({"count": slots.size(), "first": slots.min()}).reset_index()
+        weather = (
+            tally.sort_values(["count", "first"], ascending=[False, True])
+            .drop_duplicates("date")
+            .set_index("date")["weather"]
+            .reindex(daily.index)
+        )
+        total_rain = daily["total_rain"]
+
+        # --- LOGIC CORRECTION: Reduce False Positive Rain ---
+        # "Rain" with negligible volume becomes Clouds (< 0.2mm) or Drizzle (< 0.5mm);
+        # conversely "Clouds" with high rain volume (> 2mm) is upgraded to Rain.
+        daily["weather"] = np.select(
+            [
+                (weather == "Rain") & (total_rain < 0.2),
+                (weather == "Rain") & (total_rain < 0.5),
+                (weather == "Clouds") & (total_rain > 2.0),
+            ],
+            ["Clouds", "Drizzle", "Rain"],
+            default=weather,
+        )
+
+        return daily.reset_index()[
+            ["date", "temp_max", "temp_min", "humidity", "weather",
+             "total_rain", "wind_speed", "clouds", "max_pop"]
+        ]
     
     except Exception as e:
         st.error(f"Error fetching daily forecast: {e}")
         return pd.DataFrame()
 
 
+# OpenWeatherMap main condition -> emoji (built once, not per call)
+WEATHER_EMOJIS = {
+    "Clear": "☀️",
+    "Clouds": "☁️",
+    "Rain": "🌧️",
+    "Drizzle": "🌦️",
+    "Thunderstorm": "⛈️",
+    "Snow": "❄️",
+    "Mist": "🌫️",
+    "Fog": "🌫️",
+    "Haze": "🌫️",
+    "Smoke": "🌫️",
+    "Dust": "💨",
+    "Sand": "💨",
+    "Ash": "💨",
+    "Squall": "🌬️",
+    "Tornado": "🌪️",
+}
+
+
 def get_weather_emoji(weather_condition):
     """Return emoji for weather condition."""
-    weather_emojis = {
-        "Clear": "☀️",
-        "Clouds": "☁️",
-        "Rain": "🌧️",
-        "Drizzle": "🌦️",
-        "Thunderstorm": "⛈️",
-        "Snow": "❄️",
-        "Mist": "🌫️",
-        "Fog": "🌫️",
-        "Haze": "🌫️",
-        "Smoke": "🌫️",
-        "Dust": "💨",
-        "Sand": "💨",
-        "Ash": "💨",
-        "Squall": "🌬️",
-        "Tornado": "🌪️",
-    }
-    return weather_emojis.get(weather_condition, "🌤️")
+    return WEATHER_EMOJIS.get(weather_condition, "🌤️")
+
+
+def read_archive_csv(path):
+    """Read the CSV archive with the multi-threaded Arrow parser, falling back to the default engine."""
+    try:
+        return pd.read_csv(path, engine="pyarrow")
+    except ImportError:
+        return pd.read_csv(path)
+
+
+# Archive columns the dashboard actually reads; everything else stays on disk
+ARCHIVE_COLUMNS = [
+    "Timestamp", "Zone", "T_current", "T_min", "T_max", "Humidity",
+    "Precipitation_1h", "Wind_Speed", "Wind_Direction", "Pressure",
+]
+
+
+def ensure_parquet_archive(csv_path=DATA_ARCHIVE_FILE, parquet_path=DATA_ARCHIVE_PARQUET):
+    """Rebuild the Parquet mirror from the CSV archive when it is missing or stale.
+
+    Returns True when an up-to-date Parquet file is available.
+    """
+    if not os.path.exists(csv_path):
+        return os.path.exists(parquet_path)
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+        return True
+    try:
+        df = read_archive_csv(csv_path)
+        df["Timestamp"] = pd.to_datetime(df["Timestamp"])
+        # Write beside the mirror and swap it in, so a failed write or a concurrent reader
+        # never sees a truncated file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(parquet_path) or ".", suffix=".parquet.tmp")
+        os.close(fd)
+        try:
+            # Store the narrow dtypes so reads decode (and allocate) half-width columns
+            downcast_weather_frame(df).to_parquet(tmp_path, engine="pyarrow", compression="zstd", index=False)
+            os.replace(tmp_path, parquet_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return True
+    except (ImportError, OSError, ValueError) as e:
+        print(f"Could not write Parquet archive: {e}")
+        return False
+
+
+def read_archive(columns=ARCHIVE_COLUMNS):
+    """Read the archive columns from the Parquet mirror, falling back to the CSV."""
+    if ensure_parquet_archive():
+        try:
+            return pd.read_parquet(DATA_ARCHIVE_PARQUET, engine="pyarrow", columns=columns)
+        except (ImportError, OSError, ValueError) as e:
+            print(f"Could not read Parquet archive: {e}")
+    df = read_archive_csv(DATA_ARCHIVE_FILE)
+    return df[[c for c in columns if c in df.columns]]
+
+
+# Supabase weather_data column -> standard archive schema
+SUPABASE_COLUMN_MAP = {
+    "timestamp": "Timestamp",
+    "zone": "Zone",
+    "t_current": "T_current",
+    "t_min": "T_min",
+    "t_max": "T_max",
+    "feels_like": "Feels_Like",
+    "humidity": "Humidity",
+    "pressure": "Pressure",
+    "wind_speed": "Wind_Speed",
+    "wind_direction": "Wind_Direction",
+    "cloudiness": "Cloudiness",
+    "precipitation_1h": "Precipitation_1h",
+    "precipitation_3h": "Precipitation_3h",
+    "weather_condition": "Weather_Condition",
+    "weather_description": "Weather_Description",
+    "visibility": "Visibility"
+}
+# Only request the columns the dashboard reads
+SUPABASE_SELECT = ",".join(k for k, v in SUPABASE_COLUMN_MAP.items() if v in ARCHIVE_COLUMNS)
+SUPABASE_PAGE_SIZE = 1000  # PostgREST caps a single response at its max-rows setting (1000 by default)
+# Page order: timestamps repeat (one row per zone per collection), so the primary key breaks ties.
+# Sent as one order=timestamp,id parameter; without a unique key, tied rows can shift between OFFSET pages.
+SUPABASE_PAGE_ORDER = "timestamp,id"
+
+
+def fetch_supabase_page(supabase, start, page_size=SUPABASE_PAGE_SIZE, since=None, count=False):
+    """Fetch one (timestamp, id)-ordered page of projected weather_data rows (the raw PostgREST response).
+
+    With since, only rows at or after that timestamp are requested (filtered in the database).
+    """
+    query = supabase.table("weather_data").select(SUPABASE_SELECT, count="exact" if count else None)
+    if since is not None:
+        query = query.gte("timestamp", since)
+    return query.order(SUPABASE_PAGE_ORDER).range(start, start + page_size - 1).execute()
+
+
+def fetch_supabase_pages(supabase, since=None, page_size=SUPABASE_PAGE_SIZE):
+    """Fetch weather_data rows as one DataFrame per page, in timestamp order.
+
+    The first page also returns the total row count; the remaining pages are then requested
+    concurrently on the fetch pool. The (timestamp, id) order is total, so every page sees the
+    same row sequence; rows committed mid-fetch can still shift later pages, which the next
+    sync picks up again (see sync_supabase_rows).
+    """
+    first = fetch_supabase_page(supabase, 0, page_size, since=since, count=True)
+    pages = [pd.DataFrame(first.data or [])]
+    total = first.count if first.count is not None else len(first.data or [])
+    if len(pages[0]) < page_size or total <= page_size:
+        return pages
+
+    pool = get_fetch_pool()
+    futures = [
+        pool.submit(fetch_supabase_page, supabase, start, page_size, since)
+        for start in range(page_size, total, page_size)
+    ]
+    pages.extend(pd.DataFrame(f.result().data or []) for f in futures)
+
+    # Rows inserted after the count was taken land past the last requested page
+    start = len(futures) * page_size + page_size
+    while len(pages[-1]) == page_size:
+        pages.append(pd.DataFrame(fetch_supabase_page(supabase, start, page_size, since=since).data or []))
+        start += page_size
+    return pages
+
+
+# Re-pull the whole table this often so the held rows cannot drift from weather_data
+SUPABASE_FULL_REFRESH_SECONDS = 6 * 60 * 60
+
+
+@st.cache_resource(show_spinner=False)
+def get_supabase_row_store():
+    """Rows already pulled from weather_data (one frame per server process).
+
+    weather_data is insert-only, so between full refreshes each reload only asks for rows at or
+    after the last timestamp held.
+    """
+    return {"rows": None, "full_at": 0.0, "lock": threading.Lock()}
+
+
+def sync_supabase_rows(supabase):
+    """Bring the process-wide row store up to date with weather_data and return it as one frame.
+
+    The returned frame is shared; callers must not mutate it in place.
+    """
+    store = get_supabase_row_store()
+    with store["lock"]:
+        held = store["rows"]
+        full = held is None or held.empty or time.monotonic() - store["full_at"] > SUPABASE_FULL_REFRESH_SECONDS
+        since = None if full else held["timestamp"].iat[-1]
+        pages = [page for page in fetch_supabase_pages(supabase, since=since) if not page.empty]
+        fresh = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+        if not fresh.empty:
+            # Page edges can still repeat a row if inserts land mid-fetch
+            fresh = fresh.drop_duplicates(subset=["timestamp", "zone"], keep="last", ignore_index=True)
+
+        if full:
+            store["full_at"] = time.monotonic()
+            rows = fresh
+        else:
+            # gte re-fetches every row tied with the last timestamp held (rows committed later
+            # with that same timestamp included), so the held copies of those rows are replaced
+            cut = held["timestamp"].searchsorted(since, side="left")
+            if len(fresh) <= len(held) - cut:
+                return held  # nothing new (the table is insert-only)
+            rows = pd.concat([held.iloc[:cut], fresh], ignore_index=True)
+        store["rows"] = rows
+        return rows
+
+
+# Narrow dtypes for the loaded archive: readings fit easily in float32, percentages in uint8
+FLOAT32_COLUMNS = ("T_current", "T_min", "T_max", "Wind_Speed", "Precipitation_1h", "Precipitation_3h", "Pressure")
+SMALL_INT_COLUMNS = {"Humidity": "uint8", "Cloudiness": "uint8", "Wind_Direction": "int16"}
+
+
+def downcast_weather_frame(df):
+    """Shrink numeric columns and make Zone categorical (in place); returns the frame."""
+    for col in FLOAT32_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("float32")
+    for col, dtype in SMALL_INT_COLUMNS.items():
+        # Integer dtypes cannot hold NaN; leave gappy columns as float32 instead
+        if col in df.columns:
+            df[col] = df[col].astype(dtype if df[col].notna().all() else "float32")
+    if "Zone" in df.columns:
+        df["Zone"] = df["Zone"].astype("category")
+    return df
+
+
+def generate_sample_data(zones, dates):
+    """Synthetic hourly weather for the demo fallback, one (zones x hours) array per column."""
+    shape = (len(zones), len(dates))
+    phase = (dates.hour.to_numpy() - 6) * np.pi / 12
+    base_temp = np.broadcast_to(25 + 5 * np.sin(phase), shape)  # Daily cycle
+    noise = np.random.normal(0, 2, shape)
+    showers = np.where(np.random.random(shape) > 0.8, np.random.normal(0, 1, shape), 0)
+
+    df_sample = pd.DataFrame({
+        "Timestamp": np.tile(dates, len(zones)),
+        "Zone": np.repeat(zones, len(dates)),
+        "T_current": (base_temp + noise).ravel(),
+        "T_min": (base_temp - 2).ravel(),
+        "T_max": (base_temp + 2).ravel(),
+        "Humidity": (60 + 20 * np.cos(phase) + noise).ravel(),
+        "Precipitation_1h": np.maximum(showers, 0).ravel(),
+        "Wind_Speed": np.maximum(5 + np.random.normal(0, 2, shape), 0).ravel(),
+        "Weather_Condition": np.where(np.random.random(shape) > 0.5, "Clouds", "Clear").ravel(),
+    })
+    return df_sample.set_index("Timestamp")
+
+
+def drop_duplicate_readings(df):
+    """Keep the last row for each (Timestamp, Zone) without moving Timestamp out of the index."""
+    keys = pd.MultiIndex.from_arrays([df.index, df["Zone"]])
+    return df[~keys.duplicated(keep="last")]
 
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+@st.cache_resource(ttl=300)  # Cache for 5 minutes, shared (not copied) across reruns and sessions
 def load_data():
-    """Loads, cleans, and preprocesses weather data from both Supabase and local archive."""
+    """Loads, cleans, and preprocesses weather data from both Supabase and local archive.
+
+    The returned frame is shared; callers slice it (see load_zone) and must not mutate it in place.
+    """
     df_supabase = pd.DataFrame()
     df_local = pd.DataFrame()
 
     # 1. Try Loading from Supabase
-    if SUPABASE_URL and SUPABASE_KEY and create_client:
+    supabase = init_supabase()  # process-wide client for anonymous reads (AuthManager keeps its own per session)
+    if supabase is not None:
         try:
-            supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-            response = supabase.table("weather_data").select("*").execute()
+            df_supabase = sync_supabase_rows(supabase)
             
-            if response.data:
-                df_supabase = pd.DataFrame(response.data)
-                
+            if not df_supabase.empty:
                 # --- DATA CLEANING STEP 1: Standardization ---
-                # Rename columns to standard Schema
-                column_map = {
-                    "timestamp": "Timestamp",
-                    "zone": "Zone",
-                    "t_current": "T_current",
-                    "t_min": "T_min",
-                    "t_max": "T_max",
-                    "feels_like": "Feels_Like",
-                    "humidity": "Humidity",
-                    "pressure": "Pressure",
-                    "wind_speed": "Wind_Speed",
-                    "wind_direction": "Wind_Direction",
-                    "cloudiness": "Cloudiness",
-                    "precipitation_1h": "Precipitation_1h",
-                    "precipitation_3h": "Precipitation_3h",
-                    "weather_condition": "Weather_Condition",
-                    "weather_description": "Weather_Description",
-                    "visibility": "Visibility"
-                }
-                df_supabase.rename(columns=column_map, inplace=True)
+                # Rename columns to standard Schema (a new frame; the synced rows are shared)
+                df_supabase = df_supabase.rename(columns=SUPABASE_COLUMN_MAP)
+
+                # --- DATA CLEANING STEP 2: Unified Schema Enforcement ---
+                # JSON rows arrive untyped; the local Parquet archive already carries dtypes
+                numeric_cols = [
+                    "T_current", "T_min", "T_max", "Humidity",
+                    "Precipitation_1h", "Precipitation_3h"
+                ]
+                for col in numeric_cols:
+                    if col in df_supabase.columns:
+                        df_supabase[col] = pd.to_numeric(df_supabase[col], errors="coerce")
                 
                 # Check for critical column "Timestamp"
                 if "Timestamp" in df_supabase.columns:
@@ -451,10 +722,10 @@ def load_data():
         except Exception as e:
             st.warning(f"⚠️ Could not load from Supabase: {e}")
 
-    # 2. Try Loading from Local CSV
-    if os.path.exists(DATA_ARCHIVE_FILE):
+    # 2. Try Loading from Local Archive (Parquet mirror of the CSV)
+    if os.path.exists(DATA_ARCHIVE_FILE) or os.path.exists(DATA_ARCHIVE_PARQUET):
         try:
-            df_local = pd.read_csv(DATA_ARCHIVE_FILE)
+            df_local = read_archive()
             if "Timestamp" in df_local.columns:
                 df_local["Timestamp"] = pd.to_datetime(df_local["Timestamp"])
                 # Ensure timezone-naive for compatibility
@@ -468,98 +739,160 @@ def load_data():
     # 3. Combine Data sources
     if df_supabase.empty and df_local.empty:
         # Fallback: Generate Sample Data for Demo purposes if no source available
-        if not os.path.exists(DATA_ARCHIVE_FILE):
+        if SAMPLE_DATA_ENABLED and not os.path.exists(DATA_ARCHIVE_FILE):
              st.warning(
                 "⚠️ No live or archived data found (Supabase/Local). Generating SAMPLE data for demonstration."
             )
              # Generate 90 days of sample data
              dates = pd.date_range(end=datetime.now(), periods=24*90, freq="h")
-             
-             sample_data = []
-             for zone in AGRICULTURAL_ZONES.keys():
-                 for date in dates:
-                     # Simple synthetic weather
-                     hour = date.hour
-                     base_temp = 25 + (5 * np.sin((hour - 6) * np.pi / 12))  # Daily cycle
-                     noise = np.random.normal(0, 2)
-                     
-                     sample_data.append({
-                         "Timestamp": date,
-                         "Zone": zone,
-                         "T_current": base_temp + noise,
-                         "T_min": base_temp - 2,
-                         "T_max": base_temp + 2,
-                         "Humidity": 60 + (20 * np.cos((hour - 6) * np.pi / 12)) + noise,
-                         "Precipitation_1h": max(0, np.random.normal(0, 1) if np.random.random() > 0.8 else 0),
-                         "Wind_Speed": max(0, 5 + np.random.normal(0, 2)),
-                         "Weather_Condition": "Clouds" if np.random.random() > 0.5 else "Clear"
-                     })
-                     
-             df_sample = pd.DataFrame(sample_data)
-             df_sample.set_index("Timestamp", inplace=True)
-             return df_sample
+             return downcast_weather_frame(generate_sample_data(list(AGRICULTURAL_ZONES), dates))
 
         return pd.DataFrame()
 
-    df_combined = pd.concat([df_supabase, df_local])
-
     # 4. Clean and Deduplicate
     try:
-        # --- DATA CLEANING STEP 2: Unified Schema Enforcement ---
-        # Ensure consistent schema before processing
-        numeric_cols = [
-            "T_current", "T_min", "T_max", "Humidity", 
-            "Precipitation_1h", "Precipitation_3h"
-        ]
-        
-        for col in numeric_cols:
-            if col in df_combined.columns:
-                df_combined[col] = pd.to_numeric(df_combined[col], errors="coerce")
-        
-        # --- DATA CLEANING STEP 3: Handle Missing Values ---
-        # Drop rows with missing critical data (Temperature is essential for analysis)
-        original_len = len(df_combined)
-        df_combined.dropna(subset=["T_min", "T_max"], inplace=True)
-        if len(df_combined) < original_len:
-            # Log or note that rows were dropped
-            pass
-
-        # --- DATA CLEANING STEP 4: Remove Duplicates ---
-        # Reset index to deduplicate by Timestamp + Zone
-        df_combined.reset_index(inplace=True)
-        df_combined.drop_duplicates(subset=["Timestamp", "Zone"], keep="last", inplace=True)
-        df_combined.set_index("Timestamp", inplace=True)
-        
-        df_combined.sort_index(inplace=True)
-        
-        return df_combined
+        sources = []
+        for df_source in (df_supabase, df_local):
+            if df_source.empty:
+                continue
+            # --- DATA CLEANING STEP 3: Handle Missing Values ---
+            # Drop rows with missing critical data (Temperature is essential for analysis)
+            df_source = df_source.dropna(subset=["T_min", "T_max"])
+            # --- DATA CLEANING STEP 4: Remove Duplicates ---
+            # Within each source first, so the concat and sort only see unique readings
+            sources.append(drop_duplicate_readings(df_source))
+
+        # Across sources the local archive (last) wins, as before
+        df_combined = drop_duplicate_readings(pd.concat(sources)).sort_index()
+        
+        return downcast_weather_frame(df_combined)
 
     except Exception as e:
         st.error(f"❌ Error processing combined data: {e}")
         return pd.DataFrame()
 
+# Timeframe selector label -> trailing window in days (None keeps everything)
+TIMEFRAME_DAYS = {
+    "Last 24 Hours": 1,
+    "Last 7 Days": 7,
+    "Last 30 Days": 30,
+    "Last 90 Days": 90,
+    "All Data": None,
+}
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def split_zones(_df_raw, data_key):
+    """Split the archive into time-sorted per-zone frames, once per loaded archive (data_key).
+
+    The frames are shared across reruns and sessions; callers must not mutate them in place.
+    """
+    df_raw = _df_raw
+    if not isinstance(df_raw.index, pd.DatetimeIndex):
+        df_raw = df_raw.set_axis(pd.to_datetime(df_raw.index))
+    return {
+        zone: group.sort_index()
+        for zone, group in df_raw.groupby("Zone", sort=False, observed=True)
+    }
+
+
+def load_zone(zone_name, since_days=None):
+    """Return the time-sorted archive slice for a single zone (a dict lookup once the archive is split).
+
+    With since_days, only rows newer than the zone's latest reading minus that many days are kept.
+    """
+    df_raw = load_data()
+    if df_raw.empty:
+        return df_raw
+    # The archive is append-only, so its fingerprint identifies a loaded version
+    df_zone = split_zones(df_raw, _frame_fingerprint(df_raw)).get(zone_name)
+    if df_zone is None:
+        return df_raw.iloc[:0]
+    if since_days and not df_zone.empty:
+        cutoff = df_zone.index[-1] - pd.Timedelta(days=since_days)
+        df_zone = df_zone.iloc[df_zone.index.searchsorted(cutoff, side="right"):]
+    return df_zone
+
+
+# Hourly column -> (daily column, reduction) used by calculate_daily_aggregates
+DAILY_AGGREGATES = {
+    "T_min": ("T_min", "min"),
+    "T_max": ("T_max", "max"),
+    "T_current": ("T_current", "mean"),
+    "Humidity": ("Humidity", "mean"),
+    "Precipitation_1h": ("Daily_Precipitation", "sum"),
+}
+
+
+def _frame_fingerprint(df):
+    """Cheap cache key for an archive slice: schema, zone, length and time span (the archive is append-only)."""
+    if df.empty:
+        return (tuple(df.columns), 0)
+    zone = df["Zone"].iat[-1] if "Zone" in df.columns else None
+    return (tuple(df.columns), zone, len(df), df.index[0], df.index[-1])
+
+
+# Hash archive slices by fingerprint instead of by content when memoizing the helpers below
+_FRAME_HASH = {pd.DataFrame: _frame_fingerprint}
+
+
+def daily_from_hourly(df_zone):
+    """Resample hourly readings to daily (one grouped NumPy pass per column)."""
+    daily = aggregate_daily(df_zone, DAILY_AGGREGATES)
+    daily["T_avg"] = (daily["T_max"] + daily["T_min"]) / 2
+    return daily.dropna()
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def split_zone_daily(_df_raw, data_key):
+    """Daily aggregates for every zone's full archive, built once per loaded archive (data_key)."""
+    return {zone: daily_from_hourly(frame) for zone, frame in split_zones(_df_raw, data_key).items()}
+
+
+def precomputed_daily_slice(df_zone):
+    """Rows of the zone's precomputed daily table matching df_zone, or None.
+
+    Only used when df_zone is a contiguous time range of its zone archive that starts and ends
+    on day boundaries, so every day it touches is complete and the rows are identical.
+    """
+    if "Zone" not in df_zone.columns:
+        return None
+    df_raw = load_data()
+    if df_raw.empty:
+        return None
+    data_key = _frame_fingerprint(df_raw)
+    zone = df_zone["Zone"].iat[-1]
+    full = split_zones(df_raw, data_key).get(zone)
+    if full is None:
+        return None
+
+    idx = full.index
+    first, last = df_zone.index[0], df_zone.index[-1]
+    lo = idx.searchsorted(first, side="left")
+    hi = idx.searchsorted(last, side="right")
+    if hi - lo != len(df_zone):
+        return None  # a filtered subset, not a time range
+    if lo > 0 and idx[lo - 1].normalize() == first.normalize():
+        return None  # first day only partly covered
+    if hi < len(idx) and idx[hi].normalize() == last.normalize():
+        return None  # last day only partly covered
+    return split_zone_daily(df_raw, data_key)[zone].loc[first.normalize():last.normalize()]
+
+
+@st.cache_data(show_spinner=False, max_entries=64, hash_funcs=_FRAME_HASH)
 def calculate_daily_aggregates(df_zone):
     """Calculate daily aggregates from hourly data."""
     if df_zone.empty:
         return pd.DataFrame()
 
-    # Resample to daily
-    daily = df_zone.resample("D").agg(
-        {
-            "T_min": "min",
-            "T_max": "max",
-            "T_current": "mean",
-            "Humidity": "mean",
-            "Precipitation_1h": "sum",
-        }
-    )
-
-    daily.rename(columns={"Precipitation_1h": "Daily_Precipitation"}, inplace=True)
-    daily["T_avg"] = (daily["T_max"] + daily["T_min"]) / 2
-
-    return daily.dropna()
+    # Whole-day ranges of a zone (full history, past years, current year) come from the table built at load
+    daily = precomputed_daily_slice(df_zone)
+    if daily is not None:
+        return daily
+    return daily_from_hourly(df_zone)
 
 
+@st.cache_data(show_spinner=False, max_entries=64, hash_funcs=_FRAME_HASH)
 def calculate_gdd(df_zone, T_base):
     """Calculates Daily and Cumulative GDD for a given T_base."""
     daily = calculate_daily_aggregates(df_zone)
@@ -567,13 +900,50 @@ def calculate_gdd(df_zone, T_base):
     if daily.empty:
         return pd.DataFrame()
 
-    # Apply GDD formula: max(0, T_avg - T_base)
-    daily["Daily_GDD"] = np.maximum(0, daily["T_avg"] - T_base)
-    daily["Cumulative_GDD"] = daily["Daily_GDD"].cumsum()
+    # Apply GDD formula: max(0, T_avg - T_base), clipped in place on the raw array
+    gdd = daily["T_avg"].to_numpy(dtype=np.float64) - T_base
+    np.maximum(gdd, 0.0, out=gdd)
+    daily["Daily_GDD"] = gdd
+    daily["Cumulative_GDD"] = gdd.cumsum()
+
+    return daily
+
+
+@st.cache_data(show_spinner=False, max_entries=64, hash_funcs=_FRAME_HASH)
+def calculate_annual_cumulative_gdd(df_zone, T_base):
+    """Daily GDD with Year/DayOfYear columns and cumulative GDD that resets every year."""
+    daily = calculate_gdd(df_zone, T_base)
+
+    if daily.empty:
+        return daily
+
+    daily["Year"] = daily.index.year.astype("int16")
+    daily["DayOfYear"] = daily.index.dayofyear.astype("int16")
+    daily["Annual_Cum_GDD"] = daily.groupby("Year", sort=False)["Daily_GDD"].cumsum()
 
     return daily
 
 
+# Rainfall risk labels; codes 0/1/2 are assigned in identify_wet_dry_periods
+RISK_FLAG_DTYPE = pd.CategoricalDtype(["Normal", "Drought Risk", "Waterlogging Risk"])
+RISK_FLAG_COLORS = {
+    "Drought Risk": "#d32f2f",
+    "Waterlogging Risk": "#1976d2",
+    "Normal": "#388e3c",
+}
+
+# 45° compass sectors, indexed by ((degrees + 22.5) // 45) % 8
+CARDINAL_DIRECTIONS = np.array(['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW'])
+
+
+def trailing_sum(values, window):
+    """Trailing window sum over a 1-D array, partial at the start (rolling(window, min_periods=1).sum() on gap-free data)."""
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+    padded = np.concatenate([np.zeros(window - 1), values])
+    return np.lib.stride_tricks.sliding_window_view(padded, window).sum(axis=1)
+
+
+@st.cache_data(show_spinner=False, max_entries=64, hash_funcs=_FRAME_HASH)
 def identify_wet_dry_periods(df_zone, window=7):
     """Calculates rolling rainfall and assigns risk flags."""
     daily = calculate_daily_aggregates(df_zone)
@@ -585,22 +955,17 @@ def identify_wet_dry_periods(df_zone, window=7):
     df_risk.rename(columns={"Daily_Precipitation": "Daily_Rain"}, inplace=True)
 
     # Calculate rolling sum
-    df_risk["Rain_7D_Sum"] = df_risk["Daily_Rain"].rolling(window=window, min_periods=1).sum()
-
-    # Assign risk flags
-    def set_risk_flag(rain_sum):
-        if rain_sum <= DROUGHT_THRESHOLD:
-            return "Drought Risk"
-        elif rain_sum >= WET_THRESHOLD:
-            return "Waterlogging Risk"
-        else:
-            return "Normal"
+    df_risk["Rain_7D_Sum"] = trailing_sum(df_risk["Daily_Rain"].to_numpy(), window)
 
-    df_risk["Risk_Flag"] = df_risk["Rain_7D_Sum"].apply(set_risk_flag)
+    # Assign risk flags (category codes picked branch-free, then wrapped without per-row strings)
+    rain_sum = df_risk["Rain_7D_Sum"].to_numpy()
+    codes = np.select([rain_sum <= DROUGHT_THRESHOLD, rain_sum >= WET_THRESHOLD], [1, 2], default=0)
+    df_risk["Risk_Flag"] = pd.Categorical.from_codes(codes, dtype=RISK_FLAG_DTYPE)
 
     return df_risk
 
 
+@st.cache_data(show_spinner=False, max_entries=64, hash_funcs=_FRAME_HASH)
 def calculate_statistics(df_zone):
     """Calculate comprehensive statistics for the zone."""
     daily = calculate_daily_aggregates(df_zone)
@@ -620,6 +985,7 @@ def calculate_statistics(df_zone):
     return stats
 
 
+@st.cache_data(show_spinner=False, max_entries=64, hash_funcs=_FRAME_HASH)
 def calculate_annual_metrics(df_zone):
     """Calculate annual rainfall and average temperature."""
     daily = calculate_daily_aggregates(df_zone)
@@ -645,6 +1011,7 @@ def calculate_annual_metrics(df_zone):
     return annual
 
 
+@st.cache_data(show_spinner=False, max_entries=64, hash_funcs=_FRAME_HASH)
 def calculate_planting_onset(df_zone):
     """
     Identify potential planting onset date for each year.
@@ -658,37 +1025,19 @@ def calculate_planting_onset(df_zone):
     days_per_year = daily.groupby(daily.index.year).size()
     valid_years = days_per_year[days_per_year >= 180].index
         
-    onsets = []
-    years = daily.index.year.unique()
-    
-    for year in years:
-        # Skip years with insufficient data
-        if year not in valid_years:
-            continue
-            
-        # Filter for planting window (March - June)
-        start_date = pd.Timestamp(f"{year}-03-01")
-        if daily.index.tz is not None:
-            start_date = start_date.tz_localize(daily.index.tz)
-            
-        mask = (daily.index >= start_date) & (daily.index.year == year)
-        season_data = daily[mask].copy()
-        
-        # Rolling 3-day rainfall
-        season_data["Rain_3D"] = season_data["Daily_Precipitation"].rolling(3).sum()
-        
-        # Find first occurrence >= 20mm
-        onset_dates = season_data[season_data["Rain_3D"] >= 20].index
-        
-        if not onset_dates.empty:
-            onset = onset_dates[0]
-            # Calculate Day of Year for plotting
-            day_of_year = onset.dayofyear
-            onsets.append({"Year": year, "Onset_Date": onset, "Day_Of_Year": day_of_year})
-            
-    return pd.DataFrame(onsets)
+    # Planting window: March onwards, rolling within each year only
+    season = daily.loc[daily.index.month >= 3, "Daily_Precipitation"]
+    season = season[season.index.year.isin(valid_years)]
+    rain_3d = season.groupby(season.index.year).rolling(3).sum().droplevel(0)
 
+    # First day per year with >= 20mm over 3 days
+    hits = rain_3d[rain_3d >= 20]
+    onset = hits.groupby(hits.index.year).head(1).index
 
+    return pd.DataFrame({"Year": onset.year, "Onset_Date": onset, "Day_Of_Year": onset.dayofyear})
+
+
+@st.cache_data(show_spinner=False, max_entries=64, hash_funcs=_FRAME_HASH)
 def calculate_drought_frequency_yearly(df_zone):
     """Count number of drought days per year."""
     df_risk = identify_wet_dry_periods(df_zone)
@@ -714,32 +1063,355 @@ def calculate_drought_frequency_yearly(df_zone):
 
 
 
-def render_premium_lock_screen(feature_name):
-    """Displays a lock screen for premium features."""
-    st.markdown(f"""
-        <div style="text-align: center; padding: 3rem; background-color: #1f242d; border-radius: 12px; border: 1px solid #30363d;">
-            <h1>🔒 Premium Feature</h1>
-            <h3>{feature_name} is available to registered members only.</h3>
-            <p style="color: #A0A0A0; margin-bottom: 2rem;">
-                Unlock advanced insights, risk analysis, and crop planning tools by logging in.
-            </p>
-        </div>
-    """, unsafe_allow_html=True)
-    
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col2:
-         auth_tab1, auth_tab2 = st.tabs(["Login", "Sign Up"])
-         with auth_tab1:
-            with st.form(f"lock_login_{feature_name}"):
-                email = st.text_input("Email", key=f"lock_l_email_{feature_name}")
-                password = st.text_input("Password", type="password", key=f"lock_l_pass_{feature_name}")
-                submit = st.form_submit_button("Login to Unlock")
-                
-                if submit:
-                    result = auth.sign_in(email, password)
-                    if result.get("success"):
-                        st.session_state["user"] = result["user"]
-                        st.success("Login successful!")
+# Upper bound on rows sent to the browser for a single dense chart
+MAX_PLOT_POINTS = 5000
+
+
+def lttb_positions(values, n_out):
+    """
+    Row positions picked by Largest-Triangle-Three-Buckets (LTTB) over an evenly spaced series.
+    The first and last rows are always kept; each inner bucket keeps the row forming the largest
+    triangle with the previously kept row and the mean of the next bucket, so the line shape survives.
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)  # n_out - 2 inner buckets
+
+    # Mean point of every inner bucket, computed once (NaNs skipped)
+    present = ~np.isnan(y)
+    counts = np.maximum(np.add.reduceat(present.astype(float), edges[:-1]), 1)
+    mean_x = np.add.reduceat(x, edges[:-1]) / np.diff(np.append(edges[:-1], n))
+    mean_y = np.add.reduceat(np.where(present, y, 0.0), edges[:-1]) / counts
+
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # The last inner bucket looks ahead to the final row
+        cx, cy = (mean_x[i + 1], mean_y[i + 1]) if i + 1 < n_out - 2 else (x[-1], y[-1])
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample_for_plot(df, columns, max_points):
+    """Rows of df that keep the shape of each column (LTTB) within roughly max_points rows."""
+    if len(df) <= max_points:
+        return df
+    n_out = max(3, max_points // len(columns))
+    keep = np.unique(np.concatenate([lttb_positions(df[col].to_numpy(), n_out) for col in columns]))
+    return df.iloc[keep]
+
+
+# Display formats for the raw archive table (add other columns as needed)
+ARCHIVE_DISPLAY_FORMATS = {
+    "T_current": "{:.1f}°C",
+    "Humidity": "{:.0f}%",
+    "Precipitation_1h": "{:.1f} mm",
+    "Wind_Speed": "{:.1f} m/s",
+}
+
+
+@st.cache_data(show_spinner=False, max_entries=16, hash_funcs=_FRAME_HASH)
+def format_archive_tail(df_zone, n=100):
+    """Latest n archive rows with display columns pre-formatted as strings (no pandas Styler)."""
+    out = df_zone.tail(n).reset_index()
+    out["Timestamp"] = out["Timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
+    for col, fmt in ARCHIVE_DISPLAY_FORMATS.items():
+        if col in out.columns:
+            out[col] = out[col].map(fmt.format)
+    return out
+
+
+@st.cache_data(show_spinner=False, max_entries=16, hash_funcs=_FRAME_HASH)
+def convert_df_to_csv(df):
+    """CSV bytes for a time-indexed frame, written by Arrow's C++ writer when available."""
+    # IMPORTANT: Cache the conversion to prevent computation on every rerun
+    if pa is None:
+        return df.to_csv().encode("utf-8")
+    out = df.reset_index()
+    if isinstance(df.index, pd.DatetimeIndex):
+        out[out.columns[0]] = out[out.columns[0]].astype("datetime64[s]")  # no fractional seconds
+    buf = io.BytesIO()
+    pa_csv.write_csv(
+        pa.Table.from_pandas(out, preserve_index=False),
+        buf,
+        pa_csv.WriteOptions(quoting_style="needed"),
+    )
+    return buf.getvalue()
+
+
+# --- Chart builders ---
+# Figures are memoized so reruns from Listen/Send clicks reuse them instead of rebuilding Plotly objects.
+# Archive slices are keyed by fingerprint; small forecast/risk frames are hashed by content.
+
+@st.cache_data(show_spinner=False, max_entries=16, hash_funcs=_FRAME_HASH)
+def build_temperature_figure(df_zone):
+    """Max/current/min temperature lines (WebGL, LTTB-downsampled for long ranges)."""
+    df_plot = downsample_for_plot(df_zone, ["T_max", "T_current", "T_min"], MAX_PLOT_POINTS)
+
+    fig = go.Figure()
+    fig.add_trace(
+        go.Scattergl(
+            x=df_plot.index,
+            y=df_plot["T_max"],
+            name="T_max",
+            line=dict(color="red"),
+            hovertemplate="Max T: %{y:.1f}°C<extra></extra>",
+        )
+    )
+    fig.add_trace(
+        go.Scattergl(
+            x=df_plot.index,
+            y=df_plot["T_current"],
+            name="T_current",
+            line=dict(color="orange"),
+            hovertemplate="Current T: %{y:.1f}°C<extra></extra>",
+        )
+    )
+    fig.add_trace(
+        go.Scattergl(
+            x=df_plot.index,
+            y=df_plot["T_min"],
+            name="T_min",
+            line=dict(color="blue"),
+            hovertemplate="Min T: %{y:.1f}°C<extra></extra>",
+        )
+    )
+
+    fig.update_layout(
+        title="Temperature Variations",
+        xaxis_title="Date",
+        yaxis_title="Temperature (°C)",
+        hovermode="x unified",
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16, hash_funcs=_FRAME_HASH)
+def build_wind_polar_figure(df_wind):
+    """Wind rose: speed vs direction, coloured by speed."""
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(
+        r=df_wind["Wind_Speed"],
+        theta=df_wind["Wind_Direction"],
+        mode='markers',
+        marker=dict(
+            color=df_wind["Wind_Speed"],
+            colorscale='Viridis',
+            size=10,
+            showscale=True,
+            colorbar=dict(title="Speed (m/s)")
+        ),
+        name='Wind'
+    ))
+
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(visible=True, range=[0, df_wind["Wind_Speed"].max() + 2]),
+            angularaxis=dict(direction="clockwise")
+        ),
+        showlegend=False,
+        height=400,
+        margin=dict(l=40, r=40, t=30, b=30)
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16, hash_funcs=_FRAME_HASH)
+def build_pressure_figure(df_recent):
+    """Pressure trend line over the recent window."""
+    fig = px.line(df_recent, x=df_recent.index, y="Pressure", markers=True)
+    fig.update_traces(line_color="#4FC3F7")
+    fig.update_layout(height=350, xaxis_title="Time", yaxis_title="hPa")
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_hourly_forecast_figure(df_hourly):
+    """3-hourly temperature line with precipitation probability bars on a second axis."""
+    fig = go.Figure()
+    fig.add_trace(
+        go.Scatter(
+            x=df_hourly["datetime"],
+            y=df_hourly["temp"],
+            name="Temperature",
+            line=dict(color="#FF6B6B", width=3),
+            mode="lines+markers",
+            hovertemplate="Temp: %{y:.1f}°C<extra>%{x|%a %I:%M%p}</extra>",
+        )
+    )
+
+    # Add precipitation probability as bars
+    fig.add_trace(
+        go.Bar(
+            x=df_hourly["datetime"],
+            y=df_hourly["pop"],
+            name="Precip. Probability (%)",
+            yaxis="y2",
+            marker=dict(color="#4ECDC4", opacity=0.3),
+            hovertemplate="PoP: %{y:.0f}%<extra></extra>",
+        )
+    )
+
+    fig.update_layout(
+        title="Temperature & Precipitation Probability",
+        xaxis_title="Time",
+        yaxis_title="Temperature (°C)",
+        yaxis2=dict(
+            title="Precipitation Probability (%)",
+            overlaying="y",
+            side="right",
+            range=[0, 100],
+            showgrid=False,
+        ),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        hovermode="x unified",
+        height=400,
+        margin=dict(l=50, r=50, t=80, b=50),
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_daily_range_figure(df_daily):
+    """Daily max/min temperature band."""
+    fig = go.Figure()
+
+    fig.add_trace(
+        go.Scatter(
+            x=df_daily["date"],
+            y=df_daily["temp_max"],
+            name="Max Temp",
+            line=dict(color="#FF6B6B"),
+            mode="lines+markers",
+        )
+    )
+
+    fig.add_trace(
+        go.Scatter(
+            x=df_daily["date"],
+            y=df_daily["temp_min"],
+            name="Min Temp",
+            line=dict(color="#4ECDC4"),
+            mode="lines+markers",
+            fill="tonexty",
+            fillcolor="rgba(78, 205, 196, 0.2)",
+        )
+    )
+
+    fig.update_layout(
+        xaxis_title="Date",
+        yaxis_title="Temperature (°C)",
+        hovermode="x unified",
+        height=300,
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_risk_rain_figure(df_risk_recent):
+    """Daily rainfall bars, one trace per risk class so the legend is kept."""
+    risk_dates = df_risk_recent.index
+    risk_codes = df_risk_recent["Risk_Flag"].cat.codes.to_numpy()
+    daily_rain = df_risk_recent["Daily_Rain"].to_numpy()
+
+    fig = go.Figure()
+    for code, flag in enumerate(RISK_FLAG_DTYPE.categories):
+        sel = risk_codes == code
+        if sel.any():
+            fig.add_trace(go.Bar(
+                x=risk_dates[sel],
+                y=daily_rain[sel],
+                name=flag,
+                marker_color=RISK_FLAG_COLORS[flag],
+            ))
+
+    fig.update_layout(
+        title="Daily Rainfall with Risk Classification (Last 90 Days)",
+        xaxis_title="Date",
+        yaxis_title="Rainfall (mm)",
+        legend_title_text="Risk_Flag",
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_risk_gauge_figure(rain_7d_sum):
+    """Gauge of 7-day cumulative rainfall against the drought/waterlogging bands."""
+    # Determine gauge color based on risk
+    gauge_color = "#4caf50" # Green
+    if rain_7d_sum < DROUGHT_THRESHOLD:
+        gauge_color = "#ef5350" # Red
+    elif rain_7d_sum > WET_THRESHOLD:
+        gauge_color = "#42a5f5" # Blue
+
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number+delta",
+        value = rain_7d_sum,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "7-Day Cumulative Rainfall (mm)", 'font': {'size': 20}},
+        delta = {'reference': DROUGHT_THRESHOLD, 'increasing': {'color': "blue"}, 'decreasing': {'color': "red"}},
+        gauge = {
+            'axis': {'range': [None, 200], 'tickwidth': 1, 'tickcolor': "white"},
+            'bar': {'color': gauge_color},
+            'bgcolor': "rgba(0,0,0,0)",
+            'borderwidth': 2,
+            'bordercolor': "#333",
+            'steps': [
+                {'range': [0, DROUGHT_THRESHOLD], 'color': 'rgba(239, 83, 80, 0.3)'},
+                {'range': [DROUGHT_THRESHOLD, WET_THRESHOLD], 'color': 'rgba(102, 187, 106, 0.3)'},
+                {'range': [WET_THRESHOLD, 200], 'color': 'rgba(66, 165, 245, 0.3)'}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': DROUGHT_THRESHOLD
+            }
+        }
+    ))
+
+    fig.update_layout(height=300)
+    return fig
+
+
+def render_premium_lock_screen(feature_name):
+    """Displays a lock screen for premium features."""
+    st.markdown(f"""
+        <div style="text-align: center; padding: 3rem; background-color: #1f242d; border-radius: 12px; border: 1px solid #30363d;">
+            <h1>🔒 Premium Feature</h1>
+            <h3>{feature_name} is available to registered members only.</h3>
+            <p style="color: #A0A0A0; margin-bottom: 2rem;">
+                Unlock advanced insights, risk analysis, and crop planning tools by logging in.
+            </p>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+         auth_tab1, auth_tab2 = st.tabs(["Login", "Sign Up"])
+         with auth_tab1:
+            with st.form(f"lock_login_{feature_name}"):
+                email = st.text_input("Email", key=f"lock_l_email_{feature_name}")
+                password = st.text_input("Password", type="password", key=f"lock_l_pass_{feature_name}")
+                submit = st.form_submit_button("Login to Unlock")
+                
+                if submit:
+                    result = auth.sign_in(email, password)
+                    if result.get("success"):
+                        st.session_state["user"] = result["user"]
+                        st.success("Login successful!")
                         st.rerun()
                     else:
                         st.error(result.get("error"))
@@ -757,6 +1429,7 @@ def render_premium_lock_screen(feature_name):
                     else:
                         st.error(result.get("error"))
 
+@st.cache_data(show_spinner=False, max_entries=64, hash_funcs=_FRAME_HASH)
 def calculate_historical_seasonality(df_zone):
     """
     Calculate historical daily averages (Baseline) excluding the current year.
@@ -789,8 +1462,103 @@ def calculate_historical_seasonality(df_zone):
     return seasonality
 
 
+YTD_AGGREGATES = {"Daily_Precipitation": "sum", "T_avg": "mean"}
+
+
+@st.cache_data(show_spinner=False, max_entries=64, hash_funcs=_FRAME_HASH)
+def calculate_ytd_comparison(df_history, df_current, today_doy):
+    """
+    Year-to-date rainfall total and mean temperature for the baseline and the current year.
+    Takes the hourly frames (so the cache key carries the zone); returns (baseline, current) Series.
+    """
+    seasonality = calculate_historical_seasonality(df_history)
+    current_daily = calculate_daily_aggregates(df_current)
+    cols = list(YTD_AGGREGATES)
+    base = seasonality.loc[seasonality.index <= today_doy, cols].agg(YTD_AGGREGATES)
+    cur = current_daily[cols].agg(YTD_AGGREGATES)
+    return base, cur
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_crop_recommendations_cached(_df_history, current_month, zone_name, data_key):
+    """
+    Cached crop recommendations for a zone and month.
+    The history frame is not hashed; data_key (last timestamp, row count) invalidates the cache on new data.
+    """
+    return get_crop_recommendations(_df_history, current_month, zone_name)
+
+
+def _above(threshold):
+    """Smallest float greater than threshold, so a strict '>' bound works with searchsorted(side='right')."""
+    return np.nextafter(threshold, np.inf)
+
+
+# Overview metric advice: sorted bin edges plus one (severity, message) per bin, lowest first
+TEMP_BINS = np.array([15, 20, _above(30), _above(35)])
+TEMP_MSGS = [
+    ("warning", "❄️ **Cold weather.** Risk of frost damage. Protect sensitive crops."),
+    ("info", "🌤️ **Mild weather.** Suitable for cool-season crops."),
+    ("success", "✅ **Ideal temperature** for most crops. Good growing conditions."),
+    ("info", "☀️ **Hot weather.** Good for heat-loving crops. Ensure adequate irrigation."),
+    ("warning", "⚠️ **Very hot!** Heat stress risk for crops. Increase watering and provide shade if possible."),
+]
+HUMIDITY_BINS = np.array([40, 60, _above(80)])
+HUMIDITY_MSGS = [
+    ("warning", "🏜️ **Low humidity.** Plants may need more frequent watering."),
+    ("info", "🌤️ **Moderate humidity.** Monitor soil moisture regularly."),
+    ("success", "✅ **Good humidity** for most crops. Comfortable growing conditions."),
+    ("warning", "⚠️ **High humidity.** Increased risk of fungal diseases. Improve air circulation."),
+]
+# No rain in the last hour (bin 0) depends on the last 24h, so it has no fixed message
+RAIN_BINS = np.array([_above(0), _above(2), _above(10)])
+RAIN_MSGS = [
+    None,
+    ("success", "💧 **Light rain.** Beneficial for crops. Reduces irrigation needs."),
+    ("info", "🌦️ **Moderate rain.** Good for crops. Avoid spraying pesticides."),
+    ("warning", "🌧️ **Heavy rain!** Delay field work. Check for waterlogging."),
+]
+WIND_BINS = np.array([_above(2), _above(5), _above(10)])
+WIND_MSGS = [
+    ("info", "😌 **Calm conditions.** Good for spraying and field work."),
+    ("success", "🍃 **Gentle breeze.** Good air circulation for crops."),
+    ("warning", "💨 **Windy conditions.** Not ideal for spraying pesticides."),
+    ("error", "🌪️ **Very windy!** Risk of crop damage. Avoid spraying. Secure structures."),
+]
+
+
+def metric_advice(bins, messages, value):
+    """(severity, message) for value; severity names the st.* call (info/success/warning/error).
+
+    A missing reading gets the lowest bin's entry, as the old if/elif ladders fell through to it
+    (searchsorted would place NaN past the last edge).
+    """
+    if pd.isna(value):
+        return messages[0]
+    return messages[np.searchsorted(bins, value, side="right")]
+
+
+def kept_value(key, default):
+    """Last value saved for widget key by keep_value (default if none yet).
+
+    Tab bodies only run while their tab is open, and Streamlit drops the state of widgets a run
+    skips, so widgets inside tabs seed value=/index= from this copy instead.
+    """
+    return st.session_state.get(f"kept_{key}", default)
+
+
+def keep_value(key, value):
+    """Save a widget's current value in a plain (non-widget) session_state entry."""
+    st.session_state[f"kept_{key}"] = value
+    return value
+
+
 # --- Main Dashboard ---
 
+# Wall-clock anchors, taken once per script run so every tab agrees on "today"
+NOW = datetime.now()
+TODAY_DOY = NOW.timetuple().tm_yday
+CURRENT_YEAR = NOW.year
+
 # Initialize Auth
 auth = AuthManager()
 
@@ -844,32 +1612,23 @@ with st.sidebar:
             
             # SMS
             st.caption("SMS Setup")
-            sms_service = SMSService()
             phone_number = st.text_input("Phone Number", key="user_phone", placeholder="234...")
             
             # Email
             st.caption("Email Setup")
-            email_service = EmailService()
             email_address = st.text_input("Email Address", key="user_email_alert", placeholder="you@example.com")
 
             if st.button("Send Test Alerts"):
                 # Test SMS
                 if phone_number:
-                    with st.spinner("Sending Test SMS..."):
-                        res = sms_service.send_alert(phone_number, "Test SMS from Abia ADSS.")
-                        if res.get("success"):
-                            st.success("✅ SMS Sent!")
-                        else:
-                            st.error(f"❌ SMS Failed: {res.get('error')}")
+                    queue_notification("Test SMS", get_sms_service().send_alert, phone_number, "Test SMS from Abia ADSS.")
                 
                 # Test Email
                 if email_address:
-                    with st.spinner("Sending Test Email..."):
-                        res = email_service.send_alert(email_address, "Test Email from Abia ADSS", "This is a test email alert.")
-                        if res.get("success"):
-                             st.success("✅ Email Sent!")
-                        else:
-                            st.error(f"❌ Email Failed: {res.get('error')}")
+                    queue_notification(
+                        "Test Email", get_email_service().send_alert,
+                        email_address, "Test Email from Abia ADSS", "This is a test email alert.",
+                    )
 
             if st.button("Logout", key="logout_btn"):
                 auth.sign_out()
@@ -886,26 +1645,6 @@ if df_raw.empty:
 
 # --- HEADER ---
 st.markdown("""
-    <style>
-    .main-title {
-        font-size: 5rem;
-        font-weight: 900;
-        text-align: center;
-        margin-bottom: 0.5rem;
-        background: linear-gradient(135deg, #4CAF50 0%, #81C784 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-    }
-    .subtitle {
-        font-size: 2rem;
-        text-align: center;
-        color: #A0A0A0;
-        margin-bottom: 2rem;
-        font-weight: 700;
-        letter-spacing: 0.5px;
-    }
-    </style>
     <h1 class="main-title">🌾 Smart-Agro Weather System</h1>
     <p class="subtitle">Real-time weather analytics and crop management advisory for agricultural zones</p>
 """, unsafe_allow_html=True)
@@ -937,7 +1676,8 @@ with col_nav1:
     # Language selector removed from here (moved to sidebar)
 
 with col_nav2:
-    unique_zones = sorted(df_raw["Zone"].unique())
+    # Zone is categorical (see downcast_weather_frame): the categories are the distinct zones
+    unique_zones = sorted(df_raw["Zone"].cat.categories)
     # Use session state key to preserve selection
     selected_zone = st.selectbox(
         "Select Agricultural Zone:", 
@@ -954,29 +1694,19 @@ with col_nav3:
     )
 st.markdown("</div>", unsafe_allow_html=True)
 
-# Filter data based on selection
-# Filter data based on selection
-df_zone = df_raw[df_raw["Zone"] == selected_zone].copy()
-
-# Ensure Index is DatetimeIndex for .last() method
-if not isinstance(df_zone.index, pd.DatetimeIndex):
-    df_zone.index = pd.to_datetime(df_zone.index)
-
-df_zone.sort_index(inplace=True)
+# Overlap the live/forecast API round trips with the local data preparation below
+prefetch_zone_weather(selected_zone)
 
-if date_range == "Last 24 Hours":
-    df_zone = df_zone.last("24h")
-elif date_range == "Last 7 Days":
-    df_zone = df_zone.last("7D")
-elif date_range == "Last 30 Days":
-    df_zone = df_zone.last("30D")
-elif date_range == "Last 90 Days":
-    df_zone = df_zone.last("90D")
+# Filter data based on selection
+df_zone = load_zone(selected_zone, TIMEFRAME_DAYS[date_range])
+# Full history for the zone (ignores the timeframe filter); shared by the history-based tabs
+df_zone_full = load_zone(selected_zone)
 
 # Removed sidebar info as it's cleaner without it, or move to bottom
 # st.sidebar.info(...) -> Removed
 
 # Tabs
+# Track the selected tab (rerun on switch); each tab body below only runs while its tab is open
 tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs(
     [
         "📊 Overview & Trends",
@@ -986,7 +1716,9 @@ tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs(
         "🗓️ Crop Planning",
         "📁 Data Archive",
         "🚀 Project Impact",
-    ]
+    ],
+    key="active_tab",
+    on_change="rerun",
 )
 
 # --- TAB 7: Project Impact & Market Fit ---
@@ -1036,228 +1768,199 @@ with tab7:
 
 # --- TAB 1: Overview & Trends (Logic is complete) ---
 with tab1:
-    st.header(f"📊 Weather Overview for {selected_zone}")
+    if tab1.open:
+        st.header(f"📊 Weather Overview for {selected_zone}")
     
-    # Farmer-friendly introduction
-    st.info("👨‍🌾 **What This Shows:** Current weather conditions and recent trends in your area. Use this to plan daily farm activities like irrigation, spraying, or harvesting.")
-
-    if not df_zone.empty:
-        latest = df_zone.iloc[-1]
-        
-        # Construct summary text
-        temp_status = "hot" if latest['T_current'] > 30 else "mild"
-        rain_status = "raining" if latest.get("Precipitation_1h", 0) > 0 else "dry"
-        
-        # Helper to get full summary
-        def get_summary():
-            return generate_overview_summary(selected_zone, latest, calculate_statistics(df_zone))
-
-        col_audio, col_sms, col_email = st.columns([1, 1, 1])
-        with col_audio:
-            if st.button("🔊 Listen"):
-                summary_text = get_summary()
-                audio = text_to_audio(summary_text)
-                autoplay_audio(audio)
-        
-        with col_sms:
-            # Allow direct input for better UX
-            default_phone = st.session_state.get("user_phone", "")
-            dest_phone = st.text_input("Enter Phone", value=default_phone, placeholder="234...", key="sms_dest_input", label_visibility="collapsed")
-            
-            if st.button("📱 Send SMS"):
-                if not dest_phone:
-                     st.error("Enter phone number.")
-                else:
-                    with st.spinner("Sending SMS..."):
-                        sms_msg = get_summary()
-                        sms_svc = SMSService()
-                        res = sms_svc.send_alert(dest_phone, sms_msg)
-                        if res.get("success"):
-                            st.success("✅ SMS Sent!")
-                        else:
-                            st.error(f"❌ SMS Failed: {res.get('error')}")
-                            # Add debug expander
-                            with st.expander("Debug details"):
-                                st.write(res)
-
-        with col_email:
-             if st.button("📧 Email Summary"):
-                email_addr = st.session_state.get("user_email_alert")
-                if not email_addr:
-                     st.error("Set email in Sidebar.")
-                else:
-                    with st.spinner("Sending Email..."):
-                        email_msg = get_summary()
-                        email_svc = EmailService()
-                        res = email_svc.send_alert(
-                            email_addr, 
-                            f"Abia ADSS Weather Update: {selected_zone}", 
-                            email_msg
-                        )
-                        if res.get("success"):
-                            st.success("✅ Email Sent!")
-                        else:
-                            st.error(f"❌ Email Failed: {res.get('error')}")
+        # Farmer-friendly introduction
+        st.info("👨‍🌾 **What This Shows:** Current weather conditions and recent trends in your area. Use this to plan daily farm activities like irrigation, spraying, or harvesting.")
+
+        # Zone statistics, shared by the spoken/SMS/email summary and the Statistical Summary section
+        stats = calculate_statistics(df_zone)
 
-    if df_zone.empty:
-        st.warning("No historical data available for the selected zone and timeframe. Fetching live data...")
-        # Fallback to live data only if df is empty logic can be handled below
-    
-    # --- LIVE DATA FETCH ---
-    live_weather = fetch_current_weather(selected_zone)
-    
-    use_live = False
-    if live_weather:
-        use_live = True
-        # st.toast(f"🟢 Utilizing Real-Time Live Data for {selected_zone}", icon="📡") # Optional UX touch
-    else:
-        # If live fetch fails, fallback to latest CSV/DB data
         if not df_zone.empty:
             latest = df_zone.iloc[-1]
-        else:
-            st.error("Could not fetch live data and no historical data found.")
-            st.stop()
-
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        if use_live:
-            temp_current = live_weather['temp']
-            # Calculate delta against historical average if available
-            avg_temp = df_zone['T_current'].mean() if not df_zone.empty else temp_current
-            delta_val = f"{temp_current - avg_temp:.1f}°C vs hist avg"
-            metric_label = "🌡️ Current Temp (Live)"
-        else:
-            # Fallback
-            latest = df_zone.iloc[-1]
-            temp_current = latest['T_current']
-            delta_val = f"{temp_current - df_zone['T_current'].mean():.1f}°C vs avg"
-            metric_label = "🌡️ Current Temperature"
-
-        st.metric(
-            metric_label,
-            f"{temp_current:.1f} °C",
-            delta=delta_val,
-        )
-        # Dynamic explanation based on temperature value
-        if temp_current > 35:
-            st.warning("⚠️ **Very hot!** Heat stress risk for crops. Increase watering and provide shade if possible.")
-        elif temp_current > 30:
-            st.info("☀️ **Hot weather.** Good for heat-loving crops. Ensure adequate irrigation.")
-        elif temp_current >= 20:
-            st.success("✅ **Ideal temperature** for most crops. Good growing conditions.")
-        elif temp_current >= 15:
-            st.info("🌤️ **Mild weather.** Suitable for cool-season crops.")
-        else:
-            st.warning("❄️ **Cold weather.** Risk of frost damage. Protect sensitive crops.")
+        
+            # Construct summary text
+            temp_status = "hot" if latest['T_current'] > 30 else "mild"
+            rain_status = "raining" if latest.get("Precipitation_1h", 0) > 0 else "dry"
+        
+            # Full summary, built once per run
+            # Synthesize the Listen clip while the rest of the tab renders
+            summary_text = generate_overview_summary(selected_zone, latest, stats)
+            prerender_audio(summary_text)
+
+            col_audio, col_sms, col_email = st.columns([1, 1, 1])
+            with col_audio:
+                if st.button("🔊 Listen"):
+                    audio = text_to_audio(summary_text)
+                    autoplay_audio(audio)
+        
+            with col_sms:
+                # Allow direct input for better UX
+                default_phone = st.session_state.get("user_phone", "")
+                dest_phone = keep_value("sms_dest_input", st.text_input(
+                    "Enter Phone", value=kept_value("sms_dest_input", default_phone), placeholder="234...",
+                    key="sms_dest_input", label_visibility="collapsed",
+                ))
+            
+                if st.button("📱 Send SMS"):
+                    if not dest_phone:
+                         st.error("Enter phone number.")
+                    else:
+                        queue_notification("SMS", get_sms_service().send_alert, dest_phone, summary_text)
 
-    with col2:
-        if use_live:
-            humidity = live_weather['humidity']
-            st.metric("💧 Humidity (Live)", f"{humidity:.0f}%")
-        else:
-            humidity = latest['Humidity']
-            st.metric("💧 Humidity", f"{humidity:.0f}%")
-        # Dynamic explanation based on humidity value
-        if humidity > 80:
-            st.warning("⚠️ **High humidity.** Increased risk of fungal diseases. Improve air circulation.")
-        elif humidity >= 60:
-            st.success("✅ **Good humidity** for most crops. Comfortable growing conditions.")
-        elif humidity >= 40:
-            st.info("🌤️ **Moderate humidity.** Monitor soil moisture regularly.")
-        else:
-            st.warning("🏜️ **Low humidity.** Plants may need more frequent watering.")
+            with col_email:
+                 if st.button("📧 Email Summary"):
+                    email_addr = st.session_state.get("user_email_alert")
+                    if not email_addr:
+                         st.error("Set email in Sidebar.")
+                    else:
+                        queue_notification(
+                            "Email", get_email_service().send_alert,
+                            email_addr, f"Abia ADSS Weather Update: {selected_zone}", summary_text,
+                        )
 
-    with col3:
-        if use_live:
-            rain_value = live_weather['rain_1h']
-            st.metric("🌧️ Rain (Last 1h)", f"{rain_value:.1f} mm")
-        else:
-            rain_value = latest.get("Precipitation_1h", 0.0)
-            st.metric("🌧️ Last Hour Rain", f"{rain_value:.1f} mm")
-        # Dynamic explanation based on rainfall
-        if rain_value > 10:
-            st.warning("🌧️ **Heavy rain!** Delay field work. Check for waterlogging.")
-        elif rain_value > 2:
-            st.info("🌦️ **Moderate rain.** Good for crops. Avoid spraying pesticides.")
-        elif rain_value > 0:
-            st.success("💧 **Light rain.** Beneficial for crops. Reduces irrigation needs.")
+        if df_zone.empty:
+            st.warning("No historical data available for the selected zone and timeframe. Fetching live data...")
+            # Fallback to live data only if df is empty logic can be handled below
+    
+        # --- LIVE DATA FETCH ---
+        live_weather = fetch_current_weather(selected_zone)
+    
+        use_live = False
+        if live_weather:
+            use_live = True
+            # st.toast(f"🟢 Utilizing Real-Time Live Data for {selected_zone}", icon="📡") # Optional UX touch
         else:
-            # Check recent rainfall pattern
-            recent_rain = df_zone.tail(24)["Precipitation_1h"].sum()
-            if recent_rain < 1:
-                st.info("☀️ **No recent rain.** Monitor soil moisture and irrigate if needed.")
+            # If live fetch fails, fallback to latest CSV/DB data
+            if not df_zone.empty:
+                latest = df_zone.iloc[-1]
             else:
-                st.success("✅ **Dry now** but recent rain was good. Soil should have moisture.")
-
-    with col4:
-        if use_live:
-            wind_speed = live_weather['wind_speed']
-            st.metric("💨 Wind Speed (Live)", f"{wind_speed:.1f} m/s")
-        elif "Wind_Speed" in latest:
-            wind_speed = latest['Wind_Speed']
-            st.metric("💨 Wind Speed", f"{wind_speed:.1f} m/s")
-        else:
-            wind_speed = 0 # Default if missing in historical
-        
-        # Dynamic explanation based on wind speed
-        if wind_speed > 10:
-            st.error("🌪️ **Very windy!** Risk of crop damage. Avoid spraying. Secure structures.")
-        elif wind_speed > 5:
-            st.warning("💨 **Windy conditions.** Not ideal for spraying pesticides.")
-        elif wind_speed > 2:
-            st.success("🍃 **Gentle breeze.** Good air circulation for crops.")
-        else:
-            st.info("😌 **Calm conditions.** Good for spraying and field work.")
+                st.error("Could not fetch live data and no historical data found.")
+                st.stop()
 
-    st.markdown("---")
+        # Reused by the metric deltas and the last-24h charts below
+        avg_current = df_zone["T_current"].mean() if not df_zone.empty else None
+        df_last24 = df_zone.tail(24)
 
-    # Statistics
-    stats = calculate_statistics(df_zone)
-
-    if stats:
-        st.subheader("📈 Statistical Summary")
-        if st.button("🔊 Listen to Stats"):
-             stats_text = f"Statistical Summary. Average temperature is {stats['avg_temp']:.1f} degrees. Maximum reached {stats['max_temp']:.1f} degrees. Total rain in last 30 days is {stats['total_rain_30d']:.1f} millimeters."
-             autoplay_audio(text_to_audio(stats_text))
-
-        col1, col2, col3 = st.columns(3)
+        col1, col2, col3, col4 = st.columns(4)
 
         with col1:
-            st.markdown("**Temperature Statistics**")
-            st.write(f"Average: {stats['avg_temp']:.1f}°C")
-            st.write(f"Maximum: {stats['max_temp']:.1f}°C")
-            st.write(f"Minimum: {stats['min_temp']:.1f}°C")
+            if use_live:
+                temp_current = live_weather['temp']
+                # Calculate delta against historical average if available
+                avg_temp = avg_current if avg_current is not None else temp_current
+                delta_val = f"{temp_current - avg_temp:.1f}°C vs hist avg"
+                metric_label = "🌡️ Current Temp (Live)"
+            else:
+                # Fallback
+                latest = df_zone.iloc[-1]
+                temp_current = latest['T_current']
+                delta_val = f"{temp_current - avg_current:.1f}°C vs avg"
+                metric_label = "🌡️ Current Temperature"
+
+            st.metric(
+                metric_label,
+                f"{temp_current:.1f} °C",
+                delta=delta_val,
+            )
+            # Dynamic explanation based on temperature value
+            severity, message = metric_advice(TEMP_BINS, TEMP_MSGS, temp_current)
+            getattr(st, severity)(message)
 
         with col2:
-            st.markdown("**Rainfall Summary**")
-            rain_30d = stats['total_rain_30d']
-            st.write(f"Last 30 days: {rain_30d:.1f} mm")
-            st.write(f"Last 90 days: {stats['total_rain_90d']:.1f} mm")
-            st.write(f"Daily average: {stats['avg_daily_rain']:.1f} mm")
-            
-            # Dynamic explanation based on 30-day rainfall
-            if rain_30d < 50:
-                st.warning("⚠️ **Low rainfall** in past month. Increase irrigation frequency.")
-            elif rain_30d < 100:
-                st.info("💧 **Below average rain.** Monitor soil moisture and irrigate as needed.")
-            elif rain_30d <= 200:
-                st.success("✅ **Good rainfall** for most crops. Soil moisture should be adequate.")
+            if use_live:
+                humidity = live_weather['humidity']
+                st.metric("💧 Humidity (Live)", f"{humidity:.0f}%")
             else:
-                st.warning("🌧️ **Heavy rainfall.** Watch for waterlogging and drainage issues.")
+                humidity = latest['Humidity']
+                st.metric("💧 Humidity", f"{humidity:.0f}%")
+            # Dynamic explanation based on humidity value
+            severity, message = metric_advice(HUMIDITY_BINS, HUMIDITY_MSGS, humidity)
+            getattr(st, severity)(message)
 
         with col3:
-            st.markdown("**Other Metrics**")
-            st.write(f"Avg Humidity: {stats['avg_humidity']:.1f}%")
-
-    # Temperature trend
-    st.subheader("🌡️ Temperature Trends")
-    if st.button("🔊 Listen to Trends"):
-         trend_text = generate_temp_trend_summary(df_zone)
-         autoplay_audio(text_to_audio(trend_text))
+            if use_live:
+                rain_value = live_weather['rain_1h']
+                st.metric("🌧️ Rain (Last 1h)", f"{rain_value:.1f} mm")
+            else:
+                rain_value = latest.get("Precipitation_1h", 0.0)
+                st.metric("🌧️ Last Hour Rain", f"{rain_value:.1f} mm")
+            # Dynamic explanation based on rainfall
+            rain_advice = metric_advice(RAIN_BINS, RAIN_MSGS, rain_value)
+            if rain_advice is not None:
+                severity, message = rain_advice
+                getattr(st, severity)(message)
+            else:
+                # Check recent rainfall pattern
+                recent_rain = df_last24["Precipitation_1h"].sum()
+                if recent_rain < 1:
+                    st.info("☀️ **No recent rain.** Monitor soil moisture and irrigate if needed.")
+                else:
+                    st.success("✅ **Dry now** but recent rain was good. Soil should have moisture.")
+
+        with col4:
+            if use_live:
+                wind_speed = live_weather['wind_speed']
+                st.metric("💨 Wind Speed (Live)", f"{wind_speed:.1f} m/s")
+            elif "Wind_Speed" in latest:
+                wind_speed = latest['Wind_Speed']
+                st.metric("💨 Wind Speed", f"{wind_speed:.1f} m/s")
+            else:
+                wind_speed = 0 # Default if missing in historical
+        
+            # Dynamic explanation based on wind speed
+            severity, message = metric_advice(WIND_BINS, WIND_MSGS, wind_speed)
+            getattr(st, severity)(message)
+
+        st.markdown("---")
+
+        # Statistics
+        if stats:
+            st.subheader("📈 Statistical Summary")
+            stats_text = f"Statistical Summary. Average temperature is {stats['avg_temp']:.1f} degrees. Maximum reached {stats['max_temp']:.1f} degrees. Total rain in last 30 days is {stats['total_rain_30d']:.1f} millimeters."
+            prerender_audio(stats_text)
+            if st.button("🔊 Listen to Stats"):
+                 autoplay_audio(text_to_audio(stats_text))
+
+            col1, col2, col3 = st.columns(3)
+
+            with col1:
+                st.markdown("**Temperature Statistics**")
+                st.write(f"Average: {stats['avg_temp']:.1f}°C")
+                st.write(f"Maximum: {stats['max_temp']:.1f}°C")
+                st.write(f"Minimum: {stats['min_temp']:.1f}°C")
+
+            with col2:
+                st.markdown("**Rainfall Summary**")
+                rain_30d = stats['total_rain_30d']
+                st.write(f"Last 30 days: {rain_30d:.1f} mm")
+                st.write(f"Last 90 days: {stats['total_rain_90d']:.1f} mm")
+                st.write(f"Daily average: {stats['avg_daily_rain']:.1f} mm")
+            
+                # Dynamic explanation based on 30-day rainfall
+                if rain_30d < 50:
+                    st.warning("⚠️ **Low rainfall** in past month. Increase irrigation frequency.")
+                elif rain_30d < 100:
+                    st.info("💧 **Below average rain.** Monitor soil moisture and irrigate as needed.")
+                elif rain_30d <= 200:
+                    st.success("✅ **Good rainfall** for most crops. Soil moisture should be adequate.")
+                else:
+                    st.warning("🌧️ **Heavy rainfall.** Watch for waterlogging and drainage issues.")
+
+            with col3:
+                st.markdown("**Other Metrics**")
+                st.write(f"Avg Humidity: {stats['avg_humidity']:.1f}%")
+
+        # Temperature trend
+        st.subheader("🌡️ Temperature Trends")
+        trend_text = generate_temp_trend_summary(df_zone)
+        prerender_audio(trend_text)
+        if st.button("🔊 Listen to Trends"):
+             autoplay_audio(text_to_audio(trend_text))
     
-    with st.expander("ℹ️ How to Read This Chart"):
-        st.write("""
+        with st.expander("ℹ️ How to Read This Chart"):
+            st.write("""
         **What it shows:** Daily high (red), current (orange), and low (blue) temperatures over time.
         
         **How to use it:**
@@ -1268,110 +1971,50 @@ with tab1:
         **For farming:** Use this to spot temperature patterns and plan activities like planting or protecting crops from extreme heat or cold.
         """)
 
-    fig_temp = go.Figure()
-    fig_temp.add_trace(
-        go.Scatter(
-            x=df_zone.index,
-            y=df_zone["T_max"],
-            name="T_max",
-            line=dict(color="red"),
-            hovertemplate="Max T: %{y:.1f}°C<extra></extra>",
-        )
-    )
-    fig_temp.add_trace(
-        go.Scatter(
-            x=df_zone.index,
-            y=df_zone["T_current"],
-            name="T_current",
-            line=dict(color="orange"),
-            hovertemplate="Current T: %{y:.1f}°C<extra></extra>",
-        )
-    )
-    fig_temp.add_trace(
-        go.Scatter(
-            x=df_zone.index,
-            y=df_zone["T_min"],
-            name="T_min",
-            line=dict(color="blue"),
-            hovertemplate="Min T: %{y:.1f}°C<extra></extra>",
-        )
-    )
-
-    fig_temp.update_layout(
-        title="Temperature Variations",
-        xaxis_title="Date",
-        yaxis_title="Temperature (°C)",
-        hovermode="x unified",
-    )
-
-    st.plotly_chart(fig_temp, use_container_width=True)
-
-    # Wind & Pressure Analysis
-    st.subheader("🌬️ Wind & Atmosphere Analysis")
-    if st.button("🔊 Listen to Wind Analysis"):
-         wind_text = generate_wind_summary(df_zone)
-         autoplay_audio(text_to_audio(wind_text))
-    st.caption("💡 Wind direction and pressure help predict upcoming weather changes. Falling pressure often means rain is coming.")
-    col_w1, col_w2 = st.columns(2)
+        fig_temp = build_temperature_figure(df_zone)
+        st.plotly_chart(fig_temp, use_container_width=True)
+
+        # Wind & Pressure Analysis
+        st.subheader("🌬️ Wind & Atmosphere Analysis")
+        wind_text = generate_wind_summary(df_zone)
+        prerender_audio(wind_text)
+        if st.button("🔊 Listen to Wind Analysis"):
+             autoplay_audio(text_to_audio(wind_text))
+        st.caption("💡 Wind direction and pressure help predict upcoming weather changes. Falling pressure often means rain is coming.")
+        col_w1, col_w2 = st.columns(2)
     
-    with col_w1:
-        # Wind Rose (Polar Scatter of recent 24h)
-        st.markdown(f"**Wind Direction (Last 24h) - {selected_zone}**")
-        
-        # Filter last 24h
-        df_wind = df_zone.tail(24)
-        
-        fig_wind = go.Figure()
-        fig_wind.add_trace(go.Scatterpolar(
-            r=df_wind["Wind_Speed"],
-            theta=df_wind["Wind_Direction"],
-            mode='markers',
-            marker=dict(
-                color=df_wind["Wind_Speed"],
-                colorscale='Viridis',
-                size=10,
-                showscale=True,
-                colorbar=dict(title="Speed (m/s)")
-            ),
-            name='Wind'
-        ))
-        
-        fig_wind.update_layout(
-            polar=dict(
-                radialaxis=dict(visible=True, range=[0, df_wind["Wind_Speed"].max() + 2]),
-                angularaxis=dict(direction="clockwise")
-            ),
-            showlegend=False,
-            height=400,
-            margin=dict(l=40, r=40, t=30, b=30)
-        )
-        st.plotly_chart(fig_wind, use_container_width=True)
-
-    with col_w2:
-        # Zone Map Visualization
-        st.markdown("**📍 Forecast Locations (Abia State)**")
-        
-        # Prepare map data
-        map_data = []
-        for zone, coords in AGRICULTURAL_ZONES.items():
-            # Highlight selected zone with a slightly different color/size if possible (st.map is simple)
-            # For basic st.map, we just plot all points.
-            map_data.append({
-                "lat": coords["lat"],
-                "lon": coords["lon"],
-                "zone": zone,
-                "size": 20 if zone == selected_zone else 10,
-                "color": "#FF0000" if zone == selected_zone else "#0000FF" # Simple color diff logic
-            })
-        df_map = pd.DataFrame(map_data)
-        
-        # Display map
-        # Using st.map is the simplest way to get a nice OSM/Mapbox style interactive map
-        st.map(df_map, latitude="lat", longitude="lon", size="size", color="color", zoom=9, height=400)
-        
-    # Contextual Insight on Map + Wind
-    with st.expander("💡 Insights: Why compare Wind Direction with Location?"):
-        st.markdown("""
+        with col_w1:
+            # Wind Rose (Polar Scatter of recent 24h)
+            st.markdown(f"**Wind Direction (Last 24h) - {selected_zone}**")
+        
+            fig_wind = build_wind_polar_figure(df_last24)
+            st.plotly_chart(fig_wind, use_container_width=True)
+
+        with col_w2:
+            # Zone Map Visualization
+            st.markdown("**📍 Forecast Locations (Abia State)**")
+        
+            # Prepare map data
+            map_data = []
+            for zone, coords in AGRICULTURAL_ZONES.items():
+                # Highlight selected zone with a slightly different color/size if possible (st.map is simple)
+                # For basic st.map, we just plot all points.
+                map_data.append({
+                    "lat": coords["lat"],
+                    "lon": coords["lon"],
+                    "zone": zone,
+                    "size": 20 if zone == selected_zone else 10,
+                    "color": "#FF0000" if zone == selected_zone else "#0000FF" # Simple color diff logic
+                })
+            df_map = pd.DataFrame(map_data)
+        
+            # Display map
+            # Using st.map is the simplest way to get a nice OSM/Mapbox style interactive map
+            st.map(df_map, latitude="lat", longitude="lon", size="size", color="color", zoom=9, height=400)
+        
+        # Contextual Insight on Map + Wind
+        with st.expander("💡 Insights: Why compare Wind Direction with Location?"):
+            st.markdown("""
         **Combining these two charts helps predict upcoming weather:**
         
         1.  **Geography Matters:** The map shows **Aba** is further South (closer to the Atlantic Ocean), while **Umuahia/Isuikwuato** are further North.
@@ -1383,150 +2026,167 @@ with tab1:
         *Tip: If you see the Wind Rose pointing SW and you are in Aba, expect humid conditions. If it shifts to NE, expect dry air.*
         """)
 
-    # Pressure Trend (Moved to full width below)
-    st.markdown("---")
-    st.markdown("**Atmospheric Pressure Trend**")
-    fig_press = px.line(df_zone.tail(24), x=df_zone.tail(24).index, y="Pressure", markers=True)
-    fig_press.update_traces(line_color="#4FC3F7")
-    fig_press.update_layout(height=350, xaxis_title="Time", yaxis_title="hPa")
-    st.plotly_chart(fig_press, use_container_width=True)
+        # Pressure Trend (Moved to full width below)
+        st.markdown("---")
+        st.markdown("**Atmospheric Pressure Trend**")
+        fig_press = build_pressure_figure(df_last24)
+        st.plotly_chart(fig_press, use_container_width=True)
     
-    # Add detailed analysis below the charts
-    st.markdown("---")
-    st.markdown("### 📊 Detailed Analysis & Insights")
+        # Add detailed analysis below the charts
+        st.markdown("---")
+        st.markdown("### 📊 Detailed Analysis & Insights")
     
-    col_analysis1, col_analysis2 = st.columns(2)
+        col_analysis1, col_analysis2 = st.columns(2)
     
-    with col_analysis1:
-        st.markdown("**🌬️ Wind Pattern Analysis**")
-        
-        # Calculate wind statistics
-        df_wind = df_zone.tail(24)
-        avg_speed = df_wind["Wind_Speed"].mean()
-        max_speed = df_wind["Wind_Speed"].max()
-        min_speed = df_wind["Wind_Speed"].min()
-        
-        # Determine predominant direction
-        def get_cardinal_direction(degrees):
-            directions = ['N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW']
-            idx = int((degrees + 22.5) / 45) % 8
-            return directions[idx]
-        
-        cardinal_dirs = [get_cardinal_direction(d) for d in df_wind["Wind_Direction"].values]
-        from collections import Counter
-        most_common = Counter(cardinal_dirs).most_common(2)
-        predominant_dir = most_common[0][0] if most_common else "Variable"
-        predominant_pct = (most_common[0][1] / len(cardinal_dirs) * 100) if most_common else 0
-        
-        st.write(f"**Wind Statistics (Last 24h):**")
-        st.write(f"- Predominant Direction: **{predominant_dir}** ({predominant_pct:.0f}% of time)")
-        st.write(f"- Average Speed: **{avg_speed:.1f} m/s**")
-        st.write(f"- Speed Range: {min_speed:.1f} - {max_speed:.1f} m/s")
-        
-        # Wind consistency
-        speed_std = df_wind["Wind_Speed"].std()
-        if speed_std < 1:
-            consistency = "Very Consistent"
-            consistency_icon = "✅"
-        elif speed_std < 2:
-            consistency = "Moderately Consistent"
-            consistency_icon = "🔄"
-        else:
-            consistency = "Variable"
-            consistency_icon = "⚠️"
+        with col_analysis1:
+            st.markdown("**🌬️ Wind Pattern Analysis**")
+        
+            # Calculate wind statistics (same last-24h slice as the wind rose)
+            recent_speed = df_last24["Wind_Speed"]
+            avg_speed = recent_speed.mean()
+            max_speed = recent_speed.max()
+            min_speed = recent_speed.min()
+        
+            # Determine predominant direction (sector counts in one vectorized pass)
+            directions = df_last24["Wind_Direction"].to_numpy(dtype=float)
+            directions = directions[~np.isnan(directions)]
+            sector_counts = np.bincount(((directions + 22.5) // 45).astype(int) % 8, minlength=8)
+            if directions.size:
+                top = sector_counts.argmax()
+                predominant_dir = CARDINAL_DIRECTIONS[top]
+                predominant_pct = sector_counts[top] / directions.size * 100
+            else:
+                predominant_dir = "Variable"
+                predominant_pct = 0
+        
+            st.write(f"**Wind Statistics (Last 24h):**")
+            st.write(f"- Predominant Direction: **{predominant_dir}** ({predominant_pct:.0f}% of time)")
+            st.write(f"- Average Speed: **{avg_speed:.1f} m/s**")
+            st.write(f"- Speed Range: {min_speed:.1f} - {max_speed:.1f} m/s")
+        
+            # Wind consistency
+            speed_std = recent_speed.std()
+            if speed_std < 1:
+                consistency = "Very Consistent"
+                consistency_icon = "✅"
+            elif speed_std < 2:
+                consistency = "Moderately Consistent"
+                consistency_icon = "🔄"
+            else:
+                consistency = "Variable"
+                consistency_icon = "⚠️"
         
-        st.write(f"- Wind Consistency: {consistency_icon} **{consistency}**")
+            st.write(f"- Wind Consistency: {consistency_icon} **{consistency}**")
         
-        # Farming implications
-        st.markdown("**🌾 Farming Implications:**")
+            # Farming implications
+            st.markdown("**🌾 Farming Implications:**")
         
-        if avg_speed > 7:
-            st.error("🌪️ **Very High Winds** - Avoid all field work. Risk of crop damage and soil erosion.")
-        elif avg_speed > 5:
-            st.warning("💨 **High Winds** - Not suitable for spraying. Delay pesticide/herbicide application.")
-        elif avg_speed >= 2 and avg_speed <= 5:
-            st.success("✅ **Ideal Winds** - Good air circulation reduces disease risk. Suitable for most farm activities.")
-        else:
-            st.info("🍃 **Light Winds** - Excellent for spraying. Minimal drift risk.")
-        
-        # Direction-based weather prediction
-        if predominant_dir in ['E', 'SE', 'S', 'SW']:
-            st.info(f"💧 **{predominant_dir} winds** typically bring moisture from the ocean. Monitor for potential rainfall.")
-        elif predominant_dir in ['N', 'NE', 'NW']:
-            st.info(f"🌤️ **{predominant_dir} winds** usually bring drier, cooler air. Expect clearer conditions.")
-        elif predominant_dir == 'W':
-            st.info(f"⛅ **{predominant_dir} winds** can bring variable weather. Stay alert to changes.")
+            if avg_speed > 7:
+                st.error("🌪️ **Very High Winds** - Avoid all field work. Risk of crop damage and soil erosion.")
+            elif avg_speed > 5:
+                st.warning("💨 **High Winds** - Not suitable for spraying. Delay pesticide/herbicide application.")
+            elif avg_speed >= 2 and avg_speed <= 5:
+                st.success("✅ **Ideal Winds** - Good air circulation reduces disease risk. Suitable for most farm activities.")
+            else:
+                st.info("🍃 **Light Winds** - Excellent for spraying. Minimal drift risk.")
+        
+            # Direction-based weather prediction
+            if predominant_dir in ['E', 'SE', 'S', 'SW']:
+                st.info(f"💧 **{predominant_dir} winds** typically bring moisture from the ocean. Monitor for potential rainfall.")
+            elif predominant_dir in ['N', 'NE', 'NW']:
+                st.info(f"🌤️ **{predominant_dir} winds** usually bring drier, cooler air. Expect clearer conditions.")
+            elif predominant_dir == 'W':
+                st.info(f"⛅ **{predominant_dir} winds** can bring variable weather. Stay alert to changes.")
     
-    with col_analysis2:
-        st.markdown("**🌡️ Atmospheric Pressure Analysis**")
-        
-        # Pressure statistics
-        current_pressure = df_zone["Pressure"].iloc[-1]
-        pressure_24h_ago = df_zone["Pressure"].iloc[-24] if len(df_zone) >= 24 else df_zone["Pressure"].iloc[0]
-        pressure_change_24h = current_pressure - pressure_24h_ago
-        
-        # Calculate 6-hour trend
-        if len(df_zone) >= 6:
-            pressure_6h_ago = df_zone["Pressure"].iloc[-6]
-            pressure_change_6h = current_pressure - pressure_6h_ago
-            trend_6h = "Rising" if pressure_change_6h > 0.5 else "Falling" if pressure_change_6h < -0.5 else "Stable"
-        else:
-            pressure_change_6h = 0
-            trend_6h = "Insufficient data"
-        
-        st.write(f"**Pressure Metrics:**")
-        st.write(f"- Current: **{current_pressure:.1f} hPa**")
-        st.write(f"- 24h Change: **{pressure_change_24h:+.1f} hPa**")
-        st.write(f"- 6h Trend: **{trend_6h}** ({pressure_change_6h:+.1f} hPa)")
-        
-        # Pressure classification
-        if current_pressure < 1000:
-            pressure_class = "Low Pressure System"
-            pressure_icon = "🌧️"
-        elif current_pressure > 1020:
-            pressure_class = "High Pressure System"
-            pressure_icon = "☀️"
-        else:
-            pressure_class = "Normal Pressure"
-            pressure_icon = "⛅"
-        
-        st.write(f"- System Type: {pressure_icon} **{pressure_class}**")
-        
-        # Weather prediction
-        st.markdown("**🔮 Weather Forecast:**")
-        
-        if pressure_change_24h < -5:
-            st.error("⛈️ **Rapidly Falling** - Severe weather likely! Expect heavy rain or storms within 12-24 hours.")
-            st.write("**Actions:** Secure equipment, check drainage, postpone all field work.")
-        elif pressure_change_24h < -2:
-            st.warning("🌧️ **Falling Pressure** - Weather deteriorating. Rain expected within 24-48 hours.")
-            st.write("**Actions:** Complete urgent outdoor tasks, prepare for wet conditions.")
-        elif pressure_change_24h > 5:
-            st.success("🌤️ **Rapidly Rising** - Weather clearing quickly! Expect sunny, dry conditions.")
-            st.write("**Actions:** Excellent time for harvesting, spraying, and field work.")
-        elif pressure_change_24h > 2:
-            st.success("☀️ **Rising Pressure** - Weather improving. Conditions becoming more stable.")
-            st.write("**Actions:** Good time to plan outdoor activities.")
-        else:
-            st.info("➡️ **Stable Pressure** - Weather conditions steady. No major changes expected.")
-            st.write("**Actions:** Continue normal farm operations.")
+        with col_analysis2:
+            st.markdown("**🌡️ Atmospheric Pressure Analysis**")
+        
+            # Pressure statistics
+            pressure = df_zone["Pressure"].to_numpy()
+            current_pressure = pressure[-1]
+            pressure_24h_ago = pressure[-24] if pressure.size >= 24 else pressure[0]
+            pressure_change_24h = current_pressure - pressure_24h_ago
+        
+            # Calculate 6-hour trend
+            if pressure.size >= 6:
+                pressure_6h_ago = pressure[-6]
+                pressure_change_6h = current_pressure - pressure_6h_ago
+                trend_6h = "Rising" if pressure_change_6h > 0.5 else "Falling" if pressure_change_6h < -0.5 else "Stable"
+            else:
+                pressure_change_6h = 0
+                trend_6h = "Insufficient data"
+        
+            st.write(f"**Pressure Metrics:**")
+            st.write(f"- Current: **{current_pressure:.1f} hPa**")
+            st.write(f"- 24h Change: **{pressure_change_24h:+.1f} hPa**")
+            st.write(f"- 6h Trend: **{trend_6h}** ({pressure_change_6h:+.1f} hPa)")
+        
+            # Pressure classification
+            if current_pressure < 1000:
+                pressure_class = "Low Pressure System"
+                pressure_icon = "🌧️"
+            elif current_pressure > 1020:
+                pressure_class = "High Pressure System"
+                pressure_icon = "☀️"
+            else:
+                pressure_class = "Normal Pressure"
+                pressure_icon = "⛅"
+        
+            st.write(f"- System Type: {pressure_icon} **{pressure_class}**")
+        
+            # Weather prediction
+            st.markdown("**🔮 Weather Forecast:**")
+        
+            if pressure_change_24h < -5:
+                st.error("⛈️ **Rapidly Falling** - Severe weather likely! Expect heavy rain or storms within 12-24 hours.")
+                st.write("**Actions:** Secure equipment, check drainage, postpone all field work.")
+            elif pressure_change_24h < -2:
+                st.warning("🌧️ **Falling Pressure** - Weather deteriorating. Rain expected within 24-48 hours.")
+                st.write("**Actions:** Complete urgent outdoor tasks, prepare for wet conditions.")
+            elif pressure_change_24h > 5:
+                st.success("🌤️ **Rapidly Rising** - Weather clearing quickly! Expect sunny, dry conditions.")
+                st.write("**Actions:** Excellent time for harvesting, spraying, and field work.")
+            elif pressure_change_24h > 2:
+                st.success("☀️ **Rising Pressure** - Weather improving. Conditions becoming more stable.")
+                st.write("**Actions:** Good time to plan outdoor activities.")
+            else:
+                st.info("➡️ **Stable Pressure** - Weather conditions steady. No major changes expected.")
+                st.write("**Actions:** Continue normal farm operations.")
         
-        # Additional context
-        if current_pressure < 995:
-            st.caption("⚠️ Very low pressure - associated with storms and heavy rainfall.")
-        elif current_pressure > 1025:
-            st.caption("ℹ️ Very high pressure - associated with clear skies and dry weather.")
+            # Additional context
+            if current_pressure < 995:
+                st.caption("⚠️ Very low pressure - associated with storms and heavy rainfall.")
+            elif current_pressure > 1025:
+                st.caption("ℹ️ Very high pressure - associated with clear skies and dry weather.")
+
+# 3-hourly table cell markup, bound once instead of re-concatenated per cell
+_HOURLY_CELL_OPEN = '<div class="hourly-table-cell">'
+_HOURLY_CELL_CLOSE = '</div>'
+_HOURLY_WEATHER_CELL = '<div class="hourly-table-cell" title="{0}">{0}</div>'
+
+
+def hourly_table_row(values, cell_open=_HOURLY_CELL_OPEN, cell_close=_HOURLY_CELL_CLOSE):
+    """Wrap each formatted value in a table cell using a single str.join."""
+    return cell_open + (cell_close + cell_open).join(values) + cell_close
+
 
 # --- TAB 2: Weather Forecast (Enhanced to match screenshot) ---
-with tab2:
-    st.header(f"🔮 Weather Forecast for {selected_zone}")
+@st.fragment
+def render_forecast_tab(zone_name):
+    """Forecast tab body; runs as a fragment so its buttons rerun only this tab."""
+    st.header(f"🔮 Weather Forecast for {zone_name}")
     
     st.info("👨‍🌾 **What This Shows:** Weather predictions for the next 2 days (3-hour intervals) and 5 days (daily). Use this to plan farm work like planting, spraying pesticides, or harvesting. Avoid spraying before rain!")
     
     # Fetch forecast data
     with st.spinner("Fetching forecast data..."):
-        df_hourly = fetch_hourly_forecast(selected_zone)
-        df_daily = fetch_daily_forecast(selected_zone).head(8) # Limiting to 8 for a clear display
+        df_hourly = fetch_hourly_forecast(zone_name)
+        df_daily_full, daily_fetched_at = fetch_daily_forecast_stamped(zone_name)
+        # Hand the full frame to the season view (Historical Trends) for this session, stamped
+        # with when the payload was fetched (a stale-while-revalidate hit can be hours old)
+        if daily_fetched_at is not None:
+            st.session_state.setdefault("forecast_cache", {})[zone_name] = (daily_fetched_at, df_daily_full)
+        df_daily = df_daily_full.head(8) # Limiting to 8 for a clear display
     
     if not df_hourly.empty or not df_daily.empty:
         # Create two columns for hourly and daily forecast
@@ -1536,305 +2196,217 @@ with tab2:
         # --- Hourly Forecast ---
         with col_left:
             st.subheader("⏰ 3-Hourly Forecast (Next 48 Hours)")
+            forecast_text = generate_hourly_forecast_summary(df_hourly)
+            prerender_audio(forecast_text)
             if st.button("🔊 Listen to Hourly Forecast"):
-                 forecast_text = generate_hourly_forecast_summary(df_hourly)
                  autoplay_audio(text_to_audio(forecast_text))
             st.caption("💡 **For farmers:** Check hourly forecasts before spraying crops or doing outdoor work. High rain probability (>60%) means postpone spraying.")
             
             if not df_hourly.empty:
                 # Temperature line chart (already defined above)
-                fig_hourly = go.Figure()
-                fig_hourly.add_trace(
-                    go.Scatter(
-                        x=df_hourly["datetime"],
-                        y=df_hourly["temp"],
-                        name="Temperature",
-                        line=dict(color="#FF6B6B", width=3),
-                        mode="lines+markers",
-                        hovertemplate="Temp: %{y:.1f}°C<extra>%{x|%a %I:%M%p}</extra>",
-                    )
-                )
-                
-                # Add precipitation probability as bars
-                fig_hourly.add_trace(
-                    go.Bar(
-                        x=df_hourly["datetime"],
-                        y=df_hourly["pop"],
-                        name="Precip. Probability (%)",
-                        yaxis="y2",
-                        marker=dict(color="#4ECDC4", opacity=0.3),
-                        hovertemplate="PoP: %{y:.0f}%<extra></extra>",
-                    )
-                )
-                
-                fig_hourly.update_layout(
-                    title="Temperature & Precipitation Probability",
-                    xaxis_title="Time",
-                    yaxis_title="Temperature (°C)",
-                    yaxis2=dict(
-                        title="Precipitation Probability (%)",
-                        overlaying="y",
-                        side="right",
-                        range=[0, 100],
-                        showgrid=False,
-                    ),
-                    legend=dict(
-                        orientation="h",
-                        yanchor="bottom",
-                        y=1.02,
-                        xanchor="right",
-                        x=1
-                    ),
-                    hovermode="x unified",
-                    height=400,
-                    margin=dict(l=50, r=50, t=80, b=50),
-                )
-                
+                fig_hourly = build_hourly_forecast_figure(df_hourly)
                 st.plotly_chart(fig_hourly, use_container_width=True)
                 
                 # --- Implementation of the detailed data rows (as seen in screenshot) ---
-                hourly_display = df_hourly.head(8).copy() # Showing next 24 hours (8 intervals)
+                hourly_display = df_hourly.head(8) # Showing next 24 hours (8 intervals)
+                first_word = hourly_display["description"].str.split(n=1).str[0]
                 
-                # Create the HTML structure for the multi-row table
-                time_row = "".join([f'<div class="hourly-table-cell"><strong>{dt.strftime("%I%p")}</strong></div>' for dt in hourly_display["datetime"]])
-                temp_row = "".join([f'<div class="hourly-table-cell">{temp:.1f}°</div>' for temp in hourly_display["temp"]])
-                pop_row = "".join([f'<div class="hourly-table-cell" style="color:#2E7D32;">{pop:.0f}%</div>' for pop in hourly_display["pop"]])
-                weather_row = "".join([f'<div class="hourly-table-cell" title="{desc}">{desc.replace(" ", "<br>")}</div>' for desc, desc_full in zip(hourly_display["description"].str.split().str[0], hourly_display["description"])])
-                wind_row = "".join([f'<div class="hourly-table-cell">{wind:.1f}m/s</div>' for wind in hourly_display["wind_speed"]])
+                # Create the HTML structure for the multi-row table (one join per row)
+                time_row = hourly_table_row(
+                    hourly_display["datetime"].dt.strftime("%I%p"),
+                    _HOURLY_CELL_OPEN + "<strong>", "</strong>" + _HOURLY_CELL_CLOSE,
+                )
+                temp_row = hourly_table_row(map("{:.1f}°".format, hourly_display["temp"]))
+                pop_row = hourly_table_row(
+                    map("{:.0f}%".format, hourly_display["pop"]),
+                    '<div class="hourly-table-cell" style="color:#2E7D32;">',
+                )
+                weather_row = "".join(map(_HOURLY_WEATHER_CELL.format, first_word))
+                wind_row = hourly_table_row(map("{:.1f}m/s".format, hourly_display["wind_speed"]))
                 
                 st.markdown("---")
                 st.markdown(f"**Detailed 3-Hourly View** (Next 24 Hours)")
                 
-                st.markdown(f'<div class="hourly-table-container">{time_row}</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="hourly-table-container" style="color: #FF6B6B;">{temp_row}</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="hourly-table-container">{pop_row}</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="hourly-table-container" style="font-size: 0.75rem;">{weather_row}</div>', unsafe_allow_html=True)
-                st.markdown(f'<div class="hourly-table-container">{wind_row}</div>', unsafe_allow_html=True)
+                # One markdown element for all five rows
+                hourly_table_html = (
+                    f'<div class="hourly-table-container">{time_row}</div>'
+                    f'<div class="hourly-table-container" style="color: #FF6B6B;">{temp_row}</div>'
+                    f'<div class="hourly-table-container">{pop_row}</div>'
+                    f'<div class="hourly-table-container" style="font-size: 0.75rem;">{weather_row}</div>'
+                    f'<div class="hourly-table-container">{wind_row}</div>'
+                )
+                st.markdown(hourly_table_html, unsafe_allow_html=True)
 
 
         # --- Daily Forecast ---
         with col_right:
             st.subheader("📅 Daily Forecast (5-Day)")
+            daily_text = generate_daily_forecast_summary(df_daily)
+            prerender_audio(daily_text)
             if st.button("🔊 Listen to Daily Forecast"):
-                 daily_text = generate_daily_forecast_summary(df_daily)
                  autoplay_audio(text_to_audio(daily_text))
             st.caption("💡 **For farmers:** Use this to plan your week. Look for dry days for harvesting and rainy days to avoid field work.")
             
             if not df_daily.empty:
-                # Display daily forecast cards
-                # Display daily forecast cards
-                for idx, row in df_daily.iterrows():
-                    date_str = row["date"].strftime("%a, %b %d")
-                    emoji = get_weather_emoji(row["weather"])
-                    weather_desc = row["weather"].replace(" ", " ").title() # Clean up weather name
-                    
-                    # Custom HTML for a cleaner daily card matching the screenshot style
-                    # Add Chance of rain if significant
-                    pop_badge = ""
-                    if row.get("max_pop", 0) > 20: 
-                        pop_badge = f'<span style="background-color: #e3f2fd; color: #1565c0; padding: 2px 6px; border-radius: 4px; font-size: 0.75rem; margin-left: 5px;">💧 {row["max_pop"]:.0f}%</span>'
-
-                    st.markdown(f"""
-                        <div class="forecast-card">
-                            <div style="display: flex; justify-content: space-between; align-items: center; padding-bottom: 0.5rem;">
-                                <strong style="width: 30%;">{date_str}</strong>
-                                <div style="font-size: 1.5rem; width: 15%; text-align: center;">{emoji}</div>
-                                <strong style="width: 35%; text-align: right;">{row["temp_max"]:.0f}° / {row["temp_min"]:.0f}°C</strong>
-                                <div style="color: #666; width: 20%; text-align: right; font-size: 0.9rem;">{weather_desc}</div>
-                            </div>
-                            <div style="font-size: 0.8rem; color: #999; text-align: right; display: flex; justify-content: flex-end; align-items: center;">
-                                <span>Rain: {row["total_rain"]:.1f} mm {pop_badge} | Wind: {row["wind_speed"]:.1f} m/s</span>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
+                # Display daily forecast cards (all cards built as one HTML block)
+                date_str = pd.to_datetime(df_daily["date"]).dt.strftime("%a, %b %d")
+                emoji = df_daily["weather"].map(WEATHER_EMOJIS).fillna("🌤️")
+                weather_desc = df_daily["weather"].str.title() # Clean up weather name
+                
+                # Add Chance of rain if significant
+                pop_badge = pd.Series(
+                    np.where(
+                        df_daily["max_pop"] > 20,
+                        '<span style="background-color: #e3f2fd; color: #1565c0; padding: 2px 6px; border-radius: 4px; font-size: 0.75rem; margin-left: 5px;">💧 '
+                        + df_daily["max_pop"].map("{:.0f}".format) + '%</span>',
+                        "",
+                    ),
+                    index=df_daily.index,
+                )
+                
+                # Custom HTML for a cleaner daily card matching the screenshot style
+                cards_html = (
+                    '<div class="forecast-card">'
+                    '<div style="display: flex; justify-content: space-between; align-items: center; padding-bottom: 0.5rem;">'
+                    '<strong style="width: 30%;">' + date_str + '</strong>'
+                    '<div style="font-size: 1.5rem; width: 15%; text-align: center;">' + emoji + '</div>'
+                    '<strong style="width: 35%; text-align: right;">'
+                    + df_daily["temp_max"].map("{:.0f}".format) + '° / ' + df_daily["temp_min"].map("{:.0f}".format) + '°C</strong>'
+                    '<div style="color: #666; width: 20%; text-align: right; font-size: 0.9rem;">' + weather_desc + '</div>'
+                    '</div>'
+                    '<div style="font-size: 0.8rem; color: #999; text-align: right; display: flex; justify-content: flex-end; align-items: center;">'
+                    '<span>Rain: ' + df_daily["total_rain"].map("{:.1f}".format) + ' mm ' + pop_badge
+                    + ' | Wind: ' + df_daily["wind_speed"].map("{:.1f}".format) + ' m/s</span>'
+                    '</div>'
+                    '</div>'
+                ).str.cat()
+                st.markdown(cards_html, unsafe_allow_html=True)
 
                 st.markdown("---")
                 
                 # Daily temperature range chart (already defined above)
                 st.markdown("**Temperature Range Forecast**")
-                fig_daily = go.Figure()
-                
-                fig_daily.add_trace(
-                    go.Scatter(
-                        x=df_daily["date"],
-                        y=df_daily["temp_max"],
-                        name="Max Temp",
-                        line=dict(color="#FF6B6B"),
-                        mode="lines+markers",
-                    )
-                )
-                
-                fig_daily.add_trace(
-                    go.Scatter(
-                        x=df_daily["date"],
-                        y=df_daily["temp_min"],
-                        name="Min Temp",
-                        line=dict(color="#4ECDC4"),
-                        mode="lines+markers",
-                        fill="tonexty",
-                        fillcolor="rgba(78, 205, 196, 0.2)",
-                    )
-                )
-                
-                fig_daily.update_layout(
-                    xaxis_title="Date",
-                    yaxis_title="Temperature (°C)",
-                    hovermode="x unified",
-                    height=300,
-                )
-                
+                fig_daily = build_daily_range_figure(df_daily)
                 st.plotly_chart(fig_daily, use_container_width=True)
         
     else:
         st.error("Unable to fetch forecast data. Please check your API key and internet connection.")
 
+
+with tab2:
+    if tab2.open:
+        render_forecast_tab(selected_zone)
+
 # --- TAB 4: Risk Analysis ---
 with tab4:
-    st.header(f"💧 Risk Analysis for {selected_zone}")
+    if tab4.open:
+        st.header(f"💧 Risk Analysis for {selected_zone}")
     
-    if not st.session_state.get("user"):
-         render_premium_lock_screen("Risk Analysis")
-    else:
-        st.info("👨‍🌾 **What This Shows:** Drought and waterlogging risks based on recent rainfall. This helps you protect your crops by taking action early (irrigation for drought, drainage for waterlogging).")
+        if not st.session_state.get("user"):
+             render_premium_lock_screen("Risk Analysis")
+        else:
+            st.info("👨‍🌾 **What This Shows:** Drought and waterlogging risks based on recent rainfall. This helps you protect your crops by taking action early (irrigation for drought, drainage for waterlogging).")
         
-        df_risk = identify_wet_dry_periods(df_zone)
+            df_risk = identify_wet_dry_periods(df_zone)
 
-        if df_risk.empty:
-            st.warning("⚠️ Insufficient data for risk analysis.")
-        else:
-            latest_risk = df_risk.iloc[-1]
+            if df_risk.empty:
+                st.warning("⚠️ Insufficient data for risk analysis.")
+            else:
+                # Latest scalars pulled once (no row Series materialized)
+                latest_risk = {
+                    "Risk_Flag": df_risk["Risk_Flag"].iat[-1],
+                    "Rain_7D_Sum": float(df_risk["Rain_7D_Sum"].iat[-1]),
+                }
 
-            # Risk alert
-            if latest_risk["Risk_Flag"] == "Drought Risk":
-                st.error(
-                    f"🚨 **DROUGHT ALERT**: 7-day rainfall is {latest_risk['Rain_7D_Sum']:.1f} mm "
+                # Risk alert
+                if latest_risk["Risk_Flag"] == "Drought Risk":
+                    st.error(
+                        f"🚨 **DROUGHT ALERT**: 7-day rainfall is {latest_risk['Rain_7D_Sum']:.1f} mm "
                     f"(threshold: ≤ {DROUGHT_THRESHOLD} mm). Consider irrigation measures."
-                )
-                st.warning("👨‍🌾 **What to do:** Your crops may not have enough water. Start irrigation immediately, especially for young plants. Check soil moisture daily.")
-            elif latest_risk["Risk_Flag"] == "Waterlogging Risk":
-                st.error(
-                    f"⚠️ **WATERLOGGING ALERT**: 7-day rainfall is {latest_risk['Rain_7D_Sum']:.1f} mm "
+                    )
+                    st.warning("👨‍🌾 **What to do:** Your crops may not have enough water. Start irrigation immediately, especially for young plants. Check soil moisture daily.")
+                elif latest_risk["Risk_Flag"] == "Waterlogging Risk":
+                    st.error(
+                        f"⚠️ **WATERLOGGING ALERT**: 7-day rainfall is {latest_risk['Rain_7D_Sum']:.1f} mm "
                     f"(threshold: ≥ {WET_THRESHOLD} mm). Monitor for crop disease."
-                )
-                st.warning("👨‍🌾 **What to do:** Too much water can damage crop roots and cause diseases. Improve drainage, avoid adding more water, and watch for fungal diseases on leaves.")
-            else:
-                st.success(
-                    f"✅ **NORMAL CONDITIONS**: 7-day rainfall is {latest_risk['Rain_7D_Sum']:.1f} mm. "
+                    )
+                    st.warning("👨‍🌾 **What to do:** Too much water can damage crop roots and cause diseases. Improve drainage, avoid adding more water, and watch for fungal diseases on leaves.")
+                else:
+                    st.success(
+                        f"✅ **NORMAL CONDITIONS**: 7-day rainfall is {latest_risk['Rain_7D_Sum']:.1f} mm. "
                     "No immediate risk detected."
-                )
-                st.info("👨‍🌾 **What to do:** Conditions are good for farming. Continue normal watering and farming activities.")
-
-            # Visualization
-            st.subheader("📊 Rainfall and Risk Trends")
-            if st.button("🔊 Listen to Risk Analysis"):
-                 risk_text = generate_drought_risk_summary(latest_risk)
-                 autoplay_audio(text_to_audio(risk_text))
-
-            fig_rain = px.bar(
-                df_risk.tail(90).reset_index(),
-                x="Timestamp",
-                y="Daily_Rain",
-                color="Risk_Flag",
-                color_discrete_map={
-                    "Drought Risk": "#d32f2f",
-                    "Waterlogging Risk": "#1976d2",
-                    "Normal": "#388e3c",
-                },
-                title="Daily Rainfall with Risk Classification (Last 90 Days)",
-            )
-
-            fig_rain.update_layout(xaxis_title="Date", yaxis_title="Rainfall (mm)")
-            st.plotly_chart(fig_rain, use_container_width=True)
-
-            # Gauge Chart for Current Status
-            st.subheader("⏱️ Current Risk Monitor")
-            st.caption("💡 **For farmers:** The gauge shows total rain in the last 7 days. Green zone = good. Red zone (left) = too dry, need irrigation. Blue zone (right) = too wet, improve drainage.")
-            
-            # Determine gauge color based on risk
-            gauge_color = "#4caf50" # Green
-            if latest_risk['Rain_7D_Sum'] < DROUGHT_THRESHOLD:
-                gauge_color = "#ef5350" # Red
-            elif latest_risk['Rain_7D_Sum'] > WET_THRESHOLD:
-                gauge_color = "#42a5f5" # Blue
-                
-            fig_gauge = go.Figure(go.Indicator(
-                mode = "gauge+number+delta",
-                value = latest_risk['Rain_7D_Sum'],
-                domain = {'x': [0, 1], 'y': [0, 1]},
-                title = {'text': "7-Day Cumulative Rainfall (mm)", 'font': {'size': 20}},
-                delta = {'reference': DROUGHT_THRESHOLD, 'increasing': {'color': "blue"}, 'decreasing': {'color': "red"}},
-                gauge = {
-                    'axis': {'range': [None, 200], 'tickwidth': 1, 'tickcolor': "white"},
-                    'bar': {'color': gauge_color},
-                    'bgcolor': "rgba(0,0,0,0)",
-                    'borderwidth': 2,
-                    'bordercolor': "#333",
-                    'steps': [
-                        {'range': [0, DROUGHT_THRESHOLD], 'color': 'rgba(239, 83, 80, 0.3)'},
-                        {'range': [DROUGHT_THRESHOLD, WET_THRESHOLD], 'color': 'rgba(102, 187, 106, 0.3)'},
-                        {'range': [WET_THRESHOLD, 200], 'color': 'rgba(66, 165, 245, 0.3)'}
-                    ],
-                    'threshold': {
-                        'line': {'color': "red", 'width': 4},
-                        'thickness': 0.75,
-                        'value': DROUGHT_THRESHOLD
-                    }
-                }
-            ))
+                    )
+                    st.info("👨‍🌾 **What to do:** Conditions are good for farming. Continue normal watering and farming activities.")
+
+                # Visualization
+                st.subheader("📊 Rainfall and Risk Trends")
+                risk_text = generate_drought_risk_summary(latest_risk)
+                prerender_audio(risk_text)
+                if st.button("🔊 Listen to Risk Analysis"):
+                     autoplay_audio(text_to_audio(risk_text))
+
+                # Charts below are built straight from arrays (no Plotly Express frame introspection)
+                df_risk_90 = df_risk.tail(90)
+                risk_dates = df_risk_90.index
+                fig_rain = build_risk_rain_figure(df_risk_90)
+                st.plotly_chart(fig_rain, use_container_width=True)
+
+                # Gauge Chart for Current Status
+                st.subheader("⏱️ Current Risk Monitor")
+                st.caption("💡 **For farmers:** The gauge shows total rain in the last 7 days. Green zone = good. Red zone (left) = too dry, need irrigation. Blue zone (right) = too wet, improve drainage.")
             
-            fig_gauge.update_layout(height=300)
-            st.plotly_chart(fig_gauge, use_container_width=True)
-
-            # Rolling sum chart
-            fig_rolling = px.line(
-                df_risk.tail(90).reset_index(),
-                x="Timestamp",
-                y="Rain_7D_Sum",
-                title="7-Day Rolling Rainfall Sum",
-            )
+                fig_gauge = build_risk_gauge_figure(latest_risk['Rain_7D_Sum'])
+                st.plotly_chart(fig_gauge, use_container_width=True)
+
+                # Rolling sum chart
+                fig_rolling = go.Figure(go.Scattergl(
+                    x=risk_dates,
+                    y=df_risk_90["Rain_7D_Sum"].to_numpy(),
+                    mode="lines",
+                ))
+                fig_rolling.update_layout(
+                    title="7-Day Rolling Rainfall Sum",
+                    xaxis_title="Date",
+                    yaxis_title="7-Day Rainfall (mm)",
+                )
 
-            fig_rolling.add_hline(
-                y=DROUGHT_THRESHOLD,
-                line_dash="dash",
-                line_color="red",
-                annotation_text="Drought Threshold",
-            )
-            fig_rolling.add_hline(
-                y=WET_THRESHOLD,
-                line_dash="dash",
-                line_color="blue",
-                annotation_text="Waterlogging Threshold",
-            )
+                fig_rolling.add_hline(
+                    y=DROUGHT_THRESHOLD,
+                    line_dash="dash",
+                    line_color="red",
+                    annotation_text="Drought Threshold",
+                )
+                fig_rolling.add_hline(
+                    y=WET_THRESHOLD,
+                    line_dash="dash",
+                    line_color="blue",
+                    annotation_text="Waterlogging Threshold",
+                )
 
-            st.plotly_chart(fig_rolling, use_container_width=True)
+                st.plotly_chart(fig_rolling, use_container_width=True)
 
 # --- TAB 3: Historical Trends ---
 with tab3:
-    st.header(f"📜 Historical Climate Trends for {selected_zone}")
-    st.info("👨‍🌾 **What This Shows:** Long-term weather patterns from past years. Use this to understand how weather is changing and plan for future seasons based on historical patterns.")
-    
-    # Use full dataset for historical trends, ignoring the sidebar date filter
-    df_history = df_raw[df_raw["Zone"] == selected_zone].copy()
+    if tab3.open:
+        st.header(f"📜 Historical Climate Trends for {selected_zone}")
+        st.info("👨‍🌾 **What This Shows:** Long-term weather patterns from past years. Use this to understand how weather is changing and plan for future seasons based on historical patterns.")
     
-    # Ensure Index is DatetimeIndex for resampling
-    if not isinstance(df_history.index, pd.DatetimeIndex):
-        df_history.index = pd.to_datetime(df_history.index)
+        # Use full dataset for historical trends, ignoring the sidebar date filter
+        df_history = df_zone_full
     
-    df_history.sort_index(inplace=True)
-    
-    if df_history.empty:
-        st.warning("Insufficient data for trend analysis.")
-    else:
-        # 1. Monthly Rainfall Accumulation
-        st.subheader("🌧️ Rainfall Accumulation Over Time")
-        if st.button("🔊 Listen to Historical Rain"):
-             from summary_generator import generate_historical_rain_summary 
-             # Local import or use global if already imported. I globally imported it earlier but let's be safe.
-             hist_text = generate_historical_rain_summary(rain_df if 'rain_df' in locals() else None)
-             autoplay_audio(text_to_audio(hist_text))
-        
-        with st.expander("ℹ️ How to Read This Chart"):
-            st.write("""
+        if df_history.empty:
+            st.warning("Insufficient data for trend analysis.")
+        else:
+            # 1. Monthly Rainfall Accumulation
+            st.subheader("🌧️ Rainfall Accumulation Over Time")
+            if st.button("🔊 Listen to Historical Rain"):
+                 from summary_generator import generate_historical_rain_summary 
+                 # Local import or use global if already imported. I globally imported it earlier but let's be safe.
+                 hist_text = generate_historical_rain_summary(rain_df if 'rain_df' in locals() else None)
+                 autoplay_audio(text_to_audio(hist_text))
+        
+            with st.expander("ℹ️ How to Read This Chart"):
+                st.write("""
             **What it shows:** Total rainfall accumulated each month over time.
             
             **How to use it:**
@@ -1845,314 +2417,325 @@ with tab3:
             **For farming:** Compare rainfall across months to identify wet and dry periods. Plan irrigation and crop selection based on these patterns.
             """)
         
-        # Calculate monthly rainfall
-        daily = calculate_daily_aggregates(df_history)
-        if not daily.empty:
-            # Filter out incomplete years
-            days_per_year = daily.groupby(daily.index.year).size()
-            valid_years = days_per_year[days_per_year >= 180].index
-            daily_filtered = daily[daily.index.year.isin(valid_years)]
+            # Calculate monthly rainfall
+            daily = calculate_daily_aggregates(df_history)
+            if not daily.empty:
+                # Filter out incomplete years
+                days_per_year = daily.groupby(daily.index.year).size()
+                valid_years = days_per_year[days_per_year >= 180].index
+                daily_filtered = daily[daily.index.year.isin(valid_years)]
             
-            # Group by month
-            monthly_rain = daily_filtered.resample("M").agg({
-                "Daily_Precipitation": "sum"
-            })
-            
-            if not monthly_rain.empty:
-                # Create DataFrame for plotting
-                rain_df = pd.DataFrame({
-                    "Date": monthly_rain.index,
-                    "Rainfall": monthly_rain["Daily_Precipitation"].values
+                # Group by month
+                monthly_rain = daily_filtered.resample("M").agg({
+                    "Daily_Precipitation": "sum"
                 })
+            
+                if not monthly_rain.empty:
+                    # Create DataFrame for plotting
+                    rain_df = pd.DataFrame({
+                        "Date": monthly_rain.index,
+                        "Rainfall": monthly_rain["Daily_Precipitation"].values
+                    })
                 
-                fig_monthly_rain = px.bar(
-                    rain_df,
-                    x="Date",
-                    y="Rainfall",
-                    title="Monthly Rainfall (mm)",
-                    labels={"Date": "Month", "Rainfall": "Total Rainfall (mm)"},
-                    color="Rainfall",
-                    color_continuous_scale="Blues"
-                )
-                # Format x-axis to show month-year labels
-                fig_monthly_rain.update_xaxes(
-                    tickformat="%b %Y",  # Display as "Jan 2024", "Feb 2024", etc.
-                    dtick="M1"  # One tick per month
-                )
-                st.plotly_chart(fig_monthly_rain, use_container_width=True)
+                    monthly_totals = rain_df["Rainfall"].to_numpy()
+                    fig_monthly_rain = go.Figure(go.Bar(
+                        x=rain_df["Date"],
+                        y=monthly_totals,
+                        marker=dict(
+                            color=monthly_totals,
+                            colorscale="Blues",
+                            showscale=True,
+                            colorbar=dict(title="Total Rainfall (mm)"),
+                        ),
+                    ))
+                    fig_monthly_rain.update_layout(
+                        title="Monthly Rainfall (mm)",
+                        xaxis_title="Month",
+                        yaxis_title="Total Rainfall (mm)",
+                    )
+                    # Format x-axis to show month-year labels
+                    fig_monthly_rain.update_xaxes(
+                        tickformat="%b %Y",  # Display as "Jan 2024", "Feb 2024", etc.
+                        dtick="M1"  # One tick per month
+                    )
+                    st.plotly_chart(fig_monthly_rain, use_container_width=True)
                 
-                # Trend interpretation
-                if len(rain_df) > 3:
-                    recent_avg = rain_df.tail(3)["Rainfall"].mean()
-                    earlier_avg = rain_df.head(3)["Rainfall"].mean()
-                    diff = recent_avg - earlier_avg
-                    if diff > 20:
-                        st.write(f"ℹ️ **Trend:** Recent months show ~{diff:.0f}mm more rainfall on average compared to earlier months.")
-                    elif diff < -20:
-                        st.write(f"ℹ️ **Trend:** Recent months show ~{abs(diff):.0f}mm less rainfall on average compared to earlier months.")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # 2. Drought Frequency
-            st.subheader("🌵 Drought Frequency")
-            if st.button("🔊 Listen to Drought Stats"):
-                 drought_text = "Drought Frequency Analysis. This chart shows the number of dry days per month. High bars indicate periods of water stress."
-                 autoplay_audio(text_to_audio(drought_text))
-            st.caption("💡 **For farmers:** Shows how many dry days occurred each month. More drought days = higher risk of crop water stress. Plan irrigation accordingly.")
+                    # Trend interpretation
+                    if len(rain_df) > 3:
+                        recent_avg = rain_df.tail(3)["Rainfall"].mean()
+                        earlier_avg = rain_df.head(3)["Rainfall"].mean()
+                        diff = recent_avg - earlier_avg
+                        if diff > 20:
+                            st.write(f"ℹ️ **Trend:** Recent months show ~{diff:.0f}mm more rainfall on average compared to earlier months.")
+                        elif diff < -20:
+                            st.write(f"ℹ️ **Trend:** Recent months show ~{abs(diff):.0f}mm less rainfall on average compared to earlier months.")
+        
+            col1, col2 = st.columns(2)
+        
+            with col1:
+                # 2. Drought Frequency
+                st.subheader("🌵 Drought Frequency")
+                if st.button("🔊 Listen to Drought Stats"):
+                     drought_text = "Drought Frequency Analysis. This chart shows the number of dry days per month. High bars indicate periods of water stress."
+                     autoplay_audio(text_to_audio(drought_text))
+                st.caption("💡 **For farmers:** Shows how many dry days occurred each month. More drought days = higher risk of crop water stress. Plan irrigation accordingly.")
             
-            # Get drought risk data
-            df_risk = identify_wet_dry_periods(df_history)
+                # Get drought risk data
+                df_risk = identify_wet_dry_periods(df_history)
             
-            if not df_risk.empty:
-                # Filter for drought days
-                drought_days = df_risk[df_risk["Risk_Flag"] == "Drought Risk"]
+                if not df_risk.empty:
+                    # Filter for drought days
+                    drought_days = df_risk[df_risk["Risk_Flag"] == "Drought Risk"]
                 
-                # Group by month instead of year for continuous timeline
-                monthly_droughts = drought_days.resample("M").size()
+                    # Group by month instead of year for continuous timeline
+                    monthly_droughts = drought_days.resample("M").size()
                 
-                # Filter out months with no data or from incomplete years
-                daily = calculate_daily_aggregates(df_history)
-                if not daily.empty:
-                    days_per_year = daily.groupby(daily.index.year).size()
-                    valid_years = days_per_year[days_per_year >= 180].index
-                    monthly_droughts = monthly_droughts[monthly_droughts.index.year.isin(valid_years)]
+                    # Filter out months with no data or from incomplete years
+                    daily = calculate_daily_aggregates(df_history)
+                    if not daily.empty:
+                        days_per_year = daily.groupby(daily.index.year).size()
+                        valid_years = days_per_year[days_per_year >= 180].index
+                        monthly_droughts = monthly_droughts[monthly_droughts.index.year.isin(valid_years)]
                 
-                if not monthly_droughts.empty:
-                    # Create DataFrame for plotting
-                    drought_df = pd.DataFrame({
-                        "Date": monthly_droughts.index,
-                        "Drought_Days": monthly_droughts.values
-                    })
+                    if not monthly_droughts.empty:
+                        # Create DataFrame for plotting
+                        drought_df = pd.DataFrame({
+                            "Date": monthly_droughts.index,
+                            "Drought_Days": monthly_droughts.values
+                        })
                     
-                    fig_drought = px.line(
-                        drought_df,
-                        x="Date",
-                        y="Drought_Days",
-                        title="Number of Drought Risk Days per Month",
-                        labels={"Date": "Month", "Drought_Days": "Days with Drought Risk"},
-                        markers=True
+                        fig_drought = go.Figure(go.Scatter(
+                            x=drought_df["Date"],
+                            y=drought_df["Drought_Days"].to_numpy(),
+                            mode="lines+markers",
+                            line_color="red",
+                        ))
+                        fig_drought.update_layout(
+                            title="Number of Drought Risk Days per Month",
+                            xaxis_title="Month",
+                            yaxis_title="Days with Drought Risk",
+                        )
+                        # Format x-axis to show month-year labels
+                        fig_drought.update_xaxes(
+                            tickformat="%b %Y",  # Display as "Jan 2024", "Feb 2024", etc.
+                            dtick="M1"  # One tick per month
+                        )
+                        st.plotly_chart(fig_drought, use_container_width=True)
+        
+            with col2:
+                # 3. Planting Season Onset
+                st.subheader("🌱 Planting Season Onset")
+                if st.button("🔊 Listen to Onset Advice"):
+                     onset_text = "Planting Season Onset. This shows when the rains typically start. Use this to determine the best week to plant your crops."
+                     autoplay_audio(text_to_audio(onset_text))
+                st.caption("💡 **For farmers:** Shows when the rainy season typically starts each year (after March 1st). Use this to plan your planting dates. Earlier onset = plant earlier.")
+                onsets = calculate_planting_onset(df_history)
+            
+                if not onsets.empty:
+                    fig_onset = go.Figure(go.Scatter(
+                        x=onsets["Year"],
+                        y=onsets["Day_Of_Year"],
+                        mode="markers",
+                        name="Onset",
+                        customdata=onsets["Onset_Date"].dt.strftime("%Y-%m-%d"),
+                        hovertemplate="Year=%{x}<br>Day of Year=%{y}<br>Onset_Date=%{customdata}<extra></extra>",
+                    ))
+                    fig_onset.update_layout(
+                        title="Estimated Planting Start Date (Day of Year)",
+                        xaxis_title="Year",
+                        yaxis_title="Day of Year (1-365)",
                     )
-                    fig_drought.update_traces(line_color="red")
-                    # Format x-axis to show month-year labels
-                    fig_drought.update_xaxes(
-                        tickformat="%b %Y",  # Display as "Jan 2024", "Feb 2024", etc.
-                        dtick="M1"  # One tick per month
+                    # Add trendline
+                    fig_onset.add_trace(
+                       go.Scatter(x=onsets["Year"], y=onsets["Day_Of_Year"], mode='lines', line=dict(dash='dot', color='green'), name='Trend')
                     )
-                    st.plotly_chart(fig_drought, use_container_width=True)
-        
-        with col2:
-            # 3. Planting Season Onset
-            st.subheader("🌱 Planting Season Onset")
-            if st.button("🔊 Listen to Onset Advice"):
-                 onset_text = "Planting Season Onset. This shows when the rains typically start. Use this to determine the best week to plant your crops."
-                 autoplay_audio(text_to_audio(onset_text))
-            st.caption("💡 **For farmers:** Shows when the rainy season typically starts each year (after March 1st). Use this to plan your planting dates. Earlier onset = plant earlier.")
-            onsets = calculate_planting_onset(df_history)
-            
-            if not onsets.empty:
-                fig_onset = px.scatter(
-                    onsets,
-                    x="Year",
-                    y="Day_Of_Year",
-                    title="Estimated Planting Start Date (Day of Year)",
-                    labels={"Day_Of_Year": "Day of Year (1-365)", "Year": "Year"},
-                    hover_data={"Onset_Date": "|%Y-%m-%d"}
-                )
-                # Add trendline
-                fig_onset.add_trace(
-                   go.Scatter(x=onsets["Year"], y=onsets["Day_Of_Year"], mode='lines', line=dict(dash='dot', color='green'), name='Trend')
-                )
                 
-                # Format x-axis to show clean year labels (2024, 2025) instead of decimals
-                fig_onset.update_xaxes(
-                    tickmode='linear',
-                    dtick=1,
-                    tickformat='d'  # Display as integers
-                )
+                    # Format x-axis to show clean year labels (2024, 2025) instead of decimals
+                    fig_onset.update_xaxes(
+                        tickmode='linear',
+                        dtick=1,
+                        tickformat='d'  # Display as integers
+                    )
                 
-                st.plotly_chart(fig_onset, use_container_width=True)
-                st.caption("*Onset defined as first date after Mar 1st with >20mm rain in 3 days.*")
-
-        # 4. Crop GDD Comparison (Multi-year)
-        st.subheader("☀️ Growing Degree Days (GDD) Accumulation by Year")
-        st.caption("💡 **For farmers:** GDD measures heat available for crop growth. Compare different years to see which had better growing conditions.")
-        crop_gdd_select = st.selectbox("Select Crop for GDD Trend:", list(SEASONAL_CROPS.keys()), key="gdd_trend_crop")
-        t_base_trend = SEASONAL_CROPS[crop_gdd_select]["T_base"]
-        
-        # Calculate full GDD
-        df_gdd_all = calculate_gdd(df_history, t_base_trend)
+                    st.plotly_chart(fig_onset, use_container_width=True)
+                    st.caption("*Onset defined as first date after Mar 1st with >20mm rain in 3 days.*")
+
+            # 4. Crop GDD Comparison (Multi-year)
+            st.subheader("☀️ Growing Degree Days (GDD) Accumulation by Year")
+            st.caption("💡 **For farmers:** GDD measures heat available for crop growth. Compare different years to see which had better growing conditions.")
+            crop_options = list(SEASONAL_CROPS.keys())
+            crop_gdd_select = keep_value("gdd_trend_crop", st.selectbox(
+                "Select Crop for GDD Trend:", crop_options,
+                index=crop_options.index(kept_value("gdd_trend_crop", crop_options[0])), key="gdd_trend_crop",
+            ))
+            t_base_trend = SEASONAL_CROPS[crop_gdd_select]["T_base"]
+        
+            # Calculate full GDD
+            # x=DayOfYear, y=cumulative GDD (reset every year), color=Year; cached per (zone slice, T_base)
+            df_gdd_all = calculate_annual_cumulative_gdd(df_history, t_base_trend)
+        
+            if not df_gdd_all.empty:
+                fig_gdd_trend = px.line(
+                    downsample_for_plot(df_gdd_all, ["Annual_Cum_GDD"], MAX_PLOT_POINTS),
+                    x="DayOfYear",
+                    y="Annual_Cum_GDD",
+                    color="Year",
+                    title=f"Cumulative GDD per Year for {crop_gdd_select} (T_base={t_base_trend}C)",
+                    labels={"Annual_Cum_GDD": "Cumulative GDD"},
+                    color_discrete_sequence=px.colors.sequential.Viridis,
+                    render_mode="webgl",
+                )
+                st.plotly_chart(fig_gdd_trend, use_container_width=True)
+
+                # --- Comparative Analysis (Past vs Current vs Future) ---
+            st.markdown("---")
+            st.subheader("🔮 Integrated Season View (Past vs Current vs Future)")
+            st.caption("💡 **For farmers:** Compare this year's weather (green) to past years' average (gray) and upcoming forecast (blue). This helps you know if this year is warmer, cooler, wetter, or drier than normal.")
+        
+            # Prepare Data
+            # 1. Historical Baseline
+            seasonality = calculate_historical_seasonality(df_zone_full)
+        
+            # 2. Current Year Data
+            df_current = df_zone[df_zone.index.year == CURRENT_YEAR].copy()
+            df_current_daily = calculate_daily_aggregates(df_current)
+            if not df_current_daily.empty:
+                df_current_daily["DayOfYear"] = df_current_daily.index.dayofyear
+        
+            # 3. Forecast Data
+            # Reuse the forecast Tab 2 stored this session if its payload is within the forecast TTL, else fetch
+            cached_forecast = st.session_state.get("forecast_cache", {}).get(selected_zone)
+            if cached_forecast is not None and NOW - cached_forecast[0] < FORECAST_TTL:
+                df_forecast_daily = cached_forecast[1]
+            else:
+                df_forecast_daily = fetch_daily_forecast(selected_zone)
+            if not df_forecast_daily.empty:
+                # assign() so the frame shared with Tab 2 is left untouched
+                df_forecast_daily = df_forecast_daily.assign(
+                    DayOfYear=pd.to_datetime(df_forecast_daily["date"]).dt.dayofyear.astype("int16")
+                )
         
-        if not df_gdd_all.empty:
-            df_gdd_all["Year"] = df_gdd_all.index.year
-            df_gdd_all["DayOfYear"] = df_gdd_all.index.dayofyear
+            # --- Visualization: Temperature Trajectory ---
+            fig_comp = go.Figure()
+        
+            # Historical Avg (Background)
+            if not seasonality.empty:
+                fig_comp.add_trace(go.Scattergl(
+                    x=seasonality.index,
+                    y=seasonality["T_avg"],
+                    mode='lines',
+                    name='Historical Avg (Baseline)',
+                    line=dict(color='gray', width=2, dash='dash'),
+                    opacity=0.5
+                ))
+
+            # Current Year (Reference)
+            if not df_current_daily.empty:
+                fig_comp.add_trace(go.Scattergl(
+                    x=df_current_daily["DayOfYear"],
+                    y=df_current_daily["T_avg"],
+                    mode='lines',
+                    name=f'{CURRENT_YEAR} Actuals',
+                    line=dict(color='#2E7D32', width=3)
+                ))
             
-            # Pivot for plotting
-            # We want x=DayOfYear, y=Cumulative_GDD, color=Year
-            # But Cumulative is continuous. We need cumulative RESET every year.
-            
-            # Recalculate cumulative GDD per year
-            df_gdd_all["Annual_Cum_GDD"] = df_gdd_all.groupby("Year")["Daily_GDD"].cumsum()
-            
-            fig_gdd_trend = px.line(
-                df_gdd_all,
-                x="DayOfYear",
-                y="Annual_Cum_GDD",
-                color="Year",
-                title=f"Cumulative GDD per Year for {crop_gdd_select} (T_base={t_base_trend}C)",
-                labels={"Annual_Cum_GDD": "Cumulative GDD"},
-                color_discrete_sequence=px.colors.sequential.Viridis
+            # Forecast (Projection)
+            if not df_forecast_daily.empty:
+                # Connect forecast to last point of actuals if available to make it look continuous
+                fig_comp.add_trace(go.Scattergl(
+                    x=df_forecast_daily["DayOfYear"],
+                    y=df_forecast_daily["temp_max"], 
+                    name='Forecast (Next 5 Days)',
+                    mode='lines+markers',
+                    line=dict(color='#FF6B6B', width=3, dash='dot')
+                ))
+
+            fig_comp.update_layout(
+                title="Temperature Comparison: Past, Present, and Future",
+                xaxis_title="Time of Year",
+                yaxis_title="Temperature (°C)",
+                hovermode="x unified",
+                xaxis=dict(range=[1, 366])
             )
-            st.plotly_chart(fig_gdd_trend, use_container_width=True)
-
-        # --- Comparative Analysis (Past vs Current vs Future) ---
-        st.markdown("---")
-        st.subheader("🔮 Integrated Season View (Past vs Current vs Future)")
-        st.caption("💡 **For farmers:** Compare this year's weather (green) to past years' average (gray) and upcoming forecast (blue). This helps you know if this year is warmer, cooler, wetter, or drier than normal.")
-        
-        # Prepare Data
-        current_year = datetime.now().year
-        
-        # 1. Historical Baseline
-        seasonality = calculate_historical_seasonality(df_raw[df_raw["Zone"] == selected_zone])
-        
-        # 2. Current Year Data
-        df_current = df_zone[df_zone.index.year == current_year].copy()
-        df_current_daily = calculate_daily_aggregates(df_current)
-        if not df_current_daily.empty:
-            df_current_daily["DayOfYear"] = df_current_daily.index.dayofyear
-        
-        # 3. Forecast Data
-        # Reuse the forecast data fetched in Tab 2 if possible, or fetch new
-        # For simplicity/robustness, we'll re-call the cached function
-        df_forecast_daily = fetch_daily_forecast(selected_zone)
-        if not df_forecast_daily.empty:
-            df_forecast_daily["DayOfYear"] = df_forecast_daily["date"].apply(lambda x: x.timetuple().tm_yday)
-        
-        # --- Visualization: Temperature Trajectory ---
-        fig_comp = go.Figure()
-        
-        # Historical Avg (Background)
-        if not seasonality.empty:
-            fig_comp.add_trace(go.Scatter(
-                x=seasonality.index,
-                y=seasonality["T_avg"],
-                mode='lines',
-                name='Historical Avg (Baseline)',
-                line=dict(color='gray', width=2, dash='dash'),
-                opacity=0.5
-            ))
-
-        # Current Year (Reference)
-        if not df_current_daily.empty:
-            fig_comp.add_trace(go.Scatter(
-                x=df_current_daily["DayOfYear"],
-                y=df_current_daily["T_avg"],
-                mode='lines',
-                name=f'{current_year} Actuals',
-                line=dict(color='#2E7D32', width=3)
-            ))
-            
-        # Forecast (Projection)
-        if not df_forecast_daily.empty:
-            # Connect forecast to last point of actuals if available to make it look continuous
-            fig_comp.add_trace(go.Scatter(
-                x=df_forecast_daily["DayOfYear"],
-                y=df_forecast_daily["temp_max"], 
-                name='Forecast (Next 5 Days)',
-                mode='lines+markers',
-                line=dict(color='#FF6B6B', width=3, dash='dot')
-            ))
-
-        fig_comp.update_layout(
-            title="Temperature Comparison: Past, Present, and Future",
-            xaxis_title="Time of Year",
-            yaxis_title="Temperature (°C)",
-            hovermode="x unified",
-            xaxis=dict(range=[1, 366])
-        )
         
-        # Dynamic Zoom
-        today_doy = datetime.now().timetuple().tm_yday
-        fig_comp.update_xaxes(range=[max(1, today_doy - 30), min(365, today_doy + 15)])
-        
-        # Convert day-of-year to actual date ranges for better readability
-        # Get current year for date conversion
-        current_year = datetime.now().year
-        
-        # Create function to convert day-of-year to date
-        def doy_to_date(day_of_year, year=current_year):
-            """Convert day of year to actual date"""
-            date = datetime(year, 1, 1) + timedelta(days=day_of_year - 1)
-            return date.strftime("%b %d")  # e.g., "Nov 16"
-        
-        # Generate tick values every 10 days within the visible range
-        visible_start = max(1, today_doy - 30)
-        visible_end = min(365, today_doy + 15)
-        tick_vals = list(range(visible_start, visible_end + 1, 10))
-        
-        # Convert to date ranges (e.g., "Nov 09 - Nov 19")
-        tick_text = []
-        for day in tick_vals:
-            start_date = doy_to_date(day)
-            end_date = doy_to_date(min(day + 9, 365))  # 10-day range
-            tick_text.append(f"{start_date} - {end_date}")
-        
-        # Update x-axis to show date ranges
-        fig_comp.update_xaxes(
-            tickmode='array',
-            tickvals=tick_vals,
-            ticktext=tick_text,
-            title="Date Range (10-Day Periods)"
-        )
+            # Dynamic Zoom
+            fig_comp.update_xaxes(range=[max(1, TODAY_DOY - 30), min(365, TODAY_DOY + 15)])
+        
+            # Convert day-of-year to actual date ranges for better readability
+            # Create function to convert day-of-year to date
+            def doy_to_date(day_of_year, year=CURRENT_YEAR):
+                """Convert day of year to actual date"""
+                date = datetime(year, 1, 1) + timedelta(days=day_of_year - 1)
+                return date.strftime("%b %d")  # e.g., "Nov 16"
+        
+            # Generate tick values every 10 days within the visible range
+            visible_start = max(1, TODAY_DOY - 30)
+            visible_end = min(365, TODAY_DOY + 15)
+            tick_vals = list(range(visible_start, visible_end + 1, 10))
+        
+            # Convert to date ranges (e.g., "Nov 09 - Nov 19")
+            tick_text = []
+            for day in tick_vals:
+                start_date = doy_to_date(day)
+                end_date = doy_to_date(min(day + 9, 365))  # 10-day range
+                tick_text.append(f"{start_date} - {end_date}")
+        
+            # Update x-axis to show date ranges
+            fig_comp.update_xaxes(
+                tickmode='array',
+                tickvals=tick_vals,
+                ticktext=tick_text,
+                title="Date Range (10-Day Periods)"
+            )
         
-        st.plotly_chart(fig_comp, use_container_width=True)
+            st.plotly_chart(fig_comp, use_container_width=True)
         
         
-        # --- Deviation Analysis (Metrics) ---
-        col1, col2 = st.columns(2)
+            # --- Deviation Analysis (Metrics) ---
+            col1, col2 = st.columns(2)
         
-        with col1:
-            st.subheader("📊 Cumulative Rainfall Deviation")
-            # Calc cumulative rain for current year vs baseline up to today
-            if not seasonality.empty and not df_current_daily.empty:
-                # Baseline cumsum (up to today)
-                baseline_rain_ytd = seasonality[seasonality.index <= today_doy]["Daily_Precipitation"].sum()
-                # Current cumsum
-                current_rain_ytd = df_current_daily["Daily_Precipitation"].sum()
+            with col1:
+                st.subheader("📊 Cumulative Rainfall Deviation")
+                # Calc cumulative rain for current year vs baseline up to today
+                if not seasonality.empty and not df_current_daily.empty:
+                    # Baseline (up to today) vs current year, one pass per frame
+                    ytd_base, ytd_current = calculate_ytd_comparison(df_zone_full, df_current, TODAY_DOY)
+                    baseline_rain_ytd = ytd_base["Daily_Precipitation"]
+                    current_rain_ytd = ytd_current["Daily_Precipitation"]
                 
-                diff = current_rain_ytd - baseline_rain_ytd
-                pct_diff = (diff / baseline_rain_ytd * 100) if baseline_rain_ytd > 0 else 0
+                    diff = current_rain_ytd - baseline_rain_ytd
+                    pct_diff = (diff / baseline_rain_ytd * 100) if baseline_rain_ytd > 0 else 0
                 
-                st.metric(
-                    label=f"Rainfall YTD ({current_year}) vs Average",
-                    value=f"{current_rain_ytd:.1f} mm",
-                    delta=f"{diff:.1f} mm ({pct_diff:+.1f}%)"
-                )
+                    st.metric(
+                        label=f"Rainfall YTD ({CURRENT_YEAR}) vs Average",
+                        value=f"{current_rain_ytd:.1f} mm",
+                        delta=f"{diff:.1f} mm ({pct_diff:+.1f}%)"
+                    )
                 
-                if pct_diff < -20:
-                    st.warning("⚠️ **Drier than normal**. Consider water conservation or irrigation planning.")
-                elif pct_diff > 20:
-                    st.info("💧 **Wetter than normal**. Monitor for waterlogging risks.")
-                else:
-                    st.success("✅ Rainfall is tracking close to historical average.")
+                    if pct_diff < -20:
+                        st.warning("⚠️ **Drier than normal**. Consider water conservation or irrigation planning.")
+                    elif pct_diff > 20:
+                        st.info("💧 **Wetter than normal**. Monitor for waterlogging risks.")
+                    else:
+                        st.success("✅ Rainfall is tracking close to historical average.")
                     
-        with col2:
-             st.subheader("🌡️ Heat Accumulation (GDD) Status")
-             # Similar logic for GDD/Temp
-             if not seasonality.empty and not df_current_daily.empty:
-                 baseline_temp_avg = seasonality[seasonality.index <= today_doy]["T_avg"].mean()
-                 current_temp_avg = df_current_daily["T_avg"].mean()
+            with col2:
+                 st.subheader("🌡️ Heat Accumulation (GDD) Status")
+                 # Similar logic for GDD/Temp
+                 if not seasonality.empty and not df_current_daily.empty:
+                     ytd_base, ytd_current = calculate_ytd_comparison(df_zone_full, df_current, TODAY_DOY)
+                     baseline_temp_avg = ytd_base["T_avg"]
+                     current_temp_avg = ytd_current["T_avg"]
                  
-                 temp_diff = current_temp_avg - baseline_temp_avg
+                     temp_diff = current_temp_avg - baseline_temp_avg
                  
-                 st.metric(
-                     label="Avg Temp YTD vs Historical",
-                     value=f"{current_temp_avg:.1f} °C",
-                     delta=f"{temp_diff:+.1f} °C"
-                 )
+                     st.metric(
+                         label="Avg Temp YTD vs Historical",
+                         value=f"{current_temp_avg:.1f} °C",
+                         delta=f"{temp_diff:+.1f} °C"
+                     )
 
-        st.markdown("---")
+            st.markdown("---")
 
         
 
@@ -2164,382 +2747,378 @@ with tab3:
 
 # --- TAB 6: Data Archive ---
 with tab6:
-    st.header("📁 Raw Data Archive")
+    if tab6.open:
+        st.header("📁 Raw Data Archive")
 
-    if not st.session_state.get("user"):
-         render_premium_lock_screen("Data Archive")
-    else:
-        st.subheader(f"Recent Records for {selected_zone}")
-
-        # Display options
-        st.write(f"Displaying the latest {len(df_zone)} records from the archive.")
-        
-        st.dataframe(
-            df_zone.tail(100)
-            .reset_index()
-            .style.format(
-                {
-                    "Timestamp": lambda t: t.strftime("%Y-%m-%d %H:%M:%S"),
-                    "T_current": "{:.1f}°C",
-                    "Humidity": "{:.0f}%",
-                    "Precipitation_1h": "{:.1f} mm",
-                    "Wind_Speed": "{:.1f} m/s",
-                    # Add other columns as needed
-                }
-            ),
-            use_container_width=True,
-        )
+        if not st.session_state.get("user"):
+             render_premium_lock_screen("Data Archive")
+        else:
+            st.subheader(f"Recent Records for {selected_zone}")
+
+            # Display options
+            st.write(f"Displaying the latest {len(df_zone)} records from the archive.")
         
-        @st.cache_data
-        def convert_df_to_csv(df):
-            # IMPORTANT: Cache the conversion to prevent computation on every rerun
-            return df.to_csv().encode('utf-8')
+            st.dataframe(format_archive_tail(df_zone), use_container_width=True)
 
-        csv_data = convert_df_to_csv(df_zone)
+            csv_data = convert_df_to_csv(df_zone)
 
-        st.download_button(
-            label="⬇️ Download Full Data (.csv)",
-            data=csv_data,
-            file_name=f"{selected_zone}_weather_data.csv",
-            mime="text/csv",
-        )
+            st.download_button(
+                label="⬇️ Download Full Data (.csv)",
+                data=csv_data,
+                file_name=f"{selected_zone}_weather_data.csv",
+                mime="text/csv",
+            )
 
 
 with tab5:
     # --- CROP PLANNING & SEASONAL RECOMMENDATIONS ---
-    st.markdown("---")
-    st.header("🗓️ Crop Planning & Seasonal Recommendations")
+    if tab5.open:
+        st.markdown("---")
+        st.header("🗓️ Crop Planning & Seasonal Recommendations")
     
-    if not st.session_state.get("user"):
-         render_premium_lock_screen("Crop Planning")
-    else:
-        st.info("👨‍🌾 **What This Shows:** Smart crop recommendations based on current season, historical weather patterns, and planting calendars. Tells you which crops to plant NOW for best results.")
+        if not st.session_state.get("user"):
+             render_premium_lock_screen("Crop Planning")
+        else:
+            st.info("👨‍🌾 **What This Shows:** Smart crop recommendations based on current season, historical weather patterns, and planting calendars. Tells you which crops to plant NOW for best results.")
 
-        # Planting window advisory
-        st.subheader("📅 Planting Window Advisory")
-        st.caption("💡 **For farmers:** This tells you the best time to plant crops based on historical rainfall patterns.")
+            # Planting window advisory
+            st.subheader("📅 Planting Window Advisory")
+            st.caption("💡 **For farmers:** This tells you the best time to plant crops based on historical rainfall patterns.")
 
-        st.success(
-            f"**RECOMMENDED PLANTING PERIOD for {selected_zone}:** Based on past years, the best time to plant is between **March 15 and April 30**."
-        )
+            st.success(
+                f"**RECOMMENDED PLANTING PERIOD for {selected_zone}:** Based on past years, the best time to plant is between **March 15 and April 30**."
+            )
 
-        st.info(
-            "**Why this period?** This is when rain usually starts and soil is warm enough for seeds to grow. Always check current year weather before planting!"
-        )
+            st.info(
+                "**Why this period?** This is when rain usually starts and soil is warm enough for seeds to grow. Always check current year weather before planting!"
+            )
 
     
-        # Get current month and season
-        current_month = datetime.now().month
-        current_season = get_current_season(current_month)
-        month_names = ["", "January", "February", "March", "April", "May", "June", 
-                      "July", "August", "September", "October", "November", "December"]
-        
-        # Display current season
-        col_season1, col_season2 = st.columns([1, 2])
-        
-        with col_season1:
-            st.markdown(f"### 📅 Current Month")
-            st.markdown(f"# {month_names[current_month]}")
-            st.caption(f"Month {current_month} of 12")
-        
-        with col_season2:
-            st.markdown(f"### 🌦️ Agricultural Season")
-            st.markdown(f"# {current_season['name']}")
-            st.write(f"**Characteristics:**")
-            st.write(f"- Rainfall: {current_season['characteristics']['rainfall']}")
-            st.write(f"- Temperature: {current_season['characteristics']['temperature']}")
-            st.write(f"- Farming: {current_season['characteristics']['farming_activities']}")
-        
-        st.markdown("---")
-        
-        # Get crop recommendations
-        with st.spinner("Analyzing historical data and calculating crop suitability..."):
-            # Prepare historical data
-            df_history = df_raw[df_raw["Zone"] == selected_zone].copy()
+            # Get current month and season
+            current_month = NOW.month
+            current_season = get_current_season(current_month)
+            month_names = ["", "January", "February", "March", "April", "May", "June", 
+                          "July", "August", "September", "October", "November", "December"]
+        
+            # Display current season
+            col_season1, col_season2 = st.columns([1, 2])
+        
+            with col_season1:
+                st.markdown(f"### 📅 Current Month")
+                st.markdown(f"# {month_names[current_month]}")
+                st.caption(f"Month {current_month} of 12")
+        
+            with col_season2:
+                st.markdown(f"### 🌦️ Agricultural Season")
+                st.markdown(f"# {current_season['name']}")
+                st.write(f"**Characteristics:**")
+                st.write(f"- Rainfall: {current_season['characteristics']['rainfall']}")
+                st.write(f"- Temperature: {current_season['characteristics']['temperature']}")
+                st.write(f"- Farming: {current_season['characteristics']['farming_activities']}")
+        
+            st.markdown("---")
+        
+            # Get crop recommendations
+            with st.spinner("Analyzing historical data and calculating crop suitability..."):
+                # Prepare historical data
+                df_history = df_zone_full
             
-            # Get recommendations
-            recommendations = get_crop_recommendations(df_history, current_month, selected_zone)
-        
-        # Display recommendations by category
-        st.subheader("🌾 Recommended Crops for This Month")
-        
-        # Recommendations
-        st.subheader("🌟 Top Recommendations")
-        
-        if st.button("🔊 Listen to Crop Recommendations"):
-             top_crop = recommendations[0] if recommendations else None
-             season = get_current_season()
-             crop_text = generate_crop_plan_summary(top_crop, season)
-             autoplay_audio(text_to_audio(crop_text))[0]
-        
-        # Group by category
-        highly_recommended = [r for r in recommendations if r['priority'] == 1]
-        recommended = [r for r in recommendations if r['priority'] == 2]
-        moderately_suitable = [r for r in recommendations if r['priority'] == 3]
-        not_recommended = [r for r in recommendations if r['priority'] == 4]
-        
-        # Highly Recommended
-        if highly_recommended:
-            st.markdown("### 🟢 HIGHLY RECOMMENDED (Plant Now!)")
-            st.success("These crops are in their optimal planting window with ideal conditions expected.")
+                # Get recommendations (cached until new data arrives for the zone)
+                data_key = (df_history.index[-1], len(df_history)) if not df_history.empty else None
+                recommendations = get_crop_recommendations_cached(df_history, current_month, selected_zone, data_key)
+        
+            # Display recommendations by category
+            st.subheader("🌾 Recommended Crops for This Month")
+        
+            # Recommendations
+            st.subheader("🌟 Top Recommendations")
+        
+            if st.button("🔊 Listen to Crop Recommendations"):
+                 top_crop = recommendations.iloc[0].to_dict() if not recommendations.empty else None
+                 season = get_current_season()
+                 crop_text = generate_crop_plan_summary(top_crop, season)
+                 autoplay_audio(text_to_audio(crop_text))
+        
+            # Group by category
+            by_priority = {
+                priority: group.to_dict("records")
+                for priority, group in recommendations.groupby("priority", sort=False)
+            }
+            highly_recommended = by_priority.get(1, [])
+            recommended = by_priority.get(2, [])
+            moderately_suitable = by_priority.get(3, [])
+            not_recommended = by_priority.get(4, [])
+        
+            # Highly Recommended
+            if highly_recommended:
+                st.markdown("### 🟢 HIGHLY RECOMMENDED (Plant Now!)")
+                st.success("These crops are in their optimal planting window with ideal conditions expected.")
             
-            for i, rec in enumerate(highly_recommended, 1):
-                with st.expander(f"{i}. **{rec['crop']}** - {rec['score']:.0f}% Match", expanded=(i==1)):
-                    col1, col2 = st.columns([2, 1])
+                for i, rec in enumerate(highly_recommended, 1):
+                    with st.expander(f"{i}. **{rec['crop']}** - {rec['score']:.0f}% Match", expanded=(i==1)):
+                        col1, col2 = st.columns([2, 1])
                     
-                    with col1:
-                        st.markdown("**Why This Crop:**")
-                        for reason in rec['reasons']:
-                            st.write(f"- {reason}")
+                        with col1:
+                            st.markdown("**Why This Crop:**")
+                            for reason in rec['reasons']:
+                                st.write(f"- {reason}")
                     
-                    with col2:
-                        st.markdown("**Quick Facts:**")
-                        st.write(f"💧 Water: {rec['water_requirement']}")
-                        st.write(f"🌱 Soil: {rec['soil_type']}")
-                        st.write(f"📅 Growing: {rec['growing_days']} days")
-                        st.write(f" Harvest: {rec['expected_harvest']}")
-                        st.write(f"🚜 **Recommended Planting Date:** {rec.get('smart_planting_date', 'N/A')}")
-                        st.write(f"🗓️ Best Planting: {rec['optimal_planting_text']}")
+                        with col2:
+                            st.markdown("**Quick Facts:**")
+                            st.write(f"💧 Water: {rec['water_requirement']}")
+                            st.write(f"🌱 Soil: {rec['soil_type']}")
+                            st.write(f"📅 Growing: {rec['growing_days']} days")
+                            st.write(f" Harvest: {rec['expected_harvest']}")
+                            st.write(f"🚜 **Recommended Planting Date:** {rec.get('smart_planting_date', 'N/A')}")
+                            st.write(f"🗓️ Best Planting: {rec['optimal_planting_text']}")
                     
-                    st.caption(f"ℹ️ {rec['description']}")
+                        st.caption(f"ℹ️ {rec['description']}")
         
-        # Recommended
-        if recommended:
-            st.markdown("### 🟡 RECOMMENDED (Good to Plant)")
-            st.info("These crops can be planted now with good success potential.")
+            # Recommended
+            if recommended:
+                st.markdown("### 🟡 RECOMMENDED (Good to Plant)")
+                st.info("These crops can be planted now with good success potential.")
             
-            for i, rec in enumerate(recommended, 1):
-                with st.expander(f"{i}. **{rec['crop']}** - {rec['score']:.0f}% Match"):
-                    col1, col2 = st.columns([2, 1])
+                for i, rec in enumerate(recommended, 1):
+                    with st.expander(f"{i}. **{rec['crop']}** - {rec['score']:.0f}% Match"):
+                        col1, col2 = st.columns([2, 1])
                     
-                    with col1:
-                        st.markdown("**Analysis:**")
-                        for reason in rec['reasons']:
-                            st.write(f"- {reason}")
+                        with col1:
+                            st.markdown("**Analysis:**")
+                            for reason in rec['reasons']:
+                                st.write(f"- {reason}")
                     
-                    with col2:
-                        st.markdown("**Details:**")
-                        st.write(f"💧 {rec['water_requirement']}")
-                        st.write(f"🌱 {rec['soil_type']}")
-                        st.write(f"📅 {rec['growing_days']} days")
-                        st.write(f" {rec['expected_harvest']}")
-                        st.write(f"🚜 **Recommended Planting Date:** {rec.get('smart_planting_date', 'N/A')}")
-                        st.write(f"🗓️ Best Plant: {rec['optimal_planting_text']}")
-        
-        # Moderately Suitable
-        if moderately_suitable:
-            st.markdown("### 🟠 MODERATELY SUITABLE (Consider Carefully)")
-            st.warning("These crops can work but may need extra care or have suboptimal conditions.")
+                        with col2:
+                            st.markdown("**Details:**")
+                            st.write(f"💧 {rec['water_requirement']}")
+                            st.write(f"🌱 {rec['soil_type']}")
+                            st.write(f"📅 {rec['growing_days']} days")
+                            st.write(f" {rec['expected_harvest']}")
+                            st.write(f"🚜 **Recommended Planting Date:** {rec.get('smart_planting_date', 'N/A')}")
+                            st.write(f"🗓️ Best Plant: {rec['optimal_planting_text']}")
+        
+            # Moderately Suitable
+            if moderately_suitable:
+                st.markdown("### 🟠 MODERATELY SUITABLE (Consider Carefully)")
+                st.warning("These crops can work but may need extra care or have suboptimal conditions.")
             
-            for i, rec in enumerate(moderately_suitable, 1):
-                with st.expander(f"{i}. **{rec['crop']}** - {rec['score']:.0f}% Match"):
-                    for reason in rec['reasons']:
-                        st.write(f"- {reason}")
-                    st.caption(f"Growing: {rec['growing_days']} days | Harvest: {rec['expected_harvest']} | Best Plant: {rec['optimal_planting_text']}")
-        
-        # Not Recommended
-        if not_recommended:
-            with st.expander("🔴 NOT RECOMMENDED (Wait for Better Season)", expanded=False):
-                st.error("These crops are not suitable for planting this month. Wait for their optimal season.")
-                
-                for rec in not_recommended:
-                    st.write(f"**{rec['crop']}** ({rec['score']:.0f}%)")
-                    for reason in rec['reasons']:
-                        st.write(f"  - {reason}")
-                    st.write("")
+                for i, rec in enumerate(moderately_suitable, 1):
+                    with st.expander(f"{i}. **{rec['crop']}** - {rec['score']:.0f}% Match"):
+                        for reason in rec['reasons']:
+                            st.write(f"- {reason}")
+                        st.caption(f"Growing: {rec['growing_days']} days | Harvest: {rec['expected_harvest']} | Best Plant: {rec['optimal_planting_text']}")
         
-        st.markdown("---")
+            # Not Recommended
+            if not_recommended:
+                with st.expander("🔴 NOT RECOMMENDED (Wait for Better Season)", expanded=False):
+                    st.error("These crops are not suitable for planting this month. Wait for their optimal season.")
+                
+                    for rec in not_recommended:
+                        st.write(f"**{rec['crop']}** ({rec['score']:.0f}%)")
+                        for reason in rec['reasons']:
+                            st.write(f"  - {reason}")
+                        st.write("")
+        
+            st.markdown("---")
+        
+            # Planting Calendar Visualization
+            st.subheader("📆 Annual Planting Calendar")
+            st.caption("Visual guide showing optimal planting months for each crop throughout the year")
+        
+            # Create calendar heatmap
+            calendar_data = get_planting_calendar()
+        
+            # Prepare data for heatmap
+            crops = list(calendar_data.keys())
+            months = list(range(1, 13))
+            month_labels = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+        
+            # Create matrix: 2 = optimal, 1 = acceptable, 0 = not suitable
+            calendar_matrix = []
+            for crop in crops:
+                row = []
+                for month in months:
+                    if month in calendar_data[crop]['optimal']:
+                        row.append(2)  # Optimal
+                    elif month in calendar_data[crop]['planting']:
+                        row.append(1)  # Acceptable
+                    else:
+                        row.append(0)  # Not suitable
+                calendar_matrix.append(row)
+        
+            # Create heatmap
+            fig_calendar = go.Figure(data=go.Heatmap(
+                z=calendar_matrix,
+                x=month_labels,
+                y=crops,
+                colorscale=[
+                    [0, '#2d2d2d'],      # Not suitable - dark gray
+                    [0.5, '#FFA726'],    # Acceptable - orange
+                    [1, '#66BB6A']       # Optimal - green
+                ],
+                showscale=False,
+                hovertemplate='<b>%{y}</b><br>Month: %{x}<br>Status: %{z}<extra></extra>',
+                text=[[
+                    'Optimal' if calendar_matrix[i][j] == 2 
+                    else 'Acceptable' if calendar_matrix[i][j] == 1 
+                    else 'Not Suitable' 
+                    for j in range(12)
+                ] for i in range(len(crops))],
+                texttemplate='',
+            ))
         
-        # Planting Calendar Visualization
-        st.subheader("📆 Annual Planting Calendar")
-        st.caption("Visual guide showing optimal planting months for each crop throughout the year")
-        
-        # Create calendar heatmap
-        calendar_data = get_planting_calendar()
-        
-        # Prepare data for heatmap
-        crops = list(calendar_data.keys())
-        months = list(range(1, 13))
-        month_labels = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-        
-        # Create matrix: 2 = optimal, 1 = acceptable, 0 = not suitable
-        calendar_matrix = []
-        for crop in crops:
-            row = []
-            for month in months:
-                if month in calendar_data[crop]['optimal']:
-                    row.append(2)  # Optimal
-                elif month in calendar_data[crop]['planting']:
-                    row.append(1)  # Acceptable
-                else:
-                    row.append(0)  # Not suitable
-            calendar_matrix.append(row)
-        
-        # Create heatmap
-        fig_calendar = go.Figure(data=go.Heatmap(
-            z=calendar_matrix,
-            x=month_labels,
-            y=crops,
-            colorscale=[
-                [0, '#2d2d2d'],      # Not suitable - dark gray
-                [0.5, '#FFA726'],    # Acceptable - orange
-                [1, '#66BB6A']       # Optimal - green
-            ],
-            showscale=False,
-            hovertemplate='<b>%{y}</b><br>Month: %{x}<br>Status: %{z}<extra></extra>',
-            text=[[
-                'Optimal' if calendar_matrix[i][j] == 2 
-                else 'Acceptable' if calendar_matrix[i][j] == 1 
-                else 'Not Suitable' 
-                for j in range(12)
-            ] for i in range(len(crops))],
-            texttemplate='',
-        ))
-        
-        # Highlight current month
-        fig_calendar.add_vline(
-            x=current_month - 1,
-            line_dash="dash",
-            line_color="cyan",
-            line_width=3,
-            annotation_text=f"Current: {month_labels[current_month-1]}",
-            annotation_position="top"
-        )
+            # Highlight current month
+            fig_calendar.add_vline(
+                x=current_month - 1,
+                line_dash="dash",
+                line_color="cyan",
+                line_width=3,
+                annotation_text=f"Current: {month_labels[current_month-1]}",
+                annotation_position="top"
+            )
         
-        fig_calendar.update_layout(
-            title="Crop Planting Calendar - Abia State",
-            xaxis_title="Month",
-            yaxis_title="Crop",
-            height=500,
-            xaxis=dict(side='top'),
-        )
+            fig_calendar.update_layout(
+                title="Crop Planting Calendar - Abia State",
+                xaxis_title="Month",
+                yaxis_title="Crop",
+                height=500,
+                xaxis=dict(side='top'),
+            )
         
-        st.plotly_chart(fig_calendar, use_container_width=True)
+            st.plotly_chart(fig_calendar, use_container_width=True)
         
-        # Legend
-        col_leg1, col_leg2, col_leg3 = st.columns(3)
-        with col_leg1:
-            st.markdown("🟢 **Green** = Optimal planting window")
-        with col_leg2:
-            st.markdown("🟠 **Orange** = Acceptable planting period")
-        with col_leg3:
-            st.markdown("⬛ **Gray** = Not recommended")
+            # Legend
+            col_leg1, col_leg2, col_leg3 = st.columns(3)
+            with col_leg1:
+                st.markdown("🟢 **Green** = Optimal planting window")
+            with col_leg2:
+                st.markdown("🟠 **Orange** = Acceptable planting period")
+            with col_leg3:
+                st.markdown("⬛ **Gray** = Not recommended")
         
-        st.caption("💡 **Tip:** Focus on crops showing green (optimal) for current month for best results!")
+            st.caption("💡 **Tip:** Focus on crops showing green (optimal) for current month for best results!")
         
-        st.markdown("---")
+            st.markdown("---")
         
-        # --- Integrated GDD Tracking Section ---
-        st.subheader("🌱 Track Crop Progress (GDD)")
-        st.info("👨‍🌾 **Monitor Your Crops:** Select a crop below to track its growth progress based on heat accumulation (Growing Degree Days).")
+            # --- Integrated GDD Tracking Section ---
+            st.subheader("🌱 Track Crop Progress (GDD)")
+            st.info("👨‍🌾 **Monitor Your Crops:** Select a crop below to track its growth progress based on heat accumulation (Growing Degree Days).")
         
-        with st.expander("❓ What is GDD? (Click to learn more)"):
-            st.write("""
+            with st.expander("❓ What is GDD? (Click to learn more)"):
+                st.write("""
             **Growing Degree Days (GDD)** measures the heat your crops receive.
             - **How it works:** We add up daily heat units. When the total reaches the target, the crop is ready.
             - **Why use it:** It's more accurate than counting calendar days because crops grow faster in warm weather.
             """)
         
-        # Crop Selector using dynamic database
-        col_sel1, col_sel2 = st.columns(2)
-        with col_sel1:
-            crop_track_name = st.selectbox(
-                "Select Crop to Track:", 
-                list(SEASONAL_CROPS.keys()),
-                key="gdd_crop_select"
-            )
-        
-        # Get parameters from SEASONAL_CROPS
-        crop_params = SEASONAL_CROPS[crop_track_name]
-        t_base_track = crop_params["T_base"]
-        gdd_target_track = crop_params["GDD_to_Maturity"] # Total Required
-        
-        with col_sel2:
-            # Planting Date Input (Defaults to 30 days ago for demo)
-            default_plant = datetime.now() - timedelta(days=30)
-            planting_date = st.date_input(
-                "Select Planting Date:",
-                value=default_plant,
-                key="gdd_plant_date",
-                help="Select the date when the crop was planted to track progress accurately."
-            )
+            # Crop Selector using dynamic database
+            col_sel1, col_sel2 = st.columns(2)
+            with col_sel1:
+                crop_options = list(SEASONAL_CROPS.keys())
+                crop_track_name = keep_value("gdd_crop_select", st.selectbox(
+                    "Select Crop to Track:", 
+                    crop_options,
+                    index=crop_options.index(kept_value("gdd_crop_select", crop_options[0])),
+                    key="gdd_crop_select"
+                ))
+        
+            # Get parameters from SEASONAL_CROPS
+            crop_params = SEASONAL_CROPS[crop_track_name]
+            t_base_track = crop_params["T_base"]
+            gdd_target_track = crop_params["GDD_to_Maturity"] # Total Required
+        
+            with col_sel2:
+                # Planting Date Input (Defaults to 30 days ago for demo)
+                default_plant = NOW - timedelta(days=30)
+                planting_date = keep_value("gdd_plant_date", st.date_input(
+                    "Select Planting Date:",
+                    value=kept_value("gdd_plant_date", default_plant),
+                    key="gdd_plant_date",
+                    help="Select the date when the crop was planted to track progress accurately."
+                ))
     
-        col_track1, col_track2 = st.columns(2)
-        with col_track1:
-            st.write(f"**Crop:** {crop_track_name}")
-            st.write(f"**Base Temp:** {t_base_track}°C")
-        with col_track2:
-            st.write(f"**Maturity Target:** {gdd_target_track} GDD")
-            st.write(f"**Growing Season:** {crop_params['growing_season_days']} days (approx)")
-        
-        # Filter history for this crop season (from planting date)
-        # Ensure specific date comparison
-        plant_ts = pd.Timestamp(planting_date)
-        if df_history.index.tz is not None and plant_ts.tz is None:
-             plant_ts = plant_ts.tz_localize(df_history.index.tz)
-        elif df_history.index.tz is None and plant_ts.tz is not None:
-             plant_ts = plant_ts.tz_localize(None)
+            col_track1, col_track2 = st.columns(2)
+            with col_track1:
+                st.write(f"**Crop:** {crop_track_name}")
+                st.write(f"**Base Temp:** {t_base_track}°C")
+            with col_track2:
+                st.write(f"**Maturity Target:** {gdd_target_track} GDD")
+                st.write(f"**Growing Season:** {crop_params['growing_season_days']} days (approx)")
+        
+            # Filter history for this crop season (from planting date)
+            # Ensure specific date comparison
+            plant_ts = pd.Timestamp(planting_date)
+            if df_history.index.tz is not None and plant_ts.tz is None:
+                 plant_ts = plant_ts.tz_localize(df_history.index.tz)
+            elif df_history.index.tz is None and plant_ts.tz is not None:
+                 plant_ts = plant_ts.tz_localize(None)
     
-        df_crop_season = df_history[df_history.index >= plant_ts].copy()
+            df_crop_season = df_history[df_history.index >= plant_ts].copy()
         
-        if df_crop_season.empty:
-             st.warning("No data available since selected planting date.")
-        else:
-            # Calculate GDD for this specific season
-            df_gdd_track = calculate_gdd(df_crop_season, t_base_track) 
+            if df_crop_season.empty:
+                 st.warning("No data available since selected planting date.")
+            else:
+                # Calculate GDD for this specific season
+                df_gdd_track = calculate_gdd(df_crop_season, t_base_track) 
             
-            if not df_gdd_track.empty:
-                current_gdd_track = df_gdd_track["Cumulative_GDD"].iloc[-1]
+                if not df_gdd_track.empty:
+                    current_gdd_track = df_gdd_track["Cumulative_GDD"].iat[-1]
                 
-                # Calculate progress
-                progress_track = (current_gdd_track / gdd_target_track) * 100
+                    # Calculate progress
+                    progress_track = (current_gdd_track / gdd_target_track) * 100
                 
-                # Metrics
-                # User request: "Cumulative, current and total GDD"
-                # We interpret: Cumulative = Total so far, Total = Target, Current = Daily Avg?
+                    # Metrics
+                    # User request: "Cumulative, current and total GDD"
+                    # We interpret: Cumulative = Total so far, Total = Target, Current = Daily Avg?
                 
-                m1, m2, m3, m4 = st.columns(4)
-                m1.metric("Cumulative GDD", f"{current_gdd_track:.0f}", help="Total heat units accumulated since planting")
-                m2.metric("Required Total", f"{gdd_target_track}", help="Total GDD needed for maturity")
+                    m1, m2, m3, m4 = st.columns(4)
+                    m1.metric("Cumulative GDD", f"{current_gdd_track:.0f}", help="Total heat units accumulated since planting")
+                    m2.metric("Required Total", f"{gdd_target_track}", help="Total GDD needed for maturity")
                 
-                # Current Daily GDD (Average of last 7 days)
-                recent_daily_gdd = df_gdd_track.tail(7)["Daily_GDD"].mean()
-                m3.metric("Daily GDD (Avg)", f"{recent_daily_gdd:.1f}", help="Average GDD gained per day recently")
+                    # Current Daily GDD (Average of last 7 days)
+                    recent_daily_gdd = df_gdd_track.tail(7)["Daily_GDD"].mean()
+                    m3.metric("Daily GDD (Avg)", f"{recent_daily_gdd:.1f}", help="Average GDD gained per day recently")
                 
-                m4.metric("Progress", f"{progress_track:.1f}%")
+                    m4.metric("Progress", f"{progress_track:.1f}%")
                 
-                # Progress Bar
-                st.progress(min(progress_track / 100, 1.0))
+                    # Progress Bar
+                    st.progress(min(progress_track / 100, 1.0))
                 
-                # Status Message
-                if progress_track >= 100:
-                    st.success(f"🎉 **Ready for Harvest!** {crop_track_name} has reached maturity.")
-                elif progress_track >= 80:
-                    st.info("🌾 **Almost Ready.** Crop is nearing maturity.")
-                elif progress_track >= 50:
-                    st.info("✅ **Good Progress.** Halfway there!")
-                else:
-                    st.info("🌱 **Growing.** Early development stage.")
+                    # Status Message
+                    if progress_track >= 100:
+                        st.success(f"🎉 **Ready for Harvest!** {crop_track_name} has reached maturity.")
+                    elif progress_track >= 80:
+                        st.info("🌾 **Almost Ready.** Crop is nearing maturity.")
+                    elif progress_track >= 50:
+                        st.info("✅ **Good Progress.** Halfway there!")
+                    else:
+                        st.info("🌱 **Growing.** Early development stage.")
                     
-                # Estimated Dates
-                if progress_track < 100 and recent_daily_gdd > 0:
-                    # Remaining GDD
-                    remaining_gdd = gdd_target_track - current_gdd_track
-                    days_remaining = max(0, remaining_gdd / recent_daily_gdd)
-                    est_harvest = datetime.now() + timedelta(days=int(days_remaining))
+                    # Estimated Dates
+                    if progress_track < 100 and recent_daily_gdd > 0:
+                        # Remaining GDD
+                        remaining_gdd = gdd_target_track - current_gdd_track
+                        days_remaining = max(0, remaining_gdd / recent_daily_gdd)
+                        est_harvest = NOW + timedelta(days=int(days_remaining))
                     
-                    st.markdown(f"### 🗓️ Estimated Harvest: **{est_harvest.strftime('%B %d, %Y')}**")
-                    st.caption(f"Based on recent weather, you have approx. **{int(days_remaining)} days** left to reach maturity.")
+                        st.markdown(f"### 🗓️ Estimated Harvest: **{est_harvest.strftime('%B %d, %Y')}**")
+                        st.caption(f"Based on recent weather, you have approx. **{int(days_remaining)} days** left to reach maturity.")
             
-                # Chart
-                fig_track = px.line(
-                    df_gdd_track.reset_index(), # Show all data from planting
-                    x="Timestamp",
-                    y="Cumulative_GDD",
-                    title=f"GDD Accumulation Since Planting ({planting_date})",
-                    labels={"Cumulative_GDD": "Accumulated Heat units"}
-                )
-                fig_track.add_hline(y=gdd_target_track, line_dash="dash", line_color="green", annotation_text="Target")
-                st.plotly_chart(fig_track, use_container_width=True)
-    
-    
+                    # Chart
+                    fig_track = px.line(
+                        df_gdd_track.reset_index(), # Show all data from planting
+                        x="Timestamp",
+                        y="Cumulative_GDD",
+                        title=f"GDD Accumulation Since Planting ({planting_date})",
+                        labels={"Cumulative_GDD": "Accumulated Heat units"},
+                        render_mode="webgl",
+                    )
+                    fig_track.add_hline(y=gdd_target_track, line_dash="dash", line_color="green", annotation_text="Target")
+                    st.plotly_chart(fig_track, use_container_width=True)
+
+
+# --- Queued SMS/Email results ---
+# Runs last so sends queued anywhere above are picked up; polls on a timer only while any are in flight
+st.fragment(run_every=NOTIFY_POLL_SECONDS if st.session_state.get("notify_jobs") else None)(
+    render_notification_status
+)()
@@ -52,6 +52,8 @@ class WeatherDataCollector:
         self.api_key = API_KEY
         self.zones = AGRICULTURAL_ZONES
         self.archive_file = DATA_ARCHIVE_FILE
+        # Reuse one keep-alive connection for all zone requests
+        self.session = requests.Session()
         
         # Initialize Supabase Client
         self.supabase: Optional[Client] = None
@@ -82,7 +84,7 @@ class WeatherDataCollector:
 
         for attempt in range(MAX_RETRIES):
             try:
-                response = requests.get(
+                response = self.session.get(
                     WEATHER_API_URL, params=params, timeout=API_TIMEOUT
                 )
                 response.raise_for_status()
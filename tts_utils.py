@@ -1,27 +1,120 @@
 from gtts import gTTS
+import hashlib
 import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import streamlit as st
 
-@st.cache_data(show_spinner=False)
+# Synthesized clips, keyed by a hash of (lang, text); survives server restarts
+TTS_CACHE_DIR = Path(".tts_cache")
+# Disk cache bounds: clips older than this, or beyond the newest N, are pruned after each write
+TTS_CACHE_MAX_AGE = 7 * 24 * 60 * 60  # seconds
+TTS_CACHE_MAX_FILES = 500
+# After a failed synthesis (gTTS unreachable, 429), skip background prerendering for this long
+TTS_FAILURE_COOLDOWN = 5 * 60  # seconds
+
+_last_failure = 0.0  # time.monotonic() of the most recent failed synthesis
+
+def _prune_cache():
+    """Delete expired clips, leftover temp files, and the oldest clips beyond TTS_CACHE_MAX_FILES."""
+    cutoff = time.time() - TTS_CACHE_MAX_AGE
+    clips = []
+    for path in TTS_CACHE_DIR.iterdir():
+        try:
+            mtime = path.stat().st_mtime
+            if mtime < cutoff:
+                path.unlink()
+            elif path.suffix == ".mp3":
+                clips.append((mtime, path))
+        except OSError:
+            pass  # removed by a concurrent writer/pruner
+    clips.sort(reverse=True)
+    for _, path in clips[TTS_CACHE_MAX_FILES:]:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+def _write_clip(path, data):
+    """Write data to path atomically (temp file in the same directory, then os.replace)."""
+    TTS_CACHE_DIR.mkdir(exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=TTS_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+@st.cache_data(ttl=24 * 60 * 60, max_entries=256, show_spinner=False)
+def _synthesize(text, lang="en"):
+    """
+    Returns MP3 bytes for text, from the on-disk cache or gTTS.
+    Raises on failure so a failed synthesis is not cached.
+    """
+    digest = hashlib.blake2b(f"{lang}:{text}".encode("utf-8"), digest_size=16).hexdigest()
+    path = TTS_CACHE_DIR / f"{digest}.mp3"
+    if path.exists():
+        return path.read_bytes()
+
+    tts = gTTS(text=text, lang=lang)
+    # Save to memory buffer
+    audio_bytes = io.BytesIO()
+    tts.write_to_fp(audio_bytes)
+    data = audio_bytes.getvalue()
+    try:
+        # Readers only ever see complete clips, even with the prerender pool racing a click
+        _write_clip(path, data)
+        _prune_cache()
+    except OSError as e:
+        print(f"TTS cache write failed: {e}")
+    return data
+
 def text_to_audio(text):
     """
     Converts text to audio bytes using gTTS.
-    Cached to prevent re-generation on every rerun.
+    Cached in memory for a day and on disk, so repeat clicks skip the network round-trip.
     """
+    global _last_failure
     try:
         if not text:
             return None
-            
-        tts = gTTS(text=text, lang='en')
-        # Save to memory buffer
-        audio_bytes = io.BytesIO()
-        tts.write_to_fp(audio_bytes)
-        audio_bytes.seek(0)
-        return audio_bytes
+        return _synthesize(text)
     except Exception as e:
         print(f"TTS Error: {e}")
+        _last_failure = time.monotonic()
         return None
 
+def _in_failure_cooldown():
+    """True if a synthesis failed within the last TTS_FAILURE_COOLDOWN seconds."""
+    return bool(_last_failure) and time.monotonic() - _last_failure < TTS_FAILURE_COOLDOWN
+
+@st.cache_resource(show_spinner=False)
+def _get_tts_pool():
+    """Small worker pool for background synthesis (one per server process)."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="tts")
+
+def prerender_audio(*texts):
+    """
+    Start synthesizing texts in the background.
+    A later text_to_audio call for the same text picks up the in-flight or finished result.
+    Skipped while gTTS is failing (see TTS_FAILURE_COOLDOWN) so unrequested clips don't keep
+    hitting the rate limit; a Listen click still tries synthesis directly.
+    """
+    if _in_failure_cooldown():
+        return
+    pool = _get_tts_pool()
+    for text in texts:
+        if text:
+            pool.submit(text_to_audio, text)
+
 def autoplay_audio(audio_bytes):
     """
     Helper to create an audio player in Streamlit.